@@ -0,0 +1,166 @@
+"""Headless batch jobs over every user with local data, no Streamlit required.
+
+    python batch.py reports --formats pdf csv parquet xlsx --output reports --workers 4
+    python batch.py maintain --workers 4
+    python batch.py sync --url http://127.0.0.1:8765
+    python batch.py --users alice --users bob reports --formats pdf
+"""
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+
+from core.analytics import calculate_totals
+from core.fx import BASE_CURRENCY, convert_frame, load_fx_table
+from core.ledger import TRANSACTION_COLUMNS, build_transaction_frame
+from core.mapped_data import open_user_data
+from core.reports import build_pdf_report
+from core.spending_monitor import SpendingMonitor
+from core.storage import find_user_data_path, load_local_data, maintain_local_data
+from core.sync import http_exchange, sync_local_data
+from core.xlsx_export import export_user_workbook
+from users import get_offline_users, get_sync_settings
+
+REPORT_FORMATS = ["pdf", "csv", "parquet", "xlsx"]
+
+
+def generate_user_reports(username, formats, output_dir):
+    """Write the requested report formats for one user; the data file is only read"""
+    data = open_user_data(username, migrate=False)
+    user_dir = Path(output_dir) / username.strip()
+    user_dir.mkdir(parents=True, exist_ok=True)
+
+    written, skipped = [], []
+    if "xlsx" in formats:
+        # Streamed from the mapped file before anything below decodes every row
+        export_user_workbook(user_dir / "expense_report.xlsx", data, BASE_CURRENCY)
+        written.append("xlsx")
+    if set(formats) - {"xlsx"}:
+        df = convert_frame(build_transaction_frame(data["expenses"]), load_fx_table(), BASE_CURRENCY)
+    if "csv" in formats:
+        df[TRANSACTION_COLUMNS].to_csv(user_dir / "expense_report.csv", index=False)
+        written.append("csv")
+    if "parquet" in formats:
+        try:
+            df[TRANSACTION_COLUMNS].to_parquet(user_dir / "expense_report.parquet", index=False)
+            written.append("parquet")
+        except ImportError:
+            # pandas needs pyarrow or fastparquet for Parquet output
+            skipped.append("parquet")
+    if "pdf" in formats:
+        total_income, total_expenses, remaining_balance = calculate_totals(df, data["income"])
+        monitor = SpendingMonitor(data["expenses"])
+        build_pdf_report(
+            df, total_income, total_expenses, remaining_balance,
+            data["savings_goals"],
+            unusual=monitor.unusual_transactions(limit=10),
+            spikes=monitor.category_spikes(datetime.now().strftime("%Y-%m")),
+            pdf_path=str(user_dir / "financial_report.pdf")
+        )
+        written.append("pdf")
+
+    return {
+        "username": username,
+        "transactions": len(data["expenses"]),
+        "detail": ", ".join(written) + (f" (skipped {', '.join(skipped)})" if skipped else "")
+    }
+
+
+def maintain_user(username):
+    """Migrate and compact one user's data file"""
+    bytes_before, bytes_after = maintain_local_data(username)
+    return {
+        "username": username,
+        "transactions": len(load_local_data(username)["expenses"]),
+        "detail": f"{bytes_before} -> {bytes_after} bytes",
+        "bytes_saved": bytes_before - bytes_after
+    }
+
+
+def sync_user(username, url):
+    """Exchange one user's changed records with the sync server"""
+    stats = sync_local_data(username, http_exchange(url, username))
+    return {
+        "username": username,
+        "transactions": stats["transactions"],
+        "detail": f"sent {stats['sent']}, received {stats['received']}, {stats['conflicts']} conflict(s)"
+    }
+
+
+def run_jobs(job, usernames, workers, *args):
+    """Run job for every user, printing progress and returning the results"""
+    started = time.perf_counter()
+    results = []
+    total = len(usernames)
+
+    def report(result):
+        results.append(result)
+        print(f"[{len(results)}/{total}] {result['username']}: {result['detail']} "
+              f"({time.perf_counter() - started:.2f}s)", flush=True)
+
+    def failed(username, error):
+        report({"username": username, "transactions": 0, "detail": f"failed: {error}"})
+
+    if workers == 1:
+        for username in usernames:
+            try:
+                result = job(username, *args)
+            except Exception as error:
+                failed(username, error)
+            else:
+                report(result)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(job, username, *args): username for username in usernames}
+            for future in as_completed(futures):
+                try:
+                    report(future.result())
+                except Exception as error:
+                    failed(futures[future], error)
+
+    elapsed = time.perf_counter() - started
+    transactions = sum(result["transactions"] for result in results)
+    print(f"Processed {len(results)} users / {transactions} transactions in {elapsed:.2f}s "
+          f"({len(results) / elapsed if elapsed else 0:.1f} users/s, "
+          f"{transactions / elapsed if elapsed else 0:.0f} transactions/s)")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch reports and storage maintenance for all users")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="process pool size (default: CPU count, 1 runs in-process)")
+    parser.add_argument("--users", action="append", metavar="USER",
+                        help="limit to this user, repeat for more (default: every user with local data)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    reports_parser = commands.add_parser("reports", help="generate PDF/CSV/Parquet reports")
+    reports_parser.add_argument("--formats", nargs="+", choices=REPORT_FORMATS, default=REPORT_FORMATS)
+    reports_parser.add_argument("--output", default="reports", help="output directory")
+
+    commands.add_parser("maintain", help="migrate and compact user data files")
+
+    sync_parser = commands.add_parser("sync", help="exchange changes with the sync server")
+    sync_parser.add_argument("--url", help="sync server address (default: the sync section of config.yaml)")
+
+    args = parser.parse_args(argv)
+    usernames = sorted(set(args.users or get_offline_users()))
+    for username in [username for username in usernames if find_user_data_path(username) is None]:
+        print(f"Skipping {username}: no local data")
+        usernames.remove(username)
+    if not usernames:
+        print("No users with local data found")
+        return []
+
+    if args.command == "reports":
+        return run_jobs(generate_user_reports, usernames, args.workers, args.formats, args.output)
+    if args.command == "sync":
+        return run_jobs(sync_user, usernames, args.workers, args.url or get_sync_settings()["url"])
+    results = run_jobs(maintain_user, usernames, args.workers)
+    print(f"Saved {sum(result.get('bytes_saved', 0) for result in results)} bytes")
+    return results
+
+
+if __name__ == "__main__":
+    main()
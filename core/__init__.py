@@ -0,0 +1,4 @@
+"""Streamlit-independent ledger core used by the dashboard and the batch jobs."""
+from core.analytics import calculate_monthly_trends, calculate_totals, get_category_analysis, savings_rate
+from core.ledger import Ledger, build_transaction_frame, get_category_options, get_transaction_types, make_expense
+from core.storage import load_local_data, save_local_data
@@ -0,0 +1,41 @@
+from typing import Tuple
+
+import pandas as pd
+
+
+def calculate_monthly_trends(df: pd.DataFrame) -> pd.DataFrame:
+    """Monthly totals with one column per transaction type, indexed by 'YYYY-MM'"""
+    if not df.empty:
+        # Group the categorical Month and Type codes, summing exact cents
+        monthly_wide = df.groupby(['Month', 'Type'], observed=True)['Cents'].sum().unstack('Type', fill_value=0) / 100
+        monthly_wide.index = monthly_wide.index.astype(str)
+        monthly_wide.columns = monthly_wide.columns.astype(str)
+        # Ensure both columns exist
+        if 'Expense' not in monthly_wide.columns:
+            monthly_wide['Expense'] = 0
+        if 'Additional Income' not in monthly_wide.columns:
+            monthly_wide['Additional Income'] = 0
+        return monthly_wide
+    return pd.DataFrame(columns=['Expense', 'Additional Income'])
+
+
+def get_category_analysis(expenses_df: pd.DataFrame) -> pd.Series:
+    if not expenses_df.empty:
+        totals = expenses_df.groupby('Category', observed=True)['Cents'].sum() / 100
+        totals.index = totals.index.astype(str)
+        return totals.rename('Amount')
+    return pd.Series(dtype=float)
+
+
+def calculate_totals(df: pd.DataFrame, income: float) -> Tuple[float, float, float]:
+    """(total income, total expenses, remaining balance) of a transactions frame"""
+    if df.empty:
+        return income, 0, income
+    total_expenses = df.loc[df['Type'] == 'Expense', 'Cents'].sum() / 100
+    additional_income = df.loc[df['Type'] == 'Additional Income', 'Cents'].sum() / 100
+    total_income = income + additional_income
+    return total_income, total_expenses, total_income - total_expenses
+
+
+def savings_rate(total_income: float, total_expenses: float) -> float:
+    return ((total_income - total_expenses) / total_income * 100) if total_income > 0 else 0
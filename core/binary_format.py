@@ -0,0 +1,224 @@
+"""Compact binary encoding of a user's data file.
+
+Layout (all integers little-endian):
+
+    magic b"SMMB" | uint16 version | uint32 header length | header JSON
+    string table: uint32 count | uint32 offsets[count + 1] | UTF-8 blob
+    one block per transaction column, in header order
+
+The header JSON holds the row count, the column list as [name, kind] pairs,
+every non-transaction field (income, reminders, savings goals) and, from
+version 2, a monthly rollup of [month, type, category, currency, cents] rows so
+summaries can be shown without decoding any transaction. Column kinds:
+'date' (int32 day ordinals), 'str' (uint32 string-table indices), 'f8', and
+'json' (string-table indices of JSON-encoded values, for any extra expense keys).
+"""
+import json
+import struct
+from collections import Counter
+from datetime import date
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+MAGIC = b"SMMB"
+FORMAT_VERSION = 2
+
+_PREAMBLE = struct.Struct("<4sHI")
+_COUNT = struct.Struct("<I")
+_MISSING = 0xFFFFFFFF
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+_ABSENT = object()
+_COLUMN_DTYPES = {'date': '<i4', 'str': '<u4', 'f8': '<f8', 'json': '<u4'}
+
+# Known transaction columns; any other expense key is stored as 'json'
+KNOWN_COLUMNS = {
+    'Date': 'date', 'Category': 'str', 'Amount': 'f8', 'Currency': 'str', 'Description': 'str', 'Type': 'str'
+}
+
+
+def is_binary_user_data(raw: bytes) -> bool:
+    return raw[:len(MAGIC)] == MAGIC
+
+
+def _columns_of(expenses: List[Dict[str, Any]]) -> List[Tuple[str, str]]:
+    names = list(KNOWN_COLUMNS)
+    for expense in expenses:
+        for name in expense:
+            if name not in names:
+                names.append(name)
+    return [(name, KNOWN_COLUMNS.get(name, 'json')) for name in names]
+
+
+def monthly_rollup(expenses: List[Dict[str, Any]]) -> List[List[Any]]:
+    """[month, type, category, currency, cents] totals of the transactions"""
+    totals = Counter()
+    for expense in expenses:
+        key = (expense['Date'][:7], expense['Type'], expense['Category'], expense.get('Currency'))
+        totals[key] += round(float(expense['Amount']) * 100)
+    return [[*key, cents] for key, cents in sorted(totals.items(), key=lambda item: tuple(map(str, item[0])))]
+
+
+def encode_user_data(data: Dict[str, Any]) -> bytes:
+    """Encode a user data dict (as returned by load_local_data) to bytes"""
+    expenses = data.get("expenses", [])
+    columns = _columns_of(expenses)
+    strings: Dict[str, int] = {}
+    blocks = []
+    for name, kind in columns:
+        values = [expense.get(name) for expense in expenses]
+        if kind == 'date':
+            array = np.array(values, dtype='datetime64[D]').astype('<i4') + _EPOCH_ORDINAL
+        elif kind == 'str':
+            array = np.array(
+                [_MISSING if value is None else strings.setdefault(str(value), len(strings)) for value in values],
+                dtype='<u4'
+            )
+        elif kind == 'f8':
+            array = np.array([np.nan if value is None else value for value in values], dtype='<f8')
+        else:
+            array = np.array(
+                [_MISSING if name not in expense else strings.setdefault(json.dumps(expense[name]), len(strings))
+                 for expense in expenses],
+                dtype='<u4'
+            )
+        blocks.append(array.tobytes())
+
+    encoded = [string.encode("utf-8") for string in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype='<u4')
+    offsets[1:] = np.cumsum([len(string) for string in encoded], dtype=np.uint64)
+
+    header = json.dumps({
+        "rows": len(expenses),
+        "columns": columns,
+        "data": {key: value for key, value in data.items() if key != "expenses"},
+        "rollup": monthly_rollup(expenses)
+    }, separators=(",", ":")).encode("utf-8")
+
+    return b"".join([
+        _PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header)),
+        header,
+        _COUNT.pack(len(encoded)),
+        offsets.tobytes(),
+        b"".join(encoded),
+        *blocks
+    ])
+
+
+def _require(raw, end: int) -> None:
+    # struct and a short slice would otherwise fail obscurely or decode too little
+    if len(raw) < end:
+        raise ValueError(f"User data file is truncated: {len(raw)} bytes, expected at least {end}")
+
+
+def read_header(raw) -> Tuple[int, Dict[str, Any], int]:
+    """(version, header, offset of the string table) of an encoded buffer"""
+    _require(raw, _PREAMBLE.size)
+    magic, version, header_length = _PREAMBLE.unpack_from(raw, 0)
+    if magic != MAGIC:
+        raise ValueError("Not a binary user data file")
+    if version > FORMAT_VERSION:
+        raise ValueError(f"User data format version {version} is newer than supported version {FORMAT_VERSION}")
+    start = _PREAMBLE.size
+    _require(raw, start + header_length)
+    header = json.loads(bytes(raw[start:start + header_length]).decode("utf-8"))
+    return version, header, start + header_length
+
+
+def read_string_table(raw, offset: int) -> Tuple[List[str], int]:
+    """Decoded strings and the offset just past the string table"""
+    offsets, offset = _string_offsets(raw, offset)
+    blob = bytes(raw[offset:offset + offsets[-1]])
+    strings = [blob[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(len(offsets) - 1)]
+    return strings, offset + offsets[-1]
+
+
+def _string_offsets(raw, offset: int) -> Tuple[List[int], int]:
+    """Offsets of the string table that begins at offset into its blob, and where the blob starts"""
+    _require(raw, offset + _COUNT.size)
+    (count,) = _COUNT.unpack_from(raw, offset)
+    offset += _COUNT.size
+    _require(raw, offset + 4 * (count + 1))
+    offsets = np.frombuffer(raw, dtype='<u4', count=count + 1, offset=offset).tolist()
+    offset += 4 * (count + 1)
+    _require(raw, offset + offsets[-1])
+    return offsets, offset
+
+
+class StringTable:
+    """String-table entries decoded on first access, for reading a few rows of a large file"""
+
+    def __init__(self, raw, offset: int) -> None:
+        self._raw = raw
+        self._offsets, self._blob_start = _string_offsets(raw, offset)
+        self._decoded: Dict[int, str] = {}
+        self.end = self._blob_start + self._offsets[-1]
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        value = self._decoded.get(index)
+        if value is None:
+            start, stop = self._offsets[index], self._offsets[index + 1]
+            value = bytes(self._raw[self._blob_start + start:self._blob_start + stop]).decode("utf-8")
+            self._decoded[index] = value
+        return value
+
+
+def decode_column(raw, offset: int, kind: str, rows: int, strings: List[str], start: int = 0,
+                  stop: int = None) -> List[Any]:
+    """Values of rows [start, stop) of the column block that begins at offset"""
+    stop = rows if stop is None else stop
+    dtype = np.dtype(_COLUMN_DTYPES[kind])
+    array = np.frombuffer(raw, dtype=dtype, count=stop - start, offset=offset + start * dtype.itemsize)
+    if kind == 'date':
+        # Ledgers repeat dates heavily, so format each distinct day once
+        days, inverse = np.unique(array, return_inverse=True)
+        formatted = (days - _EPOCH_ORDINAL).astype('datetime64[D]').astype(str).tolist()
+        return [formatted[index] for index in inverse.tolist()]
+    if kind == 'str':
+        return [None if index == _MISSING else strings[index] for index in array.tolist()]
+    if kind == 'f8':
+        return [None if value != value else value for value in array.tolist()]
+    return [_ABSENT if index == _MISSING else json.loads(strings[index]) for index in array.tolist()]
+
+
+def column_offsets(header: Dict[str, Any], offset: int, raw=None) -> List[int]:
+    """Start offset of every column block, given the offset just past the string table.
+
+    With raw, also checks that the buffer holds every block.
+    """
+    offsets = []
+    for _, kind in header["columns"]:
+        offsets.append(offset)
+        offset += header["rows"] * np.dtype(_COLUMN_DTYPES[kind]).itemsize
+    if raw is not None:
+        _require(raw, offset)
+    return offsets
+
+
+def decode_rows(raw, header: Dict[str, Any], strings, offsets: List[int], start: int = 0,
+                stop: int = None) -> List[Dict[str, Any]]:
+    """Transactions [start, stop) as dicts, given the start offset of every column block"""
+    names = [name for name, _ in header["columns"]]
+    values = [
+        decode_column(raw, offset, kind, header["rows"], strings, start, stop)
+        for (_, kind), offset in zip(header["columns"], offsets)
+    ]
+    if all(name in KNOWN_COLUMNS for name in names):
+        expenses = [dict(zip(names, row)) for row in zip(*values)]
+    else:
+        # Extra keys that were absent from an expense are dropped again
+        expenses = [{name: value for name, value in zip(names, row) if value is not _ABSENT}
+                    for row in zip(*values)]
+    return expenses
+
+
+def decode_user_data(raw) -> Dict[str, Any]:
+    """Decode bytes produced by encode_user_data back into a user data dict"""
+    _, header, offset = read_header(raw)
+    strings, offset = read_string_table(raw, offset)
+    data = dict(header["data"])
+    data["expenses"] = decode_rows(raw, header, strings, column_offsets(header, offset, raw))
+    return data
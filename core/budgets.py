@@ -0,0 +1,91 @@
+from typing import Any, Dict, List, Optional
+
+from core.fx import expense_to_cents, frame_to_cents, load_fx_table
+from core.ledger import build_transaction_frame
+
+Budgets = Dict[str, float]
+
+# Fractions of a budget at which adding an expense raises an alert
+ALERT_THRESHOLDS = (0.8, 1.0)
+
+
+def set_budget(budgets: Budgets, category: str, amount: float) -> None:
+    """Set a category's monthly budget in the base currency; 0 removes it"""
+    if amount > 0:
+        budgets[category] = float(amount)
+    else:
+        budgets.pop(category, None)
+
+
+class BudgetTracker:
+    """Spent-to-date per (month, category) in base-currency cents, updated per transaction.
+
+    A ledger index: adds, edits and deletes move one total each, so alerts and
+    utilization are dictionary lookups rather than scans of the month.
+    """
+
+    def __init__(self, expenses=()):
+        self._fx = load_fx_table()
+        self._spent: Dict[tuple, int] = {}
+        # Convert everything already in the ledger in one vectorized call, from the transactions frame
+        frame = build_transaction_frame(expenses)
+        frame = frame[frame['Type'] == 'Expense']
+        cents = frame_to_cents(frame, self._fx)
+        totals = frame.assign(Cents=cents).groupby(['Month', 'Category'], observed=True)['Cents'].sum()
+        self._spent = {(str(month), category): int(cents) for (month, category), cents in totals.items() if cents}
+
+    def _include(self, expense, sign=1):
+        if expense['Type'] != 'Expense':
+            return
+        key = (expense['Date'][:7], expense['Category'])
+        spent = self._spent.get(key, 0) + sign * expense_to_cents(expense, self._fx)
+        if spent:
+            self._spent[key] = spent
+        else:
+            self._spent.pop(key, None)
+
+    def add(self, expense):
+        self._include(expense)
+
+    def insert(self, index, expense):
+        self._include(expense)
+
+    def update(self, index, old_expense, new_expense):
+        self._include(old_expense, -1)
+        self._include(new_expense)
+
+    def remove(self, index, expense):
+        self._include(expense, -1)
+
+    def spent(self, month: str, category: str) -> float:
+        """Base-currency expenses in the category during month ('YYYY-MM')"""
+        return self._spent.get((month, category), 0) / 100
+
+    def alert(self, budgets: Budgets, expense) -> Optional[Dict[str, Any]]:
+        """The highest threshold the expense, already recorded, pushed its category's month past"""
+        budget = budgets.get(expense['Category'])
+        if not budget or expense['Type'] != 'Expense':
+            return None
+        month = expense['Date'][:7]
+        spent = self.spent(month, expense['Category'])
+        before = spent - expense_to_cents(expense, self._fx) / 100
+        crossed = [threshold for threshold in ALERT_THRESHOLDS if before < threshold * budget <= spent]
+        if not crossed:
+            return None
+        return {
+            'Category': expense['Category'],
+            'Month': month,
+            'Budget': budget,
+            'Spent': spent,
+            'Threshold': crossed[-1],
+            'Ratio': spent / budget
+        }
+
+    def utilization(self, budgets: Budgets, month: str) -> List[Dict[str, Any]]:
+        """Spent against budget for every budgeted category in month, most used first"""
+        rows = [
+            {'Category': category, 'Budget': budget, 'Spent': self.spent(month, category),
+             'Ratio': self.spent(month, category) / budget}
+            for category, budget in budgets.items()
+        ]
+        return sorted(rows, key=lambda row: row['Ratio'], reverse=True)
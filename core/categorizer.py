@@ -0,0 +1,183 @@
+"""Rule-based categorization of transaction descriptions.
+
+The keywords of all keyword rules compile into one pattern, a single prefix
+trie (Aho-Corasick style, the matched keyword identifies its rule), so every
+distinct description is scanned once however many keywords there are. Regex
+rules are compiled each on their own, so their flags, group numbers and group
+names behave as when written alone. The match that starts earliest in the
+description decides; at the same position keywords win over regex rules and
+earlier rules over later ones. Merchants the user has categorized by hand are
+remembered per user and take precedence over rules.
+"""
+import json
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from core.storage import _write_atomic
+
+Rule = Dict[str, Any]
+
+FALLBACK_CATEGORY = "Other"
+# Learned merchants kept per user, the least recently learned are dropped first
+MAX_MERCHANTS = 10000
+
+# Keyword rules hold comma-separated words matched whole and case-insensitively;
+# regex rules hold a Python regular expression, matched case-insensitively
+DEFAULT_RULES: List[Rule] = [
+    {"pattern": "salary, payroll, wages, stipend", "category": "Salary", "regex": False},
+    {"pattern": "rent, landlord, lease, maintenance", "category": "Rent", "regex": False},
+    {"pattern": "swiggy, zomato, restaurant, cafe, coffee, pizza, dominos, mcdonalds, kfc, bakery, grocery, "
+                "groceries, bigbasket, blinkit, zepto, dmart, supermarket", "category": "Food", "regex": False},
+    {"pattern": "uber, ola, rapido, metro, irctc, railway, bus, taxi, cab, fuel, petrol, diesel, parking, "
+                "toll, fastag, airline, indigo, flight", "category": "Transportation", "regex": False},
+    {"pattern": "electricity, bescom, water, gas, broadband, internet, wifi, airtel, jio, vodafone, "
+                "recharge, postpaid, insurance", "category": "Bills", "regex": False},
+    {"pattern": "netflix, spotify, hotstar, prime video, youtube, bookmyshow, movie, cinema, pvr, inox, "
+                "concert, steam, playstation", "category": "Entertainment", "regex": False},
+    {"pattern": "amazon, flipkart, myntra, ajio, nykaa, meesho, ikea, decathlon, croma, mall",
+     "category": "Shopping", "regex": False},
+    {"pattern": "pharmacy, apollo, medplus, hospital, clinic, doctor, dental, diagnostics, lab, medicine",
+     "category": "Healthcare", "regex": False},
+    {"pattern": r"\b(?:school|college|university|tuition|course|udemy|coursera|books?|exam\s+fees?)\b",
+     "category": "Education", "regex": True},
+]
+
+
+# ASCII digits, punctuation and whitespace, all of which merchant keys drop
+_NON_LETTERS = str.maketrans({chr(code): " " for code in range(128) if not chr(code).isalpha()})
+
+
+def merchant_key(description: str) -> str:
+    """Lowercased words of a description without digits or punctuation, so reference numbers do not split a merchant"""
+    return " ".join(description.lower().translate(_NON_LETTERS).split())
+
+
+def _keyword(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def _trie_pattern(keywords: Sequence[str]) -> str:
+    # Alternatives sharing a prefix share its branch, so the engine tries each character once
+    trie: Dict[str, dict] = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        branches = [(r"\s+" if char == " " else re.escape(char)) + build(child)
+                    for char, child in sorted(node.items()) if char]
+        if "" in node:
+            return "(?:" + "|".join(branches) + ")?" if branches else ""
+        return branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+
+    return build(trie)
+
+
+def compile_rules(rules: Sequence[Rule]) -> Tuple[Optional["re.Pattern"], Dict[str, int], List[Tuple[int, "re.Pattern"]]]:
+    """(keyword pattern, rule number of every keyword, (rule number, pattern) of every regex rule).
+
+    ValueError names a bad rule. Descriptions are matched lowercased and regex
+    rules are case-insensitive.
+    """
+    keywords: Dict[str, int] = {}
+    regexes = []
+    for number, rule in enumerate(rules):
+        if not rule.get("regex"):
+            for keyword in rule["pattern"].split(","):
+                if _keyword(keyword):
+                    keywords.setdefault(_keyword(keyword), number)
+            continue
+        try:
+            regexes.append((number, re.compile(rule["pattern"], re.IGNORECASE)))
+        except re.error as error:
+            raise ValueError(f"Rule {number + 1} ({rule['pattern']!r}) is not a valid pattern: {error}") from None
+    pattern = re.compile(r"\b(?:" + _trie_pattern(list(keywords)) + r")\b") if keywords else None
+    return pattern, keywords, regexes
+
+
+class Categorizer:
+    """A user's categorization rules and learned merchant categories"""
+
+    def __init__(self, rules: Optional[List[Rule]] = None, merchants: Optional[Dict[str, str]] = None) -> None:
+        self.rules = [dict(rule) for rule in (DEFAULT_RULES if rules is None else rules)]
+        self.merchants = dict(merchants or {})
+        self._pattern, self._keywords, self._regexes = compile_rules(self.rules)
+
+    def set_rules(self, rules: List[Rule]) -> None:
+        """Replace the rules, leaving them unchanged if any fails to compile"""
+        pattern, keywords, regexes = compile_rules(rules)
+        self.rules, self._pattern, self._keywords, self._regexes = [dict(rule) for rule in rules], pattern, keywords, regexes
+
+    def learn(self, description: str, category: str) -> bool:
+        """Remember the merchant of a hand-categorized description; whether anything changed"""
+        key = merchant_key(description)
+        if not key or self.merchants.get(key) == category:
+            return False
+        self.merchants.pop(key, None)
+        self.merchants[key] = category
+        while len(self.merchants) > MAX_MERCHANTS:
+            del self.merchants[next(iter(self.merchants))]
+        return True
+
+    def forget_merchants(self) -> None:
+        self.merchants = {}
+
+    def categorize(self, descriptions: Sequence[str], default: str = FALLBACK_CATEGORY) -> np.ndarray:
+        """Category of every description, default where neither a merchant nor a rule matches"""
+        codes, uniques = pd.factorize(pd.Series(descriptions, dtype=object).fillna("").astype(str))
+        uniques = pd.Series(uniques, dtype=object)
+        if self.merchants:
+            categories = np.array([self.merchants.get(merchant_key(text)) for text in uniques], dtype=object)
+        else:
+            categories = np.full(len(uniques), None, dtype=object)
+
+        unmatched = np.flatnonzero(pd.isna(categories))
+        if (self._pattern is not None or self._regexes) and len(unmatched):
+            for position, text in zip(unmatched, uniques.iloc[unmatched].str.lower()):
+                # (start, keyword first, rule number) of the best match so far
+                best = None
+                match = self._pattern.search(text) if self._pattern is not None else None
+                if match is not None:
+                    best = (match.start(), 0, self._keywords[_keyword(match.group())])
+                for number, regex in self._regexes:
+                    match = regex.search(text)
+                    if match is not None and (best is None or (match.start(), 1, number) < best):
+                        best = (match.start(), 1, number)
+                if best is not None:
+                    categories[position] = self.rules[best[2]]["category"]
+
+        categories[pd.isna(categories)] = default
+        return categories[codes]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """A copy of the rules and merchants that later changes cannot alter"""
+        return {"rules": [dict(rule) for rule in self.rules], "merchants": dict(self.merchants)}
+
+
+def get_rules_path(username: str) -> Path:
+    return Path("user_data") / f"{username}_rules.json"
+
+
+def load_categorizer(username: str) -> Categorizer:
+    """The user's categorizer, the default rules if they never changed any"""
+    file_path = get_rules_path(username)
+    if not file_path.exists():
+        return Categorizer()
+    saved = json.loads(file_path.read_text(encoding="utf-8"))
+    return Categorizer(saved.get("rules"), saved.get("merchants"))
+
+
+def save_categorizer(username: str, categorizer: Categorizer) -> None:
+    save_categorizer_data(username, categorizer.to_dict())
+
+
+def save_categorizer_data(username: str, data: Dict[str, Any]) -> None:
+    """Write a Categorizer.to_dict() copy, as the write-behind saver does"""
+    Path("user_data").mkdir(exist_ok=True)
+    _write_atomic(get_rules_path(username), json.dumps(data).encode("utf-8"))
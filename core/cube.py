@@ -0,0 +1,123 @@
+from datetime import date, timedelta
+from typing import Collection, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from core.fx import BASE_CURRENCY, expense_to_cents, frame_to_cents, load_fx_table
+from core.ledger import build_transaction_frame
+
+DIMENSIONS = ('Month', 'Week', 'Category', 'Type')
+MEASURES = ('Amount', 'Count')
+# Drill-down goes from each key to its value, roll-up back
+HIERARCHY = {'Month': 'Week', 'Type': 'Category'}
+
+Cell = Tuple[str, str, str, str]
+Slice = Dict[str, Collection[str]]
+
+
+def week_start(day: str) -> str:
+    """Monday of the week of day ('YYYY-MM-DD'), which labels the week"""
+    parsed = date.fromisoformat(day)
+    return (parsed - timedelta(days=parsed.weekday())).isoformat()
+
+
+class AnalyticsCube:
+    """Cents and transaction counts per (Month, Week, Category, Type) cell in one currency.
+
+    A ledger index: adds, edits and deletes move one cell each, and any
+    breakdown, slice or pivot aggregates the cells rather than the transactions.
+    Weeks start on Monday; a week spanning two months has a cell in each.
+    Amounts are converted at each transaction's date and rounded as in convert_frame.
+    """
+
+    def __init__(self, expenses=(), currency: str = BASE_CURRENCY):
+        self.currency = currency
+        self._fx = load_fx_table()
+        self.fx_version = self._fx.version
+        self._cells: Dict[Cell, List[int]] = {}
+        self._frame: Optional[pd.DataFrame] = None
+        frame = build_transaction_frame(expenses)
+        if frame.empty:
+            return
+        # Convert and group everything already in the ledger in vectorized calls on the transactions frame
+        dates = frame['Date'].to_numpy(dtype='datetime64[D]')
+        weekdays = (dates.astype(np.int64) + 3) % 7
+        cells = pd.DataFrame({
+            'Month': np.asarray(frame['Month'], dtype=object),
+            'Week': (dates - weekdays.astype('timedelta64[D]')).astype(str),
+            'Category': np.asarray(frame['Category'], dtype=object),
+            'Type': np.asarray(frame['Type'], dtype=object),
+            'Cents': frame_to_cents(frame, self._fx, currency)
+        }).groupby(list(DIMENSIONS), sort=False)['Cents'].agg(['sum', 'count'])
+        for key, cents, count in zip(cells.index, cells['sum'].tolist(), cells['count'].tolist()):
+            self._cells[key] = [int(cents), count]
+
+    def _include(self, expense, sign=1):
+        key = (expense['Date'][:7], week_start(expense['Date']), expense['Category'], expense['Type'])
+        cell = self._cells.setdefault(key, [0, 0])
+        cell[0] += sign * expense_to_cents(expense, self._fx, self.currency)
+        cell[1] += sign
+        if not cell[1]:
+            del self._cells[key]
+        self._frame = None
+
+    def add(self, expense):
+        self._include(expense)
+
+    def insert(self, index, expense):
+        self._include(expense)
+
+    def update(self, index, old_expense, new_expense):
+        self._include(old_expense, -1)
+        self._include(new_expense)
+
+    def remove(self, index, expense):
+        self._include(expense, -1)
+
+    def __len__(self) -> int:
+        return len(self._cells)
+
+    def frame(self) -> pd.DataFrame:
+        """The cells, one row each, with Amount and Count; rebuilt only after a change"""
+        if self._frame is None:
+            keys = list(self._cells)
+            values = np.array(list(self._cells.values()), dtype=np.int64).reshape(-1, 2)
+            frame = pd.DataFrame(keys, columns=list(DIMENSIONS)) if keys else pd.DataFrame(columns=list(DIMENSIONS))
+            frame['Amount'] = values[:, 0] / 100
+            frame['Count'] = values[:, 1]
+            self._frame = frame
+        return self._frame
+
+    def _slice(self, where: Optional[Slice]) -> pd.DataFrame:
+        frame = self.frame()
+        for dimension, members in (where or {}).items():
+            frame = frame[frame[dimension].isin(list(members))]
+        return frame
+
+    def members(self, dimension: str, where: Optional[Slice] = None) -> List[str]:
+        """Sorted values of dimension within the slice"""
+        return sorted(self._slice(where)[dimension].unique())
+
+    def aggregate(self, by: Sequence[str], where: Optional[Slice] = None, measure: str = 'Amount') -> pd.Series:
+        """measure summed over the slice, per combination of the by dimensions (the grand total if none)"""
+        frame = self._slice(where)
+        if not by:
+            return pd.Series({'Total': frame[measure].sum()}, name=measure)
+        return frame.groupby(list(by), sort=True)[measure].sum()
+
+    def pivot(self, rows: str, columns: Optional[str] = None, where: Optional[Slice] = None,
+              measure: str = 'Amount') -> pd.DataFrame:
+        """rows x columns table of measure over the slice, empty combinations as 0"""
+        if columns is None or columns == rows:
+            return self.aggregate([rows], where, measure).to_frame(measure)
+        return self.aggregate([rows, columns], where, measure).unstack(columns, fill_value=0)
+
+    def drill_down(self, where: Optional[Slice], dimension: str, member: str) -> Tuple[str, Slice]:
+        """(finer dimension, narrowed slice) breaking one member down, e.g. a month into its weeks"""
+        return HIERARCHY[dimension], {**(where or {}), dimension: [member]}
+
+    def roll_up(self, where: Optional[Slice], dimension: str) -> Tuple[str, Slice]:
+        """(coarser dimension, widened slice) undoing drill_down from the finer dimension"""
+        coarser = next(coarse for coarse, finer in HIERARCHY.items() if finer == dimension)
+        return coarser, {key: members for key, members in (where or {}).items() if key != coarser}
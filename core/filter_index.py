@@ -0,0 +1,142 @@
+import numpy as np
+
+from core.ledger import build_transaction_frame
+
+INDEXED_FIELDS = ('Category', 'Type')
+
+
+class FilterIndex:
+    """Per-value boolean bitmaps for Category and Type plus Date/Amount columns.
+
+    All arrays are over-allocated and share one row count, so appends and edits
+    touch a single slot and a delete is one shift per array instead of a rebuild.
+    Rows past the row count are always False in every bitmap. The initial
+    build reads the transactions frame, so a mapped ledger is not decoded.
+    """
+
+    def __init__(self, expenses=()):
+        frame = build_transaction_frame(expenses)
+        self._size = len(frame)
+        capacity = max(16, self._size)
+        self._dates = np.empty(capacity, dtype='datetime64[D]')
+        self._amounts = np.zeros(capacity, dtype=float)
+        self._dates[:self._size] = frame['Date'].to_numpy(dtype='datetime64[D]')
+        self._amounts[:self._size] = frame['Amount'].to_numpy()
+        self._bitmaps = {}
+        for field in INDEXED_FIELDS:
+            codes, values = frame[field].cat.codes.to_numpy(), frame[field].cat.categories
+            self._bitmaps[field] = {}
+            for code in np.unique(codes).tolist():
+                bitmap = np.zeros(capacity, dtype=bool)
+                bitmap[:self._size] = codes == code
+                self._bitmaps[field][values[code]] = bitmap
+
+    def __len__(self):
+        return self._size
+
+    def _arrays(self):
+        yield self._dates
+        yield self._amounts
+        for bitmaps in self._bitmaps.values():
+            yield from bitmaps.values()
+
+    def _reserve(self):
+        if self._size < len(self._amounts):
+            return
+        capacity = 2 * len(self._amounts)
+
+        def grow(array):
+            grown = np.zeros(capacity, dtype=array.dtype)
+            grown[:self._size] = array[:self._size]
+            return grown
+
+        self._dates = grow(self._dates)
+        self._amounts = grow(self._amounts)
+        for bitmaps in self._bitmaps.values():
+            for value in bitmaps:
+                bitmaps[value] = grow(bitmaps[value])
+
+    def _bitmap(self, field, value):
+        bitmaps = self._bitmaps[field]
+        if value not in bitmaps:
+            bitmaps[value] = np.zeros(len(self._amounts), dtype=bool)
+        return bitmaps[value]
+
+    def _set_row(self, index, expense):
+        self._dates[index] = np.datetime64(expense['Date'], 'D')
+        self._amounts[index] = expense['Amount']
+
+    def add(self, expense):
+        """Index a transaction appended to the end of the ledger"""
+        self._reserve()
+        self._set_row(self._size, expense)
+        for field in INDEXED_FIELDS:
+            self._bitmap(field, expense[field])[self._size] = True
+        self._size += 1
+
+    def insert(self, index, expense):
+        """Index a transaction put back at position index, shifting later rows up by one"""
+        self._reserve()
+        for array in self._arrays():
+            array[index + 1:self._size + 1] = array[index:self._size]
+        for bitmaps in self._bitmaps.values():
+            for bitmap in bitmaps.values():
+                bitmap[index] = False
+        self._set_row(index, expense)
+        for field in INDEXED_FIELDS:
+            self._bitmap(field, expense[field])[index] = True
+        self._size += 1
+
+    def update(self, index, old_expense, new_expense):
+        """Move the row at position index to its new bitmaps after an edit"""
+        self._set_row(index, new_expense)
+        for field in INDEXED_FIELDS:
+            if old_expense[field] != new_expense[field]:
+                self._bitmap(field, old_expense[field])[index] = False
+                self._bitmap(field, new_expense[field])[index] = True
+
+    def remove(self, index, expense):
+        """Drop the row at position index, shifting later rows down by one"""
+        last = self._size - 1
+        for array in self._arrays():
+            array[index:last] = array[index + 1:self._size]
+        for bitmaps in self._bitmaps.values():
+            for bitmap in bitmaps.values():
+                bitmap[last] = False
+        self._size = last
+
+    def _any_of(self, field, values):
+        selected = np.zeros(self._size, dtype=bool)
+        for value in values:
+            bitmap = self._bitmaps[field].get(value)
+            if bitmap is not None:
+                selected |= bitmap[:self._size]
+        return selected
+
+    def mask(self, categories=None, types=None, start_date=None, end_date=None,
+             min_amount=None, max_amount=None, rows=None):
+        """Boolean mask over ledger positions; None leaves a criterion unrestricted"""
+        mask = np.ones(self._size, dtype=bool)
+        if categories is not None:
+            mask &= self._any_of('Category', categories)
+        if types is not None:
+            mask &= self._any_of('Type', types)
+        dates = self._dates[:self._size]
+        if start_date is not None:
+            mask &= dates >= np.datetime64(start_date, 'D')
+        if end_date is not None:
+            mask &= dates <= np.datetime64(end_date, 'D')
+        amounts = self._amounts[:self._size]
+        if min_amount is not None:
+            mask &= amounts >= min_amount
+        if max_amount is not None:
+            mask &= amounts <= max_amount
+        if rows is not None:
+            selected = np.zeros(self._size, dtype=bool)
+            selected[np.asarray(rows, dtype=int)] = True
+            mask &= selected
+        return mask
+
+    def positions(self, **filters):
+        """Ledger positions matching all filters, in ledger order"""
+        return np.flatnonzero(self.mask(**filters))
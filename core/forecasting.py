@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+
+
+def calculate_monthly_category_trends(df):
+    """Monthly totals per (Type, Category), one row per calendar month"""
+    if df.empty:
+        return pd.DataFrame()
+    monthly = (
+        df.groupby(['Month', 'Type', 'Category'], observed=True)['Cents']
+        .sum()
+        .unstack(['Type', 'Category'], fill_value=0)
+    ) / 100
+    monthly.index = pd.PeriodIndex(monthly.index.astype(str), freq='M', name='Month')
+    monthly.columns = pd.MultiIndex.from_tuples(
+        [(str(kind), str(category)) for kind, category in monthly.columns], names=['Type', 'Category']
+    )
+    # Months without transactions count as zero so the smoothing sees real gaps
+    full_range = pd.period_range(monthly.index.min(), monthly.index.max(), freq='M', name='Month')
+    return monthly.reindex(full_range, fill_value=0).sort_index(axis=1)
+
+
+def new_forecast_state():
+    """Empty forecast state, filled month by month as months close"""
+    return {
+        'months': [],
+        'signature': None,
+        'level': None,
+        'seasonal_sum': None,
+        'seasonal_count': None,
+    }
+
+
+def _signature(frame):
+    return int(pd.util.hash_pandas_object(frame, index=True).sum())
+
+
+def _folded_months_unchanged(state, closed):
+    folded = len(state['months'])
+    if folded > len(closed) or list(closed.index[:folded]) != state['months']:
+        return False
+    known = state['level'].index
+    history = closed.iloc[:folded]
+    # A category that only appears in folded months means a past month was edited
+    extra = history.columns.difference(known)
+    if len(extra) and history[extra].ne(0).any().any():
+        return False
+    return _signature(history.reindex(columns=known, fill_value=0)) == state['signature']
+
+
+def update_forecast_state(state, monthly, current_month, alpha=0.5):
+    """Fold newly closed months into the smoothed levels and seasonal averages"""
+    closed = monthly[monthly.index < current_month] if not monthly.empty else monthly
+    if state is None or (state['months'] and not _folded_months_unchanged(state, closed)):
+        state = new_forecast_state()
+
+    new_rows = closed.iloc[len(state['months']):]
+    if new_rows.empty:
+        return state
+
+    columns = new_rows.columns
+    if state['level'] is not None:
+        columns = columns.union(state['level'].index)
+    rows = new_rows.reindex(columns=columns, fill_value=0)
+
+    if state['level'] is None:
+        level = rows.iloc[0]
+        seasonal_sum = pd.DataFrame(0.0, index=range(1, 13), columns=columns)
+        seasonal_count = pd.Series(0, index=range(1, 13))
+    else:
+        level = state['level'].reindex(columns, fill_value=0)
+        seasonal_sum = state['seasonal_sum'].reindex(columns=columns, fill_value=0)
+        seasonal_count = state['seasonal_count']
+
+    # Exponential smoothing runs once per closed month, vectorized across categories
+    for month, row in rows.iterrows():
+        level = alpha * row + (1 - alpha) * level
+        seasonal_sum.loc[month.month] += row
+        seasonal_count.loc[month.month] += 1
+
+    state['months'] = list(closed.index)
+    state['level'] = level
+    state['seasonal_sum'] = seasonal_sum
+    state['seasonal_count'] = seasonal_count
+    state['signature'] = _signature(closed.reindex(columns=columns, fill_value=0))
+    return state
+
+
+def project_cash_flow(state, current_month, months_ahead=3, seasonal_weight=0.5):
+    """Project the open month plus the next months_ahead months per (Type, Category)"""
+    if state is None or state['level'] is None:
+        return pd.DataFrame()
+    horizon = pd.period_range(current_month, periods=months_ahead + 1, freq='M', name='Month')
+    month_numbers = [month.month for month in horizon]
+
+    counts = state['seasonal_count'].loc[month_numbers].to_numpy()
+    level = np.tile(state['level'].to_numpy(dtype=float), (len(horizon), 1))
+    seasonal = state['seasonal_sum'].loc[month_numbers].to_numpy(dtype=float) / counts.clip(min=1)[:, None]
+
+    # Blend the smoothed level with the same calendar month of earlier years when available
+    values = np.where(
+        (counts > 0)[:, None],
+        (1 - seasonal_weight) * level + seasonal_weight * seasonal,
+        level,
+    )
+    return pd.DataFrame(values, index=horizon, columns=state['level'].index)
+
+
+def forecast_cash_flow(monthly, current_month, months_ahead=3, state=None, alpha=0.5):
+    """Update the cached state and return it together with the projection"""
+    state = update_forecast_state(state, monthly, current_month, alpha=alpha)
+    return state, project_cash_flow(state, current_month, months_ahead)
+
+
+def totals_by_type(frame):
+    """Collapse (Type, Category) columns into one column per transaction type"""
+    if frame.empty:
+        return pd.DataFrame(columns=['Expense', 'Additional Income'])
+    totals = frame.T.groupby(level='Type').sum().T
+    for column in ['Expense', 'Additional Income']:
+        if column not in totals.columns:
+            totals[column] = 0
+    return totals
+
+
+def projected_month_end_balance(projection, monthly, current_month, balance):
+    """Current balance plus what is still expected to come in or go out this month"""
+    if projection.empty or current_month not in projection.index:
+        return balance
+    expected = totals_by_type(projection).loc[current_month]
+    if not monthly.empty and current_month in monthly.index:
+        actual = totals_by_type(monthly).loc[current_month].reindex(expected.index, fill_value=0)
+    else:
+        actual = expected * 0
+    remaining = (expected - actual).clip(lower=0)
+    return balance + remaining.get('Additional Income', 0) - remaining.get('Expense', 0)
@@ -0,0 +1,128 @@
+"""Locally stored exchange rates and vectorized currency conversion.
+
+Rates come from a CSV file (Date,Currency,Rate) giving units of BASE_CURRENCY
+per unit of Currency on that date; nothing is fetched over the network.
+"""
+from datetime import date as Date
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+BASE_CURRENCY = "INR"
+FX_RATES_PATH = Path("fx_rates.csv")
+CURRENCY_SYMBOLS = {"INR": "₹", "USD": "$", "EUR": "€", "GBP": "£", "JPY": "¥"}
+
+# {rates file path: ((mtime_ns, size), table)}, shared by every session of the process
+_fx_cache = {}
+
+
+def currency_symbol(currency: str) -> str:
+    return CURRENCY_SYMBOLS.get(currency, f"{currency} ")
+
+
+class FxTable:
+    """Dated rates per currency, as sorted day arrays with matching rates.
+
+    A transaction converts at the latest rate on or before its date, or at the
+    earliest known rate when it predates the table. `version` changes whenever
+    the rates file does, so converted results can be cached against it.
+    """
+
+    def __init__(self, rates: Dict[str, Tuple[np.ndarray, np.ndarray]], version=None) -> None:
+        self._rates = rates
+        self.version = version
+
+    @property
+    def currencies(self) -> List[str]:
+        return [BASE_CURRENCY] + sorted(currency for currency in self._rates if currency != BASE_CURRENCY)
+
+    def rates_to_base(self, currencies, dates) -> np.ndarray:
+        """Units of BASE_CURRENCY per unit of each row's currency on each row's date"""
+        codes, uniques = pd.factorize(np.asarray(currencies, dtype=object))
+        days = np.asarray(dates, dtype='datetime64[D]')
+        result = np.ones(len(codes))
+        for code, currency in enumerate(uniques):
+            if currency == BASE_CURRENCY:
+                continue
+            if currency not in self._rates:
+                raise ValueError(f"No exchange rates for {currency} in {FX_RATES_PATH}")
+            rate_days, rates = self._rates[currency]
+            rows = codes == code
+            positions = np.searchsorted(rate_days, days[rows], side='right') - 1
+            result[rows] = rates[positions.clip(min=0)]
+        return result
+
+    def conversion_factors(self, currencies, dates, target: str) -> np.ndarray:
+        """Multipliers taking each row's amount into target at that row's date"""
+        targets = np.full(len(dates), target, dtype=object)
+        return self.rates_to_base(currencies, dates) / self.rates_to_base(targets, dates)
+
+    def convert(self, amount: float, currency: str, target: str, on_date: Optional[Date] = None) -> float:
+        if currency == target:
+            return amount
+        on_date = on_date or Date.today()
+        return amount * float(self.conversion_factors([currency], [np.datetime64(on_date, 'D')], target)[0])
+
+
+def load_fx_table(path: Path = FX_RATES_PATH) -> FxTable:
+    """The rate table in path, re-read only when the file changed; base currency only if it is missing"""
+    path = Path(path)
+    if not path.exists():
+        return FxTable({})
+    stat = path.stat()
+    signature = (stat.st_mtime_ns, stat.st_size)
+    cached = _fx_cache.get(str(path))
+    if cached and cached[0] == signature:
+        return cached[1]
+
+    frame = pd.read_csv(path, parse_dates=['Date']).sort_values('Date', kind='stable')
+    rates = {
+        currency: (group['Date'].to_numpy(dtype='datetime64[D]'), group['Rate'].to_numpy(dtype=float))
+        for currency, group in frame.groupby('Currency')
+    }
+    table = FxTable(rates, version=signature)
+    _fx_cache[str(path)] = (signature, table)
+    return table
+
+
+def convert_frame(df: pd.DataFrame, fx: FxTable, currency: str) -> pd.DataFrame:
+    """Copy of a transactions frame whose Cents are in currency, at each transaction's date.
+
+    Amount and Currency keep the values as entered; every total sums Cents.
+    """
+    if (df['Currency'] == currency).all():
+        return df
+    factors = fx.conversion_factors(df['Currency'], df['Date'], currency)
+    return df.assign(Cents=np.round(df['Cents'].to_numpy() * factors).astype(np.int64))
+
+
+def to_cents(amounts, currencies, dates, fx: FxTable, currency: str = BASE_CURRENCY) -> np.ndarray:
+    """Whole cents of currency per row, rounded as convert_frame does: the amount as entered, then the converted cents"""
+    cents = np.round(np.asarray(amounts, dtype=float) * 100)
+    return np.round(cents * fx.conversion_factors(currencies, dates, currency)).astype(np.int64)
+
+
+def frame_to_cents(frame: pd.DataFrame, fx: FxTable, currency: str = BASE_CURRENCY) -> np.ndarray:
+    """to_cents of a transactions frame's rows"""
+    return to_cents(frame['Amount'], frame['Currency'], frame['Date'], fx, currency)
+
+
+def expense_rows(frame: pd.DataFrame, fx: FxTable, currency: str = BASE_CURRENCY):
+    """(is an expense, month, category, cents) per row of a transactions frame; only expenses are converted"""
+    spent = (frame['Type'] == 'Expense').to_numpy()
+    cents = np.zeros(len(frame), dtype=np.int64)
+    cents[spent] = frame_to_cents(frame[spent], fx, currency)
+    return zip(spent.tolist(), frame['Month'].tolist(), frame['Category'].tolist(), cents.tolist())
+
+
+def expenses_to_cents(expenses, fx: FxTable, currency: str = BASE_CURRENCY) -> np.ndarray:
+    """to_cents of a list of transactions, in one vectorized conversion"""
+    return to_cents([expense['Amount'] for expense in expenses], [expense['Currency'] for expense in expenses],
+                    np.array([expense['Date'] for expense in expenses], dtype='datetime64[D]'), fx, currency)
+
+
+def expense_to_cents(expense, fx: FxTable, currency: str = BASE_CURRENCY) -> int:
+    """to_cents of one transaction"""
+    return int(expenses_to_cents([expense], fx, currency)[0])
@@ -0,0 +1,50 @@
+from datetime import date as Date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+Goal = Dict[str, Any]
+
+
+def add_savings_goal(goals: List[Goal], name: str, target_amount: float, target_date: Date) -> Goal:
+    goal = {
+        'name': name,
+        'target_amount': target_amount,
+        'target_date': target_date.strftime("%Y-%m-%d"),
+        'current_amount': 0.0
+    }
+    goals.append(goal)
+    return goal
+
+
+def update_savings_goal(goals: List[Goal], goal_name: str, amount: float) -> bool:
+    for goal in goals:
+        if goal['name'] == goal_name:
+            goal['current_amount'] += amount
+            return True
+    return False
+
+
+def total_savings(goals: List[Goal]) -> float:
+    return sum(goal['current_amount'] for goal in goals)
+
+
+def goal_progress(goal: Goal) -> float:
+    """Fraction of the target saved, capped at 1.0"""
+    return min(goal['current_amount'] / goal['target_amount'], 1.0) if goal['target_amount'] > 0 else 0.0
+
+
+def recommended_monthly_savings(target_amount: float, target_date: Date, today: Optional[Date] = None) -> float:
+    """Monthly amount needed to reach target_amount by target_date, 0 if already due"""
+    today = today or datetime.now().date()
+    months = (target_date - today).days / 30
+    return target_amount / months if target_amount > 0 and months > 0 else 0.0
+
+
+def savings_plan(goal: Goal, today: Optional[Date] = None) -> Optional[Tuple[float, float, int]]:
+    """(daily needed, monthly needed, days left) for an unfinished goal that is not yet due"""
+    today = today or datetime.now().date()
+    remaining = goal['target_amount'] - goal['current_amount']
+    days_left = (datetime.strptime(goal['target_date'], "%Y-%m-%d").date() - today).days
+    if remaining <= 0 or days_left <= 0:
+        return None
+    daily_needed = remaining / days_left
+    return daily_needed, daily_needed * 30, days_left
@@ -0,0 +1,114 @@
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import pandas as pd
+
+from core.fx import BASE_CURRENCY, load_fx_table
+from core.storage import find_user_data_path, read_user_data_file
+
+# {data file path: (((mtime_ns, size), rate table version), summary)}, shared by every session of the process
+_summary_cache = {}
+
+
+def _file_signature(path):
+    stat = path.stat()
+    return stat.st_mtime_ns, stat.st_size
+
+
+def summarize_ledger_file(path):
+    """Reduce one user's data file to monthly and category totals in the base currency"""
+    data = read_user_data_file(path)
+    expenses = data.get("expenses", [])
+    factors = load_fx_table().conversion_factors(
+        [expense['Currency'] for expense in expenses], [expense['Date'] for expense in expenses], BASE_CURRENCY
+    )
+    monthly = Counter()
+    categories = Counter()
+    for expense, factor in zip(expenses, factors.tolist()):
+        amount = float(expense['Amount']) * factor
+        monthly[(expense['Date'][:7], expense['Type'])] += amount
+        categories[(expense['Category'], expense['Type'])] += amount
+    return {
+        "income": float(data.get("income", 0)),
+        "transactions": len(expenses),
+        "savings": sum(goal['current_amount'] for goal in data.get("savings_goals", [])),
+        "monthly": dict(monthly),
+        "categories": dict(categories)
+    }
+
+
+def load_user_summaries(usernames, max_workers=None):
+    """Per-user summaries; only data files changed since the last call are re-read"""
+    summaries = {}
+    stale = []
+    fx_version = load_fx_table().version
+    for username in usernames:
+        path = find_user_data_path(username)
+        if path is None:
+            continue
+        signature = (_file_signature(path), fx_version)
+        cached = _summary_cache.get(str(path))
+        if cached and cached[0] == signature:
+            summaries[username] = cached[1]
+        else:
+            stale.append((username, path, signature))
+
+    paths = [path for _, path, _ in stale]
+    if len(stale) <= 1 or max_workers == 1:
+        results = [summarize_ledger_file(path) for path in paths]
+    else:
+        # Spawned workers only import this module, not the Streamlit script
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=get_context("spawn")) as pool:
+            results = list(pool.map(summarize_ledger_file, paths))
+
+    for (username, path, signature), summary in zip(stale, results):
+        _summary_cache[str(path)] = (signature, summary)
+        summaries[username] = summary
+    return summaries
+
+
+def combine_summaries(summaries):
+    """Combined monthly totals by Type, category totals by Type and a per-member table"""
+    monthly = Counter()
+    categories = Counter()
+    members = []
+    for username, summary in sorted(summaries.items()):
+        monthly.update(summary["monthly"])
+        categories.update(summary["categories"])
+        expenses = sum(amount for (_, kind), amount in summary["monthly"].items() if kind == 'Expense')
+        additional = sum(amount for (_, kind), amount in summary["monthly"].items() if kind == 'Additional Income')
+        members.append({
+            'Member': username,
+            'Income': summary["income"] + additional,
+            'Expenses': expenses,
+            'Balance': summary["income"] + additional - expenses,
+            'Savings': summary["savings"],
+            'Transactions': summary["transactions"]
+        })
+
+    if monthly:
+        monthly_frame = pd.Series(monthly, dtype=float).unstack(fill_value=0).sort_index()
+        monthly_frame.index.name = 'Month'
+    else:
+        monthly_frame = pd.DataFrame(columns=['Expense', 'Additional Income'])
+    for column in ['Expense', 'Additional Income']:
+        if column not in monthly_frame.columns:
+            monthly_frame[column] = 0
+
+    if categories:
+        category_frame = pd.Series(categories, dtype=float).unstack(fill_value=0)
+        category_frame.index.name = 'Category'
+    else:
+        category_frame = pd.DataFrame()
+
+    return {
+        "monthly": monthly_frame,
+        "categories": category_frame,
+        "members": pd.DataFrame(members, columns=['Member', 'Income', 'Expenses', 'Balance', 'Savings', 'Transactions'])
+    }
+
+
+def load_household_rollup(usernames, max_workers=None):
+    """Load the members' ledgers (in parallel when several changed) and combine them"""
+    return combine_summaries(load_user_summaries(usernames, max_workers=max_workers))
@@ -0,0 +1,267 @@
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import date as Date
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from core.fx import BASE_CURRENCY
+
+Expense = Dict[str, Any]
+# (ledger position, transaction before, transaction after); None marks an insertion or removal
+Operation = Tuple[int, Optional[Expense], Optional[Expense]]
+
+TRANSACTION_COLUMNS = ['Date', 'Category', 'Amount', 'Currency', 'Description', 'Type']
+
+
+def get_transaction_types() -> List[str]:
+    return ["Expense", "Additional Income"]
+
+
+def get_category_options() -> Dict[str, str]:
+    return {
+        "Food": "🍔 Food",
+        "Transportation": "🚗 Transportation",
+        "Rent": "🏠 Rent",
+        "Bills": "💡 Bills",
+        "Entertainment": "🎮 Entertainment",
+        "Shopping": "🛍️ Shopping",
+        "Healthcare": "🏥 Healthcare",
+        "Education": "📚 Education",
+        "Salary": "💰 Salary",
+        "Other": "📦 Other"
+    }
+
+
+def make_expense(date: Date, category: str, amount: float, description: str, transaction_type: str,
+                 currency: str = BASE_CURRENCY) -> Expense:
+    """A transaction record as stored in the user's data file"""
+    return {
+        'Date': date.strftime("%Y-%m-%d"),
+        'Category': category,
+        'Amount': amount,
+        'Currency': currency,
+        'Description': description,
+        'Type': transaction_type
+    }
+
+
+def _categorical(values, leading=()) -> pd.Categorical:
+    # Known values first in their usual order, then anything else alphabetically
+    values = values if isinstance(values, pd.Categorical) else pd.Categorical(values)
+    extra = sorted(set(values.categories).difference(leading))
+    return values.set_categories(list(leading) + extra)
+
+
+def frame_from_columns(dates, categories, amounts, currencies, descriptions, types) -> pd.DataFrame:
+    """The build_transaction_frame frame from whole columns; text columns may be Categoricals already"""
+    dates = np.asarray(dates, dtype='datetime64[D]')
+    months, month_codes = np.unique(dates.astype('datetime64[M]'), return_inverse=True)
+    cents = np.round(np.asarray(amounts, dtype=float) * 100).astype(np.int64)
+    return pd.DataFrame({
+        'Date': dates.astype('datetime64[ns]'),
+        'Category': _categorical(categories, get_category_options()),
+        'Amount': cents / 100,
+        'Currency': _categorical(currencies),
+        'Description': np.asarray(descriptions, dtype=object),
+        'Type': _categorical(types, get_transaction_types()),
+        'Month': pd.Categorical.from_codes(month_codes.reshape(-1), months.astype(str)),
+        'Cents': cents
+    })
+
+
+def build_transaction_frame(expenses: List[Expense]) -> pd.DataFrame:
+    """Typed transactions frame shared by analytics, charts and reports.
+
+    Date is datetime64, Category/Currency/Type/Month ('YYYY-MM') are categoricals
+    and Cents holds exact int64 amounts; totals sum Cents. Amount and Cents are in
+    each transaction's own Currency until core.fx.convert_frame converts Cents.
+    The index is each transaction's position in expenses.
+    """
+    to_frame = getattr(expenses, 'to_frame', None)
+    if to_frame is not None:
+        # Lazily loaded ledgers build the frame straight from their column data
+        return to_frame()
+    return frame_from_columns(
+        [expense['Date'] for expense in expenses],
+        [expense['Category'] for expense in expenses],
+        [expense['Amount'] for expense in expenses],
+        [expense.get('Currency', BASE_CURRENCY) for expense in expenses],
+        [expense['Description'] for expense in expenses],
+        [expense['Type'] for expense in expenses]
+    )
+
+
+class Ledger:
+    """A user's transactions plus the incremental indexes kept in sync with them.
+
+    Indexes are built lazily by `index` and must provide add(expense),
+    insert(index, expense), update(index, old_expense, new_expense) and
+    remove(index, expense). The ledger does not persist itself; callers save
+    after mutating, undoing or redoing. `revision` increases on every change
+    so callers can invalidate derived data.
+
+    Every mutation is logged as an (index, before, after) operation holding
+    references to the transaction dicts involved, so undo applies the swapped
+    operation and no step ever copies the ledger. Operations made inside
+    `batch` form one step; at most max_history steps are kept. Added and
+    edited transactions are stamped with clock() under 'Modified'.
+    """
+
+    def __init__(self, expenses: Optional[List[Expense]] = None, max_history: int = 100,
+                 clock: Callable[[], float] = time.time) -> None:
+        self.expenses: List[Expense] = expenses if expenses is not None else []
+        self._clock = clock
+        self._indexes: Dict[str, Any] = {}
+        self.revision = 0
+        self._undo: Deque[List[Operation]] = deque(maxlen=max_history)
+        self._redo: List[List[Operation]] = []
+        self._batch: Optional[List[Operation]] = None
+
+    def __len__(self) -> int:
+        return len(self.expenses)
+
+    def index(self, name: str, factory: Callable[[List[Expense]], Any]) -> Any:
+        """The index registered under name, built from the ledger on first use"""
+        if name not in self._indexes:
+            self._indexes[name] = factory(self.expenses)
+        return self._indexes[name]
+
+    def drop_index(self, name: str) -> None:
+        """Stop maintaining the index registered under name, if any"""
+        self._indexes.pop(name, None)
+
+    def _apply(self, index: int, before: Optional[Expense], after: Optional[Expense]) -> None:
+        # The indexes go first: if one rejects the operation the transactions are unchanged,
+        # and the indexes, some of which may have taken it, are rebuilt on next use
+        try:
+            for ledger_index in self._indexes.values():
+                if before is None:
+                    ledger_index.insert(index, after)
+                elif after is None:
+                    ledger_index.remove(index, before)
+                else:
+                    ledger_index.update(index, before, after)
+        except Exception:
+            self._indexes.clear()
+            raise
+        if before is None:
+            self.expenses.insert(index, after)
+        elif after is None:
+            self.expenses.pop(index)
+        else:
+            self.expenses[index] = after
+        self.revision += 1
+
+    def _apply_step(self, operations: List[Operation]) -> None:
+        # All or nothing: if an operation fails the ones before it are reverted
+        applied = 0
+        try:
+            for operation in operations:
+                self._apply(*operation)
+                applied += 1
+        except Exception:
+            for index, before, after in reversed(operations[:applied]):
+                self._apply(index, after, before)
+            raise
+
+    def _record(self, index: int, before: Optional[Expense], after: Optional[Expense]) -> None:
+        if after is not None:
+            # When it was edited on this device, which decides sync conflicts
+            after['Modified'] = self._clock()
+        self._apply(index, before, after)
+        if self._batch is not None:
+            self._batch.append((index, before, after))
+        else:
+            self._undo.append([(index, before, after)])
+        self._redo.clear()
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Group the mutations made inside the block into a single undo step"""
+        if self._batch is not None:
+            yield
+            return
+        self._batch = []
+        try:
+            yield
+        finally:
+            step, self._batch = self._batch, None
+            if step:
+                self._undo.append(step)
+
+    def add(self, date: Date, category: str, amount: float, description: str, transaction_type: str,
+            currency: str = BASE_CURRENCY) -> Expense:
+        expense = make_expense(date, category, amount, description, transaction_type, currency)
+        self._record(len(self.expenses), None, expense)
+        return expense
+
+    def extend(self, expenses: List[Expense]) -> None:
+        """Append already built transactions, such as an imported statement, as one undo step.
+
+        All or nothing: if an index rejects a transaction the ledger is left as it was.
+        """
+        start, redo = len(self.expenses), list(self._redo)
+        with self.batch():
+            recorded = len(self._batch)
+            try:
+                for expense in expenses:
+                    self._record(len(self.expenses), None, expense)
+            except Exception:
+                # The failed operation dropped the indexes, so the rows added before it go directly
+                del self.expenses[start:]
+                del self._batch[recorded:]
+                self._redo = redo
+                self.revision += 1
+                raise
+
+    def edit(self, index: int, date: Date, category: str, amount: float, description: str,
+             transaction_type: str, currency: str = BASE_CURRENCY) -> Expense:
+        previous = self.expenses[index]
+        # Keys the form does not edit, such as the sync record id, carry over
+        expense = {**previous, **make_expense(date, category, amount, description, transaction_type, currency)}
+        self._record(index, previous, expense)
+        return expense
+
+    def delete(self, index: int) -> Expense:
+        expense = self.expenses[index]
+        self._record(index, expense, None)
+        return expense
+
+    @property
+    def undo_steps(self) -> int:
+        return len(self._undo)
+
+    @property
+    def redo_steps(self) -> int:
+        return len(self._redo)
+
+    def undo(self, steps: int = 1) -> int:
+        """Revert up to steps steps, newest first; returns how many were undone.
+
+        A step that fails to apply is left in place and the error raised.
+        """
+        done = 0
+        while done < steps and self._undo:
+            step = self._undo[-1]
+            self._apply_step([(index, after, before) for index, before, after in reversed(step)])
+            self._redo.append(self._undo.pop())
+            done += 1
+        return done
+
+    def redo(self, steps: int = 1) -> int:
+        """Re-apply up to steps undone steps; returns how many were redone.
+
+        A step that fails to apply is left in place and the error raised.
+        """
+        done = 0
+        while done < steps and self._redo:
+            self._apply_step(self._redo[-1])
+            self._undo.append(self._redo.pop())
+            done += 1
+        return done
+
+    def to_frame(self) -> pd.DataFrame:
+        return build_transaction_frame(self.expenses)
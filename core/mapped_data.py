@@ -0,0 +1,260 @@
+"""Memory-mapped binary user-data files whose transactions are decoded on demand.
+
+Opening a file only parses its header, so the income, reminders, goals and the
+monthly rollup are available at once; transaction rows are decoded a page at a
+time when something reads them, or as whole columns for a transactions frame.
+"""
+import mmap
+import os
+from collections.abc import MutableSequence
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from core.binary_format import (
+    _EPOCH_ORDINAL, _MISSING, StringTable, column_offsets, decode_rows, read_header
+)
+from core.fx import BASE_CURRENCY
+from core.ledger import build_transaction_frame, frame_from_columns
+from core.storage import (
+    UserData, find_user_data_path, get_user_data_path, load_local_data, migrate_user_data, read_user_data_file
+)
+
+PAGE_SIZE = 1024
+ROLLUP_COLUMNS = ['Month', 'Type', 'Category', 'Currency', 'Cents']
+
+
+class MappedUserData:
+    """A binary user-data file mapped read-only.
+
+    Every PagedExpenses reading the mapping holds a reference to it; the file is
+    unmapped when the last of them closes it.
+    """
+
+    def __init__(self, path: Path) -> None:
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._references = 1
+        self.version, self.header, offset = read_header(self._map)
+        self.rows = self.header["rows"]
+        self._strings = StringTable(self._map, offset)
+        self._offsets = dict(zip(
+            (name for name, _ in self.header["columns"]),
+            column_offsets(self.header, self._strings.end, self._map)
+        ))
+
+    @property
+    def closed(self) -> bool:
+        return self._map is None
+
+    def read_rows(self, start: int, stop: int) -> List[Dict[str, Any]]:
+        """Transactions [start, stop) as dicts"""
+        expenses = decode_rows(self._map, self.header, self._strings, list(self._offsets.values()), start, stop)
+        for expense in expenses:
+            # Files written before multi-currency support have no Currency column
+            if expense.get("Currency") is None:
+                expense["Currency"] = BASE_CURRENCY
+        return expenses
+
+    def _column(self, name: str, dtype: str) -> np.ndarray:
+        return np.frombuffer(self._map, dtype=dtype, count=self.rows, offset=self._offsets[name])
+
+    def _text_column(self, name: str, default: Optional[str] = None) -> pd.Categorical:
+        if name not in self._offsets:
+            return pd.Categorical([default] * self.rows)
+        codes, inverse = np.unique(self._column(name, '<u4'), return_inverse=True)
+        labels = [default if code == _MISSING else self._strings[code] for code in codes.tolist()]
+        if _MISSING in codes:
+            # The default may also be a stored label, which from_codes would reject as a duplicate
+            return pd.Categorical(np.array(labels, dtype=object)[inverse.reshape(-1)])
+        return pd.Categorical.from_codes(inverse.reshape(-1), labels)
+
+    def frame(self) -> pd.DataFrame:
+        """The build_transaction_frame frame, built from the column blocks without any per-row dicts"""
+        dates = (self._column('Date', '<i4') - _EPOCH_ORDINAL).astype('datetime64[D]')
+        descriptions = [self._strings[code] for code in self._column('Description', '<u4').tolist()]
+        return frame_from_columns(
+            dates,
+            self._text_column('Category'),
+            self._column('Amount', '<f8').copy(),
+            self._text_column('Currency', BASE_CURRENCY),
+            descriptions,
+            self._text_column('Type')
+        )
+
+    def rollup_frame(self) -> Optional[pd.DataFrame]:
+        """Monthly totals from the header, or None for files written before it held them"""
+        if "rollup" not in self.header:
+            return None
+        rollup = pd.DataFrame(self.header["rollup"], columns=ROLLUP_COLUMNS)
+        rollup['Currency'] = rollup['Currency'].fillna(BASE_CURRENCY)
+        rollup['Cents'] = rollup['Cents'].astype(np.int64)
+        return rollup
+
+    def acquire(self) -> None:
+        self._references += 1
+
+    def close(self) -> None:
+        if self._map is None:
+            return
+        self._references -= 1
+        if self._references > 0:
+            return
+        mapping, self._map, self._strings = self._map, None, None
+        try:
+            mapping.close()
+        except BufferError:
+            # A frame still views the mapping; it is unmapped once that is collected
+            pass
+
+
+class PagedExpenses(MutableSequence):
+    """The transaction list of a mapped file, decoding page_size rows at a time.
+
+    Appended transactions are kept after the file's rows; any other insert or
+    delete first decodes every row into a plain list. Once every row has been
+    decoded the file is unmapped, so it can be replaced by the next save.
+    """
+
+    def __init__(self, source: MappedUserData, page_size: int = PAGE_SIZE) -> None:
+        self._source = source
+        self.page_size = page_size
+        self._pages: Dict[int, List[Dict[str, Any]]] = {}
+        self._appended: List[Dict[str, Any]] = []
+        self._rows: Optional[List[Dict[str, Any]]] = None
+        self._frame: Optional[pd.DataFrame] = None
+        self._modified = False
+
+    @property
+    def decoded_rows(self) -> int:
+        if self._rows is not None:
+            return len(self._rows)
+        return sum(len(page) for page in self._pages.values())
+
+    def _page(self, number: int) -> List[Dict[str, Any]]:
+        page = self._pages.get(number)
+        if page is None:
+            start = number * self.page_size
+            page = self._source.read_rows(start, min(start + self.page_size, self._source.rows))
+            self._pages[number] = page
+            if len(self._pages) * self.page_size >= self._source.rows:
+                self._materialize()
+        return page
+
+    def _materialize(self) -> List[Dict[str, Any]]:
+        if self._rows is None:
+            pages = -(-self._source.rows // self.page_size)
+            if not self._pages:
+                rows = self._source.read_rows(0, self._source.rows)
+            else:
+                rows = []
+                for number in range(pages):
+                    page = self._pages.get(number)
+                    if page is None:
+                        start = number * self.page_size
+                        page = self._source.read_rows(start, min(start + self.page_size, self._source.rows))
+                    rows.extend(page)
+            self._rows = rows + self._appended
+            self._pages, self._appended = {}, []
+            self._source.close()
+        return self._rows
+
+    def __len__(self) -> int:
+        if self._rows is not None:
+            return len(self._rows)
+        return self._source.rows + len(self._appended)
+
+    def __getitem__(self, index):
+        if self._rows is not None:
+            return self._rows[index]
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("list index out of range")
+        if index >= self._source.rows:
+            return self._appended[index - self._source.rows]
+        return self._page(index // self.page_size)[index % self.page_size]
+
+    def __iter__(self):
+        return iter(self._materialize())
+
+    def stream(self):
+        """Iterate the transactions one page at a time without keeping the decoded pages"""
+        if self._rows is not None:
+            yield from self._rows
+            return
+        for start in range(0, self._source.rows, self.page_size):
+            page = self._pages.get(start // self.page_size)
+            yield from page if page is not None else self._source.read_rows(
+                start, min(start + self.page_size, self._source.rows))
+        yield from self._appended
+
+    def __setitem__(self, index, value) -> None:
+        self._modified, self._frame = True, None
+        if self._rows is None and isinstance(index, int) and 0 <= index < self._source.rows:
+            page = self._page(index // self.page_size)
+            # Reading the last undecoded page turns this into a plain list
+            if self._rows is None:
+                page[index % self.page_size] = value
+                return
+        self._materialize()[index] = value
+
+    def __delitem__(self, index) -> None:
+        self._modified, self._frame = True, None
+        del self._materialize()[index]
+
+    def insert(self, index: int, value: Dict[str, Any]) -> None:
+        self._modified, self._frame = True, None
+        if self._rows is None and index == len(self):
+            self._appended.append(value)
+        else:
+            self._materialize().insert(index, value)
+
+    def to_frame(self) -> pd.DataFrame:
+        if self._modified or self._source.closed:
+            return build_transaction_frame(list(self))
+        # Every ledger index builds from the frame, so it is read from the column blocks once
+        if self._frame is None:
+            self._frame = self._source.frame()
+        return self._frame.copy(deep=False)
+
+    def snapshot(self) -> MutableSequence:
+        """A copy that later edits of this list cannot change, without decoding the file's rows.
+
+        The copy shares the mapping; Windows cannot replace a mapped file, so there
+        the rows are decoded into a plain list instead.
+        """
+        if self._rows is not None or self._source.closed or os.name == "nt":
+            return list(self)
+        copy = PagedExpenses(self._source, self.page_size)
+        self._source.acquire()
+        # Pages are edited in place by __setitem__, so each is copied
+        copy._pages = {number: list(page) for number, page in self._pages.items()}
+        copy._appended = list(self._appended)
+        copy._modified = self._modified
+        return copy
+
+    def rollup_frame(self) -> Optional[pd.DataFrame]:
+        """The file's monthly totals, or None once they no longer match the transactions"""
+        return None if self._modified else self._source.rollup_frame()
+
+
+def open_user_data(username: str, migrate: bool = True) -> UserData:
+    """Like load_local_data, but transactions stay in the mapped file until read.
+
+    With migrate=False a legacy JSON file is read as it is instead of converted.
+    """
+    file_path = find_user_data_path(username)
+    if file_path is None or file_path != get_user_data_path(username):
+        # Missing and legacy JSON files are small and are migrated on load anyway
+        if not migrate:
+            return migrate_user_data({}) if file_path is None else read_user_data_file(file_path)
+        return load_local_data(username)
+    source = MappedUserData(file_path)
+    data = migrate_user_data(dict(source.header["data"]))
+    data["expenses"] = PagedExpenses(source)
+    return data
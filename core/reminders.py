@@ -0,0 +1,44 @@
+from datetime import date as Date, datetime, timedelta
+from typing import Any, Dict, List, Tuple
+
+Reminder = Dict[str, Any]
+
+SAVINGS_FREQUENCIES = {"Daily": 1, "Weekly": 7, "Monthly": 30}
+
+
+def add_reminder(reminders: List[Reminder], date: Date, note: str, amount: float) -> Reminder:
+    reminder = {
+        'date': date.strftime("%Y-%m-%d"),
+        'note': note,
+        'amount': amount,
+        'completed': False
+    }
+    reminders.append(reminder)
+    return reminder
+
+
+def delete_reminder(reminders: List[Reminder], index: int) -> bool:
+    if 0 <= index < len(reminders):
+        reminders.pop(index)
+        return True
+    return False
+
+
+def mark_reminder_complete(reminders: List[Reminder], index: int) -> bool:
+    if 0 <= index < len(reminders):
+        reminders[index]['completed'] = True
+        return True
+    return False
+
+
+def upcoming_reminders(reminders: List[Reminder]) -> List[Tuple[int, Reminder]]:
+    """Open reminders by date, paired with their position in reminders"""
+    return sorted(
+        [(index, reminder) for index, reminder in enumerate(reminders) if not reminder.get('completed', False)],
+        key=lambda item: datetime.strptime(item[1]['date'], "%Y-%m-%d")
+    )
+
+
+def next_savings_date(frequency: str, now: datetime) -> datetime:
+    """When the next regular saving is due for a Daily/Weekly/Monthly frequency"""
+    return now + timedelta(days=SAVINGS_FREQUENCIES[frequency])
@@ -0,0 +1,171 @@
+import hashlib
+from collections import OrderedDict
+
+import pandas as pd
+from fpdf import FPDF
+
+from core.fx import BASE_CURRENCY, load_fx_table
+
+# The core PDF fonts are Latin-1 only, so most currencies are written as their code
+PDF_CURRENCY_PREFIXES = {"INR": "Rs.", "USD": "$", "GBP": "£"}
+
+
+def _money(amount, currency):
+    return f"{PDF_CURRENCY_PREFIXES.get(currency, currency)} {amount:.2f}"
+
+
+# Rendered month sections, {(month, content digest, currency): page content streams}, shared by every
+# session of the process; a month is re-rendered only when its transactions change
+MONTH_SECTIONS_KEPT = 1024
+_section_cache = OrderedDict()
+
+_SECTION_COLUMNS = ['Date', 'Type', 'Category', 'Amount', 'Currency', 'Description', 'Cents']
+
+
+def _new_pdf():
+    # Every document registers its fonts in the same order, so the /F<n> references in a
+    # page rendered by one document mean the same fonts in any other
+    pdf = FPDF()
+    pdf.set_font('Arial', 'B', 12)
+    pdf.set_font('Arial', '', 12)
+    return pdf
+
+
+def _append_pages(pdf, pages):
+    # fpdf 1.7 keeps each page's content stream as a string until output
+    for content in pages:
+        pdf.page += 1
+        pdf.pages[pdf.page] = content
+
+
+def month_digest(month_df):
+    """Hash of everything a month's section shows"""
+    # Categoricals hash by value, so the same rows hash alike whatever the frame's categories
+    hashes = pd.util.hash_pandas_object(month_df[_SECTION_COLUMNS], index=False)
+    return hashlib.blake2b(hashes.to_numpy().tobytes(), digest_size=16).hexdigest()
+
+
+def _render_month_section(month, month_df, currency):
+    pdf = _new_pdf()
+    pdf.add_page()
+    pdf.set_font('Arial', 'B', 14)
+    pdf.cell(0, 10, f'Transactions {month}', 0, 1, 'L')
+    pdf.set_font('Arial', '', 12)
+    is_expense = month_df['Type'] == 'Expense'
+    pdf.cell(0, 8, f"Income: {_money(month_df.loc[~is_expense, 'Cents'].sum() / 100, currency)}   "
+                   f"Expenses: {_money(month_df.loc[is_expense, 'Cents'].sum() / 100, currency)}", 0, 1)
+    pdf.ln(5)
+
+    # Table header
+    pdf.set_font('Arial', 'B', 12)
+    pdf.cell(30, 10, 'Date', 1)
+    pdf.cell(30, 10, 'Type', 1)
+    pdf.cell(40, 10, 'Category', 1)
+    pdf.cell(50, 10, 'Amount', 1)
+    pdf.cell(40, 10, 'Description', 1)
+    pdf.ln()
+
+    # Table content
+    pdf.set_font('Arial', '', 12)
+    for row in month_df[['Date', 'Type', 'Category', 'Amount', 'Currency', 'Description']].itertuples(index=False):
+        pdf.cell(30, 10, f"{row.Date:%Y-%m-%d}", 1)
+        pdf.cell(30, 10, str(row.Type), 1)
+        pdf.cell(40, 10, str(row.Category), 1)
+        pdf.cell(50, 10, _money(row.Amount, row.Currency), 1)
+        pdf.cell(40, 10, str(row.Description), 1)
+        pdf.ln()
+    return [pdf.pages[number] for number in range(1, pdf.page + 1)]
+
+
+def _month_section(month, month_df, currency):
+    """Page content streams of a month's section, rendered only if the month changed"""
+    key = (month, month_digest(month_df), currency)
+    pages = _section_cache.get(key)
+    if pages is None:
+        pages = _render_month_section(month, month_df, currency)
+        _section_cache[key] = pages
+        if len(_section_cache) > MONTH_SECTIONS_KEPT:
+            _section_cache.popitem(last=False)
+    else:
+        _section_cache.move_to_end(key)
+    return pages
+
+
+def build_pdf_report(df, total_income, total_expenses, remaining_balance, savings_goals,
+                     unusual=(), spikes=(), pdf_path="financial_report.pdf", currency=BASE_CURRENCY, months=None):
+    """Render the financial report PDF and return its path; totals are in currency.
+
+    months limits the transaction history to an inclusive ('YYYY-MM', 'YYYY-MM') range.
+    """
+    if months is not None:
+        month_strings = df['Month'].astype(str)
+        df = df[(month_strings >= months[0]) & (month_strings <= months[1])]
+    pdf = _new_pdf()
+    pdf.add_page()
+    
+    # Calculate total savings
+    total_savings = load_fx_table().convert(sum(goal['current_amount'] for goal in savings_goals),
+                                            BASE_CURRENCY, currency)
+    
+    # Set font
+    pdf.set_font('Arial', 'B', 16)
+    pdf.cell(0, 10, 'Financial Report', 0, 1, 'C')
+    if months is not None:
+        pdf.set_font('Arial', '', 12)
+        pdf.cell(0, 8, months[0] if months[0] == months[1] else f'{months[0]} to {months[1]}', 0, 1, 'C')
+    pdf.ln(10)
+    
+    # Add Summary Section
+    pdf.set_font('Arial', 'B', 14)
+    pdf.cell(0, 10, 'Financial Summary', 0, 1, 'L')
+    pdf.ln(5)
+    
+    # Summary details
+    pdf.set_font('Arial', '', 12)
+    pdf.cell(0, 8, f'Total Income: {_money(total_income, currency)}', 0, 1)
+    pdf.cell(0, 8, f'Total Expenses: {_money(total_expenses, currency)}', 0, 1)
+    pdf.cell(0, 8, f'Balance: {_money(remaining_balance, currency)}', 0, 1)
+    pdf.cell(0, 8, f'Total Savings: {_money(total_savings, currency)}', 0, 1)
+    pdf.ln(10)
+    
+    # Add Savings Goals Section
+    if savings_goals:
+        pdf.set_font('Arial', 'B', 14)
+        pdf.cell(0, 10, 'Savings Goals', 0, 1, 'L')
+        pdf.ln(5)
+        
+        pdf.set_font('Arial', '', 12)
+        for goal in savings_goals:
+            progress = (goal['current_amount'] / goal['target_amount'] * 100) if goal['target_amount'] > 0 else 0
+            pdf.cell(0, 8, f"Goal: {goal['name']}", 0, 1)
+            pdf.cell(0, 8, f"Target: {_money(goal['target_amount'], BASE_CURRENCY)}", 0, 1)
+            pdf.cell(0, 8, f"Saved: {_money(goal['current_amount'], BASE_CURRENCY)}", 0, 1)
+            pdf.cell(0, 8, f"Progress: {progress:.1f}%", 0, 1)
+            pdf.cell(0, 8, f"Due Date: {goal['target_date']}", 0, 1)
+            pdf.ln(5)
+        pdf.ln(10)
+    
+    # Add Spending Alerts Section
+    if unusual or spikes:
+        pdf.set_font('Arial', 'B', 14)
+        pdf.cell(0, 10, 'Spending Alerts', 0, 1, 'L')
+        pdf.ln(5)
+        
+        pdf.set_font('Arial', '', 12)
+        for expense in unusual:
+            pdf.cell(0, 8, f"Unusual: {expense['Date']} {expense['Category']} "
+                           f"{_money(expense['Amount'], expense['Currency'])} "
+                           f"(typical {_money(expense['typical'], BASE_CURRENCY)})", 0, 1)
+        for spike in spikes:
+            pdf.cell(0, 8, f"Spike: {spike['Category']} {_money(spike['Total'], BASE_CURRENCY)} this month, "
+                           f"{spike['Ratio']:.1f}x the recent monthly median", 0, 1)
+        pdf.ln(10)
+    
+    # Transaction history, one section per month starting on its own page
+    if not df.empty:
+        for month, month_df in df.groupby('Month', observed=True, sort=True):
+            _append_pages(pdf, _month_section(str(month), month_df, currency))
+
+    # Save the PDF
+    pdf.output(pdf_path)
+    return pdf_path
@@ -0,0 +1,88 @@
+from bisect import bisect_left
+
+# How many removed ids are remembered so undo can put rows back with their own id
+REMOVED_IDS_KEPT = 4096
+# Gap between the ids of appended rows, and the most an inserted row takes of a gap
+STRIDE = 2 ** 32
+INSERT_STEP = 2 ** 16
+
+
+class RowIds:
+    """Stable ids for ledger rows, kept sorted in ledger order.
+
+    A row's ledger position is one bisect away, and deleting a row leaves the
+    other ids untouched. Removed ids are remembered under the ids of the rows
+    that were around them: undo reverts changes newest first, so a row is put
+    back between the same neighbours and gets its own id again.
+
+    Other inserted rows take an id just after the row before them, so the
+    ascending inserts of undoing a bulk delete fit in one gap. If a gap runs
+    out all ids are spread out again and on_renumber receives {old id: new id}.
+    """
+
+    def __init__(self, on_renumber=None):
+        self._ids = []
+        self._next_id = 0
+        self._removed = {}
+        self._removed_count = 0
+        self._on_renumber = on_renumber
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __getitem__(self, index):
+        return self._ids[index]
+
+    def _neighbours(self, index):
+        return (self._ids[index - 1] if index > 0 else None,
+                self._ids[index] if index < len(self._ids) else None)
+
+    def append(self):
+        row_id = self._next_id
+        self._next_id += STRIDE
+        self._ids.append(row_id)
+        return row_id
+
+    def _renumber(self):
+        mapping = {row_id: position * STRIDE for position, row_id in enumerate(self._ids)}
+        self._ids = list(mapping.values())
+        self._next_id = len(self._ids) * STRIDE
+        # Removed ids no longer fit between their neighbours' new ids
+        self._removed = {}
+        self._removed_count = 0
+        if self._on_renumber is not None:
+            self._on_renumber(mapping)
+
+    def insert(self, index):
+        low, high = self._neighbours(index)
+        removed = self._removed.get((low, high))
+        if removed:
+            row_id = removed.pop()
+            self._removed_count -= 1
+            if not removed:
+                del self._removed[(low, high)]
+        elif high is None:
+            return self.append()
+        else:
+            low = -STRIDE if low is None else low
+            if high - low < 2:
+                self._renumber()
+                return self.insert(index)
+            row_id = low + min((high - low) // 2, INSERT_STEP)
+        self._ids.insert(index, row_id)
+        return row_id
+
+    def pop(self, index):
+        row_id = self._ids.pop(index)
+        self._removed.setdefault(self._neighbours(index), []).append(row_id)
+        self._removed_count += 1
+        if self._removed_count > 2 * REMOVED_IDS_KEPT:
+            # Forget the oldest removals; they are far beyond any undo history
+            for key in list(self._removed):
+                if self._removed_count <= REMOVED_IDS_KEPT:
+                    break
+                self._removed_count -= len(self._removed.pop(key))
+        return row_id
+
+    def position(self, row_id):
+        return bisect_left(self._ids, row_id)
@@ -0,0 +1,122 @@
+import re
+from bisect import bisect_left, insort
+
+from core.ledger import build_transaction_frame
+from core.row_ids import RowIds
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text):
+    """Lowercase word tokens of a text"""
+    return TOKEN_PATTERN.findall(str(text).lower())
+
+
+def get_row_tokens(expense):
+    """Searchable tokens of a transaction (Description and Category)"""
+    return set(tokenize(expense.get('Description', ''))) | set(tokenize(expense.get('Category', '')))
+
+
+class SearchIndex:
+    """Inverted index over transaction descriptions and categories.
+
+    Rows get increasing ids in ledger order. Deleting a row keeps the remaining
+    ids sorted, so a row's position in the ledger is found by bisecting the id list.
+    The initial build reads the transactions frame and tokenizes each distinct
+    description once.
+    """
+
+    def __init__(self, expenses=()):
+        self._postings = {}
+        self._vocabulary = []
+        self._ids = RowIds(self._renumber_rows)
+        frame = build_transaction_frame(expenses)
+        description_tokens, category_tokens = {}, {}
+        for description, category in zip(frame['Description'].tolist(), frame['Category'].tolist()):
+            tokens = description_tokens.get(description)
+            if tokens is None:
+                tokens = description_tokens[description] = set(tokenize(description))
+            if category not in category_tokens:
+                category_tokens[category] = set(tokenize(category))
+            self._index_tokens(self._ids.append(), tokens | category_tokens[category])
+        self._vocabulary = sorted(self._postings)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def _index_tokens(self, row_id, tokens):
+        # Bulk build: the vocabulary is sorted once at the end
+        for token in tokens:
+            postings = self._postings.get(token)
+            if postings is None:
+                self._postings[token] = {row_id}
+            else:
+                postings.add(row_id)
+
+    def _index_row(self, row_id, expense):
+        for token in get_row_tokens(expense):
+            postings = self._postings.get(token)
+            if postings is None:
+                self._postings[token] = {row_id}
+                insort(self._vocabulary, token)
+            else:
+                postings.add(row_id)
+
+    def _renumber_rows(self, mapping):
+        for token, postings in self._postings.items():
+            self._postings[token] = {mapping[row_id] for row_id in postings}
+
+    def _unindex_row(self, row_id, expense):
+        for token in get_row_tokens(expense):
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.discard(row_id)
+            if not postings:
+                del self._postings[token]
+                del self._vocabulary[bisect_left(self._vocabulary, token)]
+
+    def add(self, expense):
+        """Index a transaction appended to the end of the ledger"""
+        self._index_row(self._ids.append(), expense)
+
+    def insert(self, index, expense):
+        """Index a transaction put back at position index"""
+        self._index_row(self._ids.insert(index), expense)
+
+    def update(self, index, old_expense, new_expense):
+        """Re-index the transaction at position index after an edit"""
+        row_id = self._ids[index]
+        self._unindex_row(row_id, old_expense)
+        self._index_row(row_id, new_expense)
+
+    def remove(self, index, expense):
+        """Drop the transaction at position index"""
+        row_id = self._ids.pop(index)
+        self._unindex_row(row_id, expense)
+
+    def _prefix_postings(self, prefix):
+        start = bisect_left(self._vocabulary, prefix)
+        end = start
+        while end < len(self._vocabulary) and self._vocabulary[end].startswith(prefix):
+            end += 1
+        if end - start == 1:
+            return self._postings[self._vocabulary[start]]
+        matches = set()
+        for token in self._vocabulary[start:end]:
+            matches.update(self._postings[token])
+        return matches
+
+    def search(self, query):
+        """Ledger positions of transactions matching every query term as a prefix"""
+        terms = tokenize(query)
+        if not terms:
+            return list(range(len(self._ids)))
+        postings = sorted((self._prefix_postings(term) for term in set(terms)), key=len)
+        # Intersect from the smallest set up, so no step copies more than the running result
+        result = postings[0]
+        for term_postings in postings[1:]:
+            if not result:
+                break
+            result = result & term_postings
+        return [self._ids.position(row_id) for row_id in sorted(result)]
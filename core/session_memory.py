@@ -0,0 +1,181 @@
+"""Memory accounting of dashboard sessions and eviction of idle sessions' ledgers.
+
+Sizes are estimates: containers longer than SAMPLE_SIZE are measured from an
+evenly spaced sample and scaled up, frames and arrays report their buffers,
+and objects reached twice within one session are counted once.
+"""
+import sys
+import threading
+import time
+import types
+import weakref
+from typing import Any, Callable, Dict, List, Mapping, Optional, Set
+
+import numpy as np
+import pandas as pd
+
+SAMPLE_SIZE = 64
+# Seconds between two measurements of the same session
+MEASURE_INTERVAL = 10.0
+# Session state keys holding the ledger and the data derived from it
+LEDGER_KEYS = ('expenses', 'ledger')
+CACHE_KEYS = ('ledger_frame', 'forecast_state')
+USAGE_KINDS = ('ledger', 'caches', 'widgets')
+
+_SHARED_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType)
+_ATOMIC_TYPES = (str, bytes, int, float, bool, type(None))
+
+
+def _sample(items: List[Any]) -> List[Any]:
+    step = len(items) / SAMPLE_SIZE
+    return [items[int(position * step)] for position in range(SAMPLE_SIZE)]
+
+
+def estimate_bytes(obj: Any, seen: Optional[Set[int]] = None) -> int:
+    """Approximate deep size of obj in bytes; classes, modules and functions count as shared"""
+    seen = set() if seen is None else seen
+    if id(obj) in seen or isinstance(obj, _SHARED_TYPES):
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, _ATOMIC_TYPES):
+        return sys.getsizeof(obj)
+    if isinstance(obj, (pd.DataFrame, pd.Series, pd.Index)):
+        usage = obj.memory_usage(deep=True)
+        return int(usage.sum()) if isinstance(usage, pd.Series) else int(usage)
+    if isinstance(obj, np.ndarray):
+        return sys.getsizeof(obj) if obj.base is None else obj.nbytes
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        items = list(obj.items())
+        sampled = items if len(items) <= SAMPLE_SIZE else _sample(items)
+        content = sum(estimate_bytes(key, seen) + estimate_bytes(value, seen) for key, value in sampled)
+        return size + (content * len(items) // len(sampled) if sampled else 0)
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        items = obj if isinstance(obj, (list, tuple)) else list(obj)
+        sampled = items if len(items) <= SAMPLE_SIZE else _sample(items)
+        content = sum(estimate_bytes(item, seen) for item in sampled)
+        return size + (content * len(items) // len(sampled) if sampled else 0)
+    attributes = getattr(obj, '__dict__', None)
+    if attributes is not None:
+        size += estimate_bytes(attributes, seen)
+    for slot in getattr(type(obj), '__slots__', ()):
+        size += estimate_bytes(getattr(obj, slot, None), seen)
+    return size
+
+
+def session_usage(state: Mapping[str, Any]) -> Dict[str, int]:
+    """Estimated bytes of a session state's ledger, caches and widget and other state"""
+    seen: Set[int] = set()
+    usage = {kind: 0 for kind in USAGE_KINDS}
+    # The ledger first, so rows that caches and indexes share are counted as ledger
+    for key in sorted(state, key=lambda key: (key not in LEDGER_KEYS, key not in CACHE_KEYS)):
+        kind = 'ledger' if key in LEDGER_KEYS else 'caches' if key in CACHE_KEYS else 'widgets'
+        usage[kind] += estimate_bytes(key, seen) + estimate_bytes(state[key], seen)
+    return usage
+
+
+class SessionRegistry:
+    """Memory use and last activity of the logged-in sessions of one server process.
+
+    Sessions are held by weak reference, so a closed session drops out on its
+    own. While the recorded total exceeds budget_bytes, evict_idle() hands the
+    sessions idle for at least idle_seconds, least recently active first, to an
+    evict callback; touch() waits for an eviction in progress, so a session that
+    starts running again either is not evicted or sees the eviction complete.
+    """
+
+    def __init__(self, budget_bytes: int, idle_seconds: float, measure_interval: float = MEASURE_INTERVAL) -> None:
+        self.budget_bytes = budget_bytes
+        self.idle_seconds = idle_seconds
+        self.measure_interval = measure_interval
+        self.evictions = 0
+        self._sessions: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def touch(self, session_id: str, now: Optional[float] = None) -> None:
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is not None:
+                entry['last_active'] = time.time() if now is None else now
+
+    def needs_measuring(self, session_id: str, now: Optional[float] = None) -> bool:
+        now = time.time() if now is None else now
+        entry = self._sessions.get(session_id)
+        return entry is None or entry['evicted'] or now - entry['measured_at'] >= self.measure_interval
+
+    def record(self, session_id: str, username: str, state: Any, usage: Dict[str, int],
+               now: Optional[float] = None) -> None:
+        """Store a session's latest measurement; state is what evict() receives"""
+        now = time.time() if now is None else now
+        with self._lock:
+            self._sessions[session_id] = {
+                'username': username,
+                'state': weakref.ref(state),
+                'usage': dict(usage),
+                'measured_at': now,
+                'last_active': now,
+                'evicted': False
+            }
+
+    def forget(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def _prune(self) -> None:
+        for session_id in [session_id for session_id, entry in self._sessions.items() if entry['state']() is None]:
+            del self._sessions[session_id]
+
+    def _total(self) -> int:
+        return sum(sum(entry['usage'].values()) for entry in self._sessions.values())
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            self._prune()
+            return self._total()
+
+    def evict_idle(self, evict: Callable[[Any], bool], exclude: Optional[str] = None,
+                   now: Optional[float] = None) -> List[str]:
+        """Evict idle sessions other than exclude until the total is within budget; returns their ids.
+
+        evict(state) drops the session's ledger and caches and returns whether it did.
+        """
+        now = time.time() if now is None else now
+        evicted = []
+        with self._lock:
+            self._prune()
+            total = self._total()
+            if total <= self.budget_bytes:
+                return evicted
+            idle = sorted(
+                (entry['last_active'], session_id) for session_id, entry in self._sessions.items()
+                if session_id != exclude and not entry['evicted']
+                and now - entry['last_active'] >= self.idle_seconds
+            )
+            for _, session_id in idle:
+                if total <= self.budget_bytes:
+                    break
+                entry = self._sessions[session_id]
+                state = entry['state']()
+                if state is None or not evict(state):
+                    continue
+                freed = entry['usage']['ledger'] + entry['usage']['caches']
+                entry['usage'] = {**entry['usage'], 'ledger': 0, 'caches': 0}
+                entry['evicted'] = True
+                total -= freed
+                self.evictions += 1
+                evicted.append(session_id)
+        return evicted
+
+    def stats(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """One row per session, the largest first"""
+        now = time.time() if now is None else now
+        with self._lock:
+            self._prune()
+            rows = [
+                {'Session': session_id[:8], 'User': entry['username'], **entry['usage'],
+                 'total': sum(entry['usage'].values()), 'idle_s': now - entry['last_active'],
+                 'evicted': entry['evicted']}
+                for session_id, entry in self._sessions.items()
+            ]
+        return sorted(rows, key=lambda row: row['total'], reverse=True)
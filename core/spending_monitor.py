@@ -0,0 +1,161 @@
+import math
+from statistics import median
+
+from core.fx import expense_rows, expense_to_cents, load_fx_table
+from core.ledger import build_transaction_frame
+from core.row_ids import RowIds
+
+
+class RunningStats:
+    """Welford mean/variance that also supports removing a value"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+
+    def remove(self, value):
+        if self.count <= 1:
+            self.count, self.mean, self._m2 = 0, 0.0, 0.0
+            return
+        previous_mean = (self.count * self.mean - value) / (self.count - 1)
+        self._m2 = max(self._m2 - (value - previous_mean) * (value - self.mean), 0.0)
+        self.mean = previous_mean
+        self.count -= 1
+
+    @property
+    def std(self):
+        return math.sqrt(self._m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+
+def _month_of(expense):
+    return expense['Date'][:7]
+
+
+def _previous_months(month, count):
+    year, number = int(month[:4]), int(month[5:7])
+    months = []
+    for _ in range(count):
+        year, number = (year, number - 1) if number > 1 else (year - 1, 12)
+        months.append(f"{year:04d}-{number:02d}")
+    return months
+
+
+class SpendingMonitor:
+    """Per-category running statistics over expenses, updated per transaction.
+
+    Each expense is scored against its category's history at the moment it is
+    added; edits and deletes reverse their contribution instead of rescanning.
+    Amounts are converted to the base currency at each transaction's date, so
+    means, typical amounts and monthly totals are all in BASE_CURRENCY; monthly
+    totals are kept in exact cents. Flagged transactions are read back from the
+    ledger's list, which the monitor keeps a reference to.
+    """
+
+    def __init__(self, expenses=(), z_threshold=3.0, min_history=5, spike_ratio=1.5, window=3):
+        self.z_threshold = z_threshold
+        self.min_history = min_history
+        self.spike_ratio = spike_ratio
+        self.window = window
+        self._expenses = expenses
+        self._stats = {}
+        self._monthly_totals = {}
+        self._flags = {}
+        self._fx = load_fx_table()
+        self._ids = RowIds(self._renumber_rows)
+        # Convert everything already in the ledger in one vectorized call, from the transactions frame
+        for spent, month, category, cents in expense_rows(build_transaction_frame(expenses), self._fx):
+            row_id = self._ids.append()
+            if spent:
+                self._include(row_id, month, category, cents)
+
+    def _renumber_rows(self, mapping):
+        self._flags = {mapping[row_id]: flag for row_id, flag in self._flags.items()}
+
+    def _include_expense(self, row_id, expense):
+        if expense['Type'] == 'Expense':
+            self._include(row_id, _month_of(expense), expense['Category'], expense_to_cents(expense, self._fx))
+
+    def _include(self, row_id, month, category, cents):
+        amount = cents / 100
+        stats = self._stats.setdefault(category, RunningStats())
+        if stats.count >= self.min_history and stats.std > 0:
+            z_score = (amount - stats.mean) / stats.std
+            if z_score >= self.z_threshold:
+                self._flags[row_id] = (z_score, stats.mean)
+        stats.add(amount)
+        key = (category, month)
+        self._monthly_totals[key] = self._monthly_totals.get(key, 0) + cents
+
+    def _exclude(self, row_id, expense):
+        self._flags.pop(row_id, None)
+        if expense['Type'] != 'Expense':
+            return
+        category, cents = expense['Category'], expense_to_cents(expense, self._fx)
+        self._stats[category].remove(cents / 100)
+        key = (category, _month_of(expense))
+        self._monthly_totals[key] -= cents
+        if self._stats[category].count == 0:
+            del self._stats[category]
+
+    def add(self, expense):
+        """Score and record a transaction appended to the ledger"""
+        self._include_expense(self._ids.append(), expense)
+
+    def insert(self, index, expense):
+        """Score and record a transaction put back at position index"""
+        self._include_expense(self._ids.insert(index), expense)
+
+    def update(self, index, old_expense, new_expense):
+        """Replace the contribution of the transaction at position index"""
+        row_id = self._ids[index]
+        self._exclude(row_id, old_expense)
+        self._include_expense(row_id, new_expense)
+
+    def remove(self, index, expense):
+        """Drop the contribution of the transaction at position index"""
+        self._exclude(self._ids.pop(index), expense)
+
+    def category_stats(self, category):
+        """(count, mean, std) of the category's expense amounts in the base currency"""
+        stats = self._stats.get(category)
+        if stats is None:
+            return 0, 0.0, 0.0
+        return stats.count, stats.mean, stats.std
+
+    def unusual_transactions(self, limit=None):
+        """Expenses that were far above their category's mean when added, newest first.
+
+        Each is the transaction as entered plus z_score and the base-currency typical amount.
+        """
+        row_ids = sorted(self._flags, reverse=True)[:limit]
+        flagged = []
+        for row_id in row_ids:
+            z_score, typical = self._flags[row_id]
+            flagged.append(dict(self._expenses[self._ids.position(row_id)], z_score=z_score, typical=typical))
+        return flagged
+
+    def category_spikes(self, month):
+        """Categories whose total in month exceeds spike_ratio times their rolling monthly median"""
+        previous = _previous_months(month, self.window)
+        spikes = []
+        for category in self._stats:
+            total = self._monthly_totals.get((category, month), 0) / 100
+            if total <= 0:
+                continue
+            baseline = median(self._monthly_totals.get((category, m), 0) for m in previous) / 100
+            if baseline > 0 and total >= self.spike_ratio * baseline:
+                spikes.append({
+                    'Category': category,
+                    'Month': month,
+                    'Total': total,
+                    'Median': baseline,
+                    'Ratio': total / baseline
+                })
+        return sorted(spikes, key=lambda spike: spike['Ratio'], reverse=True)
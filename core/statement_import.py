@@ -0,0 +1,63 @@
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from core.categorizer import Categorizer
+from core.fx import BASE_CURRENCY, load_fx_table
+from core.ledger import TRANSACTION_COLUMNS, Expense, get_category_options, get_transaction_types
+
+REQUIRED_COLUMNS = ['Date', 'Description', 'Amount']
+OPTIONAL_COLUMNS = ['Type', 'Category', 'Currency']
+
+
+def read_statement(file, categorizer: Categorizer, currency: str = BASE_CURRENCY) -> Tuple[List[Expense], int]:
+    """(transactions, how many were categorized automatically) of a bank statement CSV.
+
+    Column names are matched case-insensitively; Date, Description and Amount
+    are required, Type, Category and Currency optional. Without a Type column a
+    statement holding both signs of Amount has debits negative and credits
+    positive, otherwise every row is an Expense. Rows without a known Category
+    go through the categorizer in one batch. Every currency needs exchange rates.
+    """
+    frame = pd.read_csv(file, dtype=str, keep_default_na=False, skipinitialspace=True)
+    columns = {column.strip().lower(): column for column in frame.columns}
+    missing = [name for name in REQUIRED_COLUMNS if name.lower() not in columns]
+    if missing:
+        raise ValueError(f"The statement has no {', '.join(missing)} column")
+    frame = frame.rename(columns={columns[name.lower()]: name
+                                  for name in REQUIRED_COLUMNS + OPTIONAL_COLUMNS if name.lower() in columns})
+
+    dates = pd.to_datetime(frame['Date'], errors='coerce')
+    amounts = pd.to_numeric(frame['Amount'].str.replace(',', '', regex=False), errors='coerce')
+    invalid = dates.isna() | amounts.isna()
+    if invalid.any():
+        row = int(np.flatnonzero(invalid.to_numpy())[0]) + 2
+        raise ValueError(f"Row {row} needs a valid date and amount")
+
+    if 'Type' in frame:
+        types = frame['Type'].str.strip()
+        unknown = ~types.isin(get_transaction_types())
+        if unknown.any():
+            raise ValueError(f"Unknown transaction type {types[unknown].iloc[0]!r}")
+    elif (amounts < 0).any() and (amounts > 0).any():
+        types = pd.Series(np.where(amounts > 0, 'Additional Income', 'Expense'), index=frame.index)
+    else:
+        types = pd.Series('Expense', index=frame.index)
+
+    descriptions = frame['Description'].str.strip()
+    categories = frame['Category'].str.strip() if 'Category' in frame else pd.Series('', index=frame.index)
+    auto = ~categories.isin(list(get_category_options()))
+    categories = categories.to_numpy(dtype=object)
+    categories[auto.to_numpy()] = categorizer.categorize(descriptions[auto].tolist())
+    currencies = (frame['Currency'].str.strip().str.upper().replace('', currency)
+                  if 'Currency' in frame else pd.Series(currency, index=frame.index))
+    unknown = ~currencies.isin(load_fx_table().currencies)
+    if unknown.any():
+        row = int(np.flatnonzero(unknown.to_numpy())[0]) + 2
+        raise ValueError(f"Row {row} has currency {currencies[unknown].iloc[0]!r}, which has no exchange rates")
+
+    columns = zip(dates.dt.strftime("%Y-%m-%d").tolist(), categories.tolist(), amounts.abs().round(2).tolist(),
+                  currencies.tolist(), descriptions.tolist(), types.tolist())
+    expenses = [dict(zip(TRANSACTION_COLUMNS, row)) for row in columns]
+    return expenses, int(auto.sum())
@@ -0,0 +1,103 @@
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from core.binary_format import decode_user_data, encode_user_data, is_binary_user_data
+from core.fx import BASE_CURRENCY
+
+UserData = Dict[str, Any]
+
+def get_user_data_path(username: str) -> Path:
+    """Path of a user's local data file"""
+    return Path("user_data") / f"{username}_data.bin"
+
+def get_legacy_data_path(username: str) -> Path:
+    """Path of the JSON data file written by earlier versions"""
+    return Path("user_data") / f"{username}_data.json"
+
+def find_user_data_path(username: str) -> Optional[Path]:
+    """The user's binary data file, else a not yet migrated JSON file, else None"""
+    for file_path in (get_user_data_path(username), get_legacy_data_path(username)):
+        if file_path.exists():
+            return file_path
+    return None
+
+def migrate_user_data(data: UserData) -> UserData:
+    """Fill in keys that older data files may be missing"""
+    migrated = {
+        "expenses": [],
+        "income": 0,
+        "reminders": [],
+        "savings_goals": [],
+        "budgets": {}
+    }
+    migrated.update(data)
+    for expense in migrated["expenses"]:
+        expense["Amount"] = float(expense["Amount"])
+        # Transactions from before multi-currency support were all in the base currency
+        if expense.get("Currency") is None:
+            expense["Currency"] = BASE_CURRENCY
+    return migrated
+
+def read_user_data_file(file_path: Path) -> UserData:
+    """Read a binary or legacy JSON data file"""
+    raw = file_path.read_bytes()
+    if is_binary_user_data(raw):
+        return migrate_user_data(decode_user_data(raw))
+    return migrate_user_data(json.loads(raw))
+
+def _write_atomic(file_path: Path, payload: bytes, fsync: bool = False) -> None:
+    # Write next to the original and swap, so an interrupted write never leaves a partial file
+    tmp_path = file_path.with_name(file_path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(payload)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp_path, file_path)
+    if fsync and hasattr(os, "O_DIRECTORY"):
+        # Make the rename itself survive a power loss
+        directory = os.open(file_path.parent, os.O_DIRECTORY)
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
+
+def _retire_legacy_file(username: str) -> None:
+    legacy_path = get_legacy_data_path(username)
+    if legacy_path.exists():
+        legacy_path.rename(legacy_path.with_name(legacy_path.name + ".migrated"))
+
+def save_local_data(username: str, data: UserData, fsync: bool = False) -> None:
+    """Save user data to local file"""
+    data_dir = Path("user_data")
+    data_dir.mkdir(exist_ok=True)
+    
+    _write_atomic(get_user_data_path(username), encode_user_data(data), fsync)
+
+def load_local_data(username: str) -> UserData:
+    """Load user data from local file, converting a legacy JSON file on first load"""
+    file_path = find_user_data_path(username)
+    if file_path is None:
+        return migrate_user_data({})
+    data = read_user_data_file(file_path)
+    if file_path != get_user_data_path(username):
+        save_local_data(username, data)
+        _retire_legacy_file(username)
+    return data
+
+def maintain_local_data(username: str) -> Tuple[int, int]:
+    """Migrate a user's data file to the current format, returns (bytes before, bytes after)"""
+    file_path = find_user_data_path(username)
+    if file_path is None:
+        raise ValueError(f"No local data for {username}")
+    bytes_before = file_path.stat().st_size
+    save_local_data(username, read_user_data_file(file_path))
+    _retire_legacy_file(username)
+    return bytes_before, get_user_data_path(username).stat().st_size
+
+def init_local_storage() -> None:
+    """Initialize local storage directory"""
+    data_dir = Path("user_data")
+    data_dir.mkdir(exist_ok=True) 
\ No newline at end of file
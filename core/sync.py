@@ -0,0 +1,194 @@
+"""Delta sync of a user's data between devices through a sync server.
+
+Every transaction, reminder and goal carries a record id, income is the
+single record "income" and each category budget is the record "budget:<category>". Each device (replica) keeps a sync state beside its
+data file: its replica id and change counter, the server sequence number it has
+received changes up to, and per record the version vector and a content hash
+as of the last sync. A sync hashes the local records to find what changed,
+sends only those (deletions as tombstones) and receives only what the server
+stored after its cursor, so the traffic is proportional to the changes.
+
+Concurrent edits, where neither version vector covers the other, keep the later
+modification (ties go to the higher replica id) under the merged vector, so
+every device converges on the same record. Transactions carry the time they
+were edited on their device (the ledger's 'Modified' stamp); other records and
+deletions count as modified when they are synced.
+"""
+import hashlib
+import json
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import quote
+from urllib.request import Request, urlopen
+
+from core.storage import UserData, _write_atomic, load_local_data, save_local_data
+
+# The id key of each list of records in the user data
+RECORD_KINDS = {"expenses": "Id", "reminders": "id", "savings_goals": "id"}
+INCOME_RECORD = "income"
+BUDGET_PREFIX = "budget:"
+
+Change = Dict[str, Any]
+SyncState = Dict[str, Any]
+Exchange = Callable[[Dict[str, Any]], Dict[str, Any]]
+
+
+def get_sync_state_path(username: str) -> Path:
+    return Path("user_data") / f"{username}_sync.json"
+
+
+def new_sync_state() -> SyncState:
+    return {"replica": uuid.uuid4().hex, "counter": 0, "cursor": 0, "records": {}}
+
+
+def load_sync_state(username: str) -> SyncState:
+    """The device's sync state for username, a fresh replica if it never synced"""
+    file_path = get_sync_state_path(username)
+    if not file_path.exists():
+        return new_sync_state()
+    return json.loads(file_path.read_text(encoding="utf-8"))
+
+
+def save_sync_state(username: str, state: SyncState) -> None:
+    Path("user_data").mkdir(exist_ok=True)
+    _write_atomic(get_sync_state_path(username), json.dumps(state, separators=(",", ":")).encode("utf-8"))
+
+
+def content_hash(content: Any) -> str:
+    return hashlib.blake2b(json.dumps(content, sort_keys=True, default=str).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def dominates(versions: Dict[str, int], other: Dict[str, int]) -> bool:
+    """Whether versions has seen every change that other has"""
+    return all(versions.get(replica, 0) >= counter for replica, counter in other.items())
+
+
+def merge_versions(versions: Dict[str, int], other: Dict[str, int]) -> Dict[str, int]:
+    return {replica: max(versions.get(replica, 0), other.get(replica, 0)) for replica in versions.keys() | other.keys()}
+
+
+def resolve(stored: Change, incoming: Change) -> Tuple[Change, bool]:
+    """(record to keep, whether the two were concurrent edits) when incoming meets stored"""
+    if dominates(stored["vv"], incoming["vv"]):
+        return stored, False
+    if dominates(incoming["vv"], stored["vv"]):
+        return incoming, False
+    winner = max(stored, incoming, key=lambda change: (change["modified"], change["replica"]))
+    return {**winner, "vv": merge_versions(stored["vv"], incoming["vv"])}, True
+
+
+def local_records(data: UserData) -> Dict[str, Tuple[str, Any]]:
+    """{record id: (kind, content)} of the user data, giving new records an id in place"""
+    records = {INCOME_RECORD: (INCOME_RECORD, data.get("income", 0))}
+    for category, amount in data.get("budgets", {}).items():
+        records[BUDGET_PREFIX + category] = ("budgets", amount)
+    for kind, id_key in RECORD_KINDS.items():
+        for record in data.get(kind, []):
+            if not record.get(id_key):
+                record[id_key] = uuid.uuid4().hex
+            records[record[id_key]] = (kind, {key: value for key, value in record.items() if key != id_key})
+    return records
+
+
+def _apply_changes(data: UserData, changes: List[Change]) -> UserData:
+    """Copy of data with the server's changes applied; new records are appended"""
+    updated = dict(data)
+    for kind, id_key in RECORD_KINDS.items():
+        incoming = {change["id"]: change["data"] for change in changes if change["kind"] == kind}
+        if not incoming:
+            continue
+        records = []
+        for record in data.get(kind, []):
+            if record[id_key] not in incoming:
+                records.append(record)
+                continue
+            content = incoming.pop(record[id_key])
+            if content is not None:
+                records.append({**content, id_key: record[id_key]})
+        records.extend({**content, id_key: record_id} for record_id, content in incoming.items() if content is not None)
+        updated[kind] = records
+    budget_changes = [change for change in changes if change["kind"] == "budgets"]
+    if budget_changes:
+        updated["budgets"] = dict(data.get("budgets", {}))
+        for change in budget_changes:
+            category = change["id"][len(BUDGET_PREFIX):]
+            if change["data"] is None:
+                updated["budgets"].pop(category, None)
+            else:
+                updated["budgets"][category] = change["data"]
+    for change in changes:
+        if change["kind"] == INCOME_RECORD and change["data"] is not None:
+            updated["income"] = change["data"]
+    return updated
+
+
+def sync_user_data(data: UserData, state: SyncState, exchange: Exchange,
+                   now: Optional[float] = None) -> Tuple[UserData, SyncState, Dict[str, int]]:
+    """(synced data, new sync state, counts) after one round trip through exchange.
+
+    The caller saves both only once the data is written, so a failed save can
+    never mark unsaved records as synced.
+    """
+    now = time.time() if now is None else now
+    replica, counter = state["replica"], state["counter"]
+    records = dict(state["records"])
+    changes = []
+
+    def record_change(record_id, kind, content):
+        nonlocal counter
+        counter += 1
+        known = records.get(record_id)
+        versions = {**(known["vv"] if known else {}), replica: counter}
+        records[record_id] = {"kind": kind, "vv": versions, "hash": None if content is None else content_hash(content)}
+        modified = content.get("Modified", now) if isinstance(content, dict) else now
+        changes.append({"id": record_id, "kind": kind, "data": content, "vv": versions,
+                        "modified": modified, "replica": replica})
+
+    current = local_records(data)
+    for record_id, (kind, content) in current.items():
+        known = records.get(record_id)
+        if known is None and kind == INCOME_RECORD and not content:
+            # A device that never synced has the default income, not an edit to send
+            continue
+        if known is None or known["hash"] != content_hash(content):
+            record_change(record_id, kind, content)
+    for record_id, known in list(records.items()):
+        if record_id not in current and known["hash"] is not None:
+            # Deleted here since the last sync; the tombstone stops other devices resurrecting it
+            record_change(record_id, known["kind"], None)
+
+    response = exchange({"replica": replica, "since": state["cursor"], "changes": changes})
+    for change in response["changes"]:
+        records[change["id"]] = {
+            "kind": change["kind"],
+            "vv": change["vv"],
+            "hash": None if change["data"] is None else content_hash(change["data"])
+        }
+
+    new_state = {**state, "counter": counter, "cursor": response["cursor"], "records": records}
+    stats = {"sent": len(changes), "received": len(response["changes"]), "conflicts": len(response["conflicts"])}
+    return _apply_changes(data, response["changes"]), new_state, stats
+
+
+def sync_local_data(username: str, exchange: Exchange) -> Dict[str, int]:
+    """Sync a user's data file, saving the data before the state that marks it synced"""
+    data, state, stats = sync_user_data(load_local_data(username), load_sync_state(username), exchange)
+    save_local_data(username, data)
+    save_sync_state(username, state)
+    stats["transactions"] = len(data["expenses"])
+    return stats
+
+
+def http_exchange(url: str, username: str, timeout: float = 30) -> Exchange:
+    """Exchange function posting to a sync server at url"""
+    endpoint = f"{url.rstrip('/')}/users/{quote(username, safe='')}/sync"
+
+    def exchange(request: Dict[str, Any]) -> Dict[str, Any]:
+        body = json.dumps(request, separators=(",", ":")).encode("utf-8")
+        http_request = Request(endpoint, data=body, headers={"Content-Type": "application/json"}, method="POST")
+        with urlopen(http_request, timeout=timeout) as response:
+            return json.loads(response.read().decode("utf-8"))
+
+    return exchange
@@ -0,0 +1,159 @@
+"""Local stand-in for the sync server, usable from tests or on a home network.
+
+    python -m core.sync_server --port 8765 --data sync_server_data
+
+POST /users/<username>/sync takes {"replica", "since", "changes"} and returns
+{"cursor", "changes", "conflicts"}: the records stored after `since`, other
+than those this request wrote unchanged. There is no authentication.
+"""
+import argparse
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Optional
+from urllib.parse import unquote
+
+from core.sync import resolve
+
+
+class SyncStore:
+    """Every user's records, each stamped with the sequence number of its last change.
+
+    Records are kept in sequence order, so answering `since` walks only the
+    newer ones. With a directory, every stored change is appended to a
+    per-user log that is replayed on start.
+    """
+
+    def __init__(self, directory: Optional[Path] = None) -> None:
+        self.directory = Path(directory) if directory else None
+        self._users: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _log_path(self, username: str) -> Path:
+        return self.directory / f"{username}.log"
+
+    def _user(self, username: str) -> Dict[str, Any]:
+        user = self._users.get(username)
+        if user is None:
+            user = self._users[username] = {"seq": 0, "records": {}}
+            if self.directory and self._log_path(username).exists():
+                with open(self._log_path(username), encoding="utf-8") as log:
+                    for line in log:
+                        self._store(user, json.loads(line))
+        return user
+
+    @staticmethod
+    def _store(user: Dict[str, Any], record: Dict[str, Any]) -> None:
+        # Re-inserting moves the record to the end, keeping sequence order
+        user["records"].pop(record["id"], None)
+        user["records"][record["id"]] = record
+        user["seq"] = record["seq"]
+
+    def exchange(self, username: str, request: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            user = self._user(username)
+            written, conflicts, stored_changes = set(), [], []
+            for change in request["changes"]:
+                stored = user["records"].get(change["id"])
+                keep, conflict = (change, False) if stored is None else resolve(stored, change)
+                if conflict:
+                    conflicts.append(change["id"])
+                if keep is stored:
+                    continue
+                record = {**keep, "seq": user["seq"] + 1}
+                self._store(user, record)
+                stored_changes.append(record)
+                if keep is change:
+                    written.add(change["id"])
+            if self.directory and stored_changes:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                with open(self._log_path(username), "a", encoding="utf-8") as log:
+                    log.writelines(json.dumps(record, separators=(",", ":")) + "\n" for record in stored_changes)
+
+            changes = []
+            for record in reversed(user["records"].values()):
+                if record["seq"] <= request["since"]:
+                    break
+                if record["id"] not in written:
+                    changes.append({key: value for key, value in record.items() if key != "seq"})
+            changes.reverse()
+            return {"cursor": user["seq"], "changes": changes, "conflicts": conflicts}
+
+
+class _SyncRequestHandler(BaseHTTPRequestHandler):
+    store: SyncStore
+
+    def do_POST(self) -> None:
+        parts = self.path.strip("/").split("/")
+        if len(parts) != 3 or parts[0] != "users" or parts[2] != "sync":
+            self.send_error(404)
+            return
+        username = unquote(parts[1])
+        if not username or username.startswith(".") or "/" in username or "\\" in username:
+            # Usernames name the log files, so nothing that could leave the directory
+            self.send_error(400, "Invalid username")
+            return
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            response = self.store.exchange(username, request)
+        except (ValueError, KeyError, TypeError) as error:
+            self.send_error(400, str(error))
+            return
+        body = json.dumps(response, separators=(",", ":")).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+class SyncServer:
+    """A SyncStore served over HTTP from a background thread; port 0 picks a free port"""
+
+    def __init__(self, store: Optional[SyncStore] = None, host: str = "127.0.0.1", port: int = 0) -> None:
+        self.store = store or SyncStore()
+        handler = type("SyncRequestHandler", (_SyncRequestHandler,), {"store": self.store})
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "SyncServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="sync-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        self._server.serve_forever()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "SyncServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Local sync server for Smart Money Manager")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--data", default="sync_server_data", help="directory for the per-user change logs")
+    args = parser.parse_args(argv)
+    server = SyncServer(SyncStore(Path(args.data)), args.host, args.port)
+    print(f"Sync server listening on {server.url}", flush=True)
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import heapq
+
+from core.fx import expense_rows, expense_to_cents, load_fx_table
+from core.ledger import build_transaction_frame
+from core.row_ids import RowIds
+
+
+class TopExpenses:
+    """Largest expenses overall, per month, per category and per (month, category).
+
+    Each group is a max-heap with lazy deletion: edits and deletes only retire the
+    row's current version, and stale heap entries are dropped when a query reaches
+    them or when they make up more than half of a heap. Versions come from one
+    counter so a reused row id never revives an old entry. Expenses are ranked
+    by their base-currency cents and returned as entered, read from the ledger's
+    list, which the index keeps a reference to.
+    """
+
+    def __init__(self, expenses=()):
+        self._expenses = expenses
+        self._fx = load_fx_table()
+        self._heaps = {}
+        self._stale = {}
+        self._rows = {}
+        self._versions = {}
+        self._clock = 0
+        self._ids = RowIds(self._renumber_rows)
+        # Convert everything already in the ledger in one vectorized call, from the transactions frame
+        for spent, month, category, cents in expense_rows(build_transaction_frame(expenses), self._fx):
+            row_id = self._ids.append()
+            if spent:
+                self._include(row_id, month, category, cents)
+
+    @staticmethod
+    def _group_keys(month, category):
+        return [(None, None), (month, None), (None, category), (month, category)]
+
+    def _include_expense(self, row_id, expense):
+        if expense['Type'] == 'Expense':
+            self._include(row_id, expense['Date'][:7], expense['Category'], expense_to_cents(expense, self._fx))
+
+    def _include(self, row_id, month, category, cents):
+        self._clock += 1
+        self._versions[row_id] = self._clock
+        self._rows[row_id] = (month, category)
+        entry = (-cents, row_id, self._clock)
+        for key in self._group_keys(month, category):
+            heapq.heappush(self._heaps.setdefault(key, []), entry)
+
+    def _exclude(self, row_id):
+        group = self._rows.pop(row_id, None)
+        if group is None:
+            return
+        del self._versions[row_id]
+        for key in self._group_keys(*group):
+            self._stale[key] = self._stale.get(key, 0) + 1
+            if self._stale[key] > len(self._heaps[key]) // 2 + 16:
+                self._compact(key)
+
+    def _renumber_rows(self, mapping):
+        # Stale entries are dropped on the way, as their row ids may no longer exist
+        for key, heap in self._heaps.items():
+            live = [(amount, mapping[row_id], version) for amount, row_id, version in heap
+                    if self._versions.get(row_id) == version]
+            heapq.heapify(live)
+            self._heaps[key] = live
+            self._stale[key] = 0
+        self._rows = {mapping[row_id]: group for row_id, group in self._rows.items()}
+        self._versions = {mapping[row_id]: version for row_id, version in self._versions.items()}
+
+    def _is_live(self, entry):
+        _, row_id, version = entry
+        return self._versions.get(row_id) == version
+
+    def _compact(self, key):
+        live = [entry for entry in self._heaps[key] if self._is_live(entry)]
+        heapq.heapify(live)
+        if live:
+            self._heaps[key] = live
+        else:
+            del self._heaps[key]
+        self._stale[key] = 0
+
+    def add(self, expense):
+        """Track a transaction appended to the ledger"""
+        self._include_expense(self._ids.append(), expense)
+
+    def insert(self, index, expense):
+        """Track a transaction put back at position index"""
+        self._include_expense(self._ids.insert(index), expense)
+
+    def update(self, index, old_expense, new_expense):
+        """Replace the transaction at position index"""
+        row_id = self._ids[index]
+        self._exclude(row_id)
+        self._include_expense(row_id, new_expense)
+
+    def remove(self, index, expense):
+        """Drop the transaction at position index"""
+        self._exclude(self._ids.pop(index))
+
+    def top(self, k=3, month=None, category=None):
+        """The k largest expenses, optionally limited to a 'YYYY-MM' month and/or category.
+
+        Returns (ledger position, expense) pairs, largest first.
+        """
+        key = (month, category)
+        heap = self._heaps.get(key)
+        if not heap:
+            return []
+        taken = []
+        while heap and len(taken) < k:
+            entry = heapq.heappop(heap)
+            if self._is_live(entry):
+                taken.append(entry)
+            else:
+                self._stale[key] = max(self._stale.get(key, 0) - 1, 0)
+        for entry in taken:
+            heapq.heappush(heap, entry)
+        positions = [self._ids.position(row_id) for _, row_id, _ in taken]
+        return [(position, self._expenses[position]) for position in positions]
@@ -0,0 +1,87 @@
+import atexit
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from core.storage import UserData, save_local_data
+
+logger = logging.getLogger(__name__)
+
+
+def snapshot_user_data(expenses, income, reminders, savings_goals, budgets) -> UserData:
+    """Copy of the user's data that later in-place edits cannot change.
+
+    Transactions are replaced rather than modified by the ledger, so copying the
+    list is enough, and a mapped list copies itself without decoding its rows;
+    reminders and goals are edited in place and are copied too.
+    """
+    snapshot = getattr(expenses, "snapshot", None)
+    return {
+        "expenses": snapshot() if snapshot is not None else list(expenses),
+        "income": income,
+        "reminders": [dict(reminder) for reminder in reminders],
+        "savings_goals": [dict(goal) for goal in savings_goals],
+        "budgets": dict(budgets)
+    }
+
+
+class WriteBehindSaver:
+    """Coalesces each user's saves into at most one write per flush interval.
+
+    save() only records the newest snapshot for the user and a daemon thread
+    writes whatever is pending every flush_interval seconds. flush() writes
+    immediately; it is called on logout and at interpreter exit, so only a hard
+    crash can lose changes, and then at most flush_interval seconds of them.
+    A flush_interval of 0 writes every save synchronously.
+    """
+
+    def __init__(self, write: Callable[[str, UserData], None] = save_local_data, flush_interval: float = 2.0) -> None:
+        self._write = write
+        self.flush_interval = flush_interval
+        self._pending: Dict[str, UserData] = {}
+        self._lock = threading.Lock()
+        # Held for a whole flush so an older snapshot can never land after a newer one
+        self._write_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.writes = 0
+        self.saves = 0
+        atexit.register(self.flush)
+
+    def save(self, username: str, data: UserData) -> None:
+        self.saves += 1
+        if self.flush_interval <= 0:
+            self._write(username, data)
+            self.writes += 1
+            return
+        with self._lock:
+            self._pending[username] = data
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="write-behind-flusher", daemon=True)
+                self._thread.start()
+
+    def pending(self, username: str) -> bool:
+        return username in self._pending
+
+    def flush(self, username: Optional[str] = None) -> None:
+        """Write pending data now, for one user or for everyone"""
+        with self._write_lock:
+            with self._lock:
+                if username is None:
+                    batch, self._pending = self._pending, {}
+                else:
+                    batch = {username: self._pending.pop(username)} if username in self._pending else {}
+            for name, data in batch.items():
+                try:
+                    self._write(name, data)
+                    self.writes += 1
+                except Exception:
+                    logger.exception("Saving data for %s failed, will retry", name)
+                    with self._lock:
+                        # Keep it queued unless a newer snapshot arrived meanwhile
+                        self._pending.setdefault(name, data)
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
@@ -0,0 +1,234 @@
+"""Streaming XLSX export of a user's data.
+
+Each sheet is written row by row straight into its zip entry, so memory use
+does not grow with the number of transactions: strings are stored inline
+rather than in a shared-string table and nothing is buffered per sheet.
+"""
+import numbers
+import re
+import zipfile
+from datetime import date
+from typing import Any, Iterable, List, Optional, Sequence
+from xml.sax.saxutils import escape
+
+import numpy as np
+import pandas as pd
+
+from core.analytics import calculate_monthly_trends, get_category_analysis
+from core.fx import BASE_CURRENCY, convert_frame, load_fx_table
+from core.goals import goal_progress
+from core.ledger import build_transaction_frame
+
+# Cell styles, as indexes into the cellXfs of _STYLES
+_DATE_STYLE, _MONEY_STYLE, _HEADER_STYLE, _PERCENT_STYLE = 1, 2, 3, 4
+_STYLE_OF_FORMAT = {'date': _DATE_STYLE, 'money': _MONEY_STYLE, 'percent': _PERCENT_STYLE}
+_EXCEL_EPOCH = date(1899, 12, 30).toordinal()
+# Characters XML 1.0 does not allow, even escaped
+_INVALID_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="5"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="4" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>'
+    '<xf numFmtId="10" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+
+def _column_letter(number: int) -> str:
+    letters = ""
+    while number:
+        number, remainder = divmod(number - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def _cell(reference: str, value: Any, style: Optional[int]) -> str:
+    if value is None or value != value:
+        return ""
+    if style == _DATE_STYLE:
+        day = date.fromisoformat(value) if isinstance(value, str) else value
+        return f'<c r="{reference}" s="{style}"><v>{day.toordinal() - _EXCEL_EPOCH}</v></c>'
+    if isinstance(value, (bool, np.bool_)):
+        return f'<c r="{reference}" t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, numbers.Real):
+        number = int(value) if isinstance(value, numbers.Integral) else float(value)
+        style_attribute = f' s="{style}"' if style else ""
+        return f'<c r="{reference}"{style_attribute}><v>{number!r}</v></c>'
+    text = escape(_INVALID_XML.sub("", str(value)))
+    style_attribute = f' s="{style}"' if style else ""
+    return f'<c r="{reference}" t="inlineStr"{style_attribute}><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+class StreamingXlsxWriter:
+    """Write-only XLSX workbook whose sheets are streamed into the archive one at a time"""
+
+    def __init__(self, target) -> None:
+        self._zip = zipfile.ZipFile(target, "w", zipfile.ZIP_DEFLATED)
+        self._sheets: List[str] = []
+
+    def write_sheet(self, name: str, header: Sequence[str], rows: Iterable[Sequence[Any]],
+                    formats: Sequence[Optional[str]] = (), widths: Sequence[float] = ()) -> int:
+        """Write a sheet from an iterable of rows, returns the number of data rows"""
+        self._sheets.append(name[:31])
+        letters = [_column_letter(number) for number in range(1, len(header) + 1)]
+        styles = [_STYLE_OF_FORMAT.get(fmt) for fmt in formats] + [None] * (len(header) - len(formats))
+        count = 0
+        with self._zip.open(f"xl/worksheets/sheet{len(self._sheets)}.xml", "w") as part:
+            part.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                b'<sheetViews><sheetView workbookViewId="0"><pane ySplit="1" topLeftCell="A2" '
+                b'activePane="bottomLeft" state="frozen"/></sheetView></sheetViews>'
+            )
+            if widths:
+                part.write(("<cols>" + "".join(
+                    f'<col min="{number}" max="{number}" width="{width}" customWidth="1"/>'
+                    for number, width in enumerate(widths, start=1)
+                ) + "</cols>").encode("utf-8"))
+            part.write(b"<sheetData>")
+            part.write(('<row r="1">' + "".join(
+                _cell(f"{letter}1", title, _HEADER_STYLE) for letter, title in zip(letters, header)
+            ) + "</row>").encode("utf-8"))
+            for count, row in enumerate(rows, start=1):
+                number = count + 1
+                part.write((f'<row r="{number}">' + "".join(
+                    _cell(f"{letter}{number}", value, style) for letter, value, style in zip(letters, row, styles)
+                ) + "</row>").encode("utf-8"))
+            part.write(b"</sheetData></worksheet>")
+        return count
+
+    def close(self) -> None:
+        sheets = range(1, len(self._sheets) + 1)
+        self._zip.writestr("[Content_Types].xml", (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            '<Override PartName="/xl/styles.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+            + "".join(f'<Override PartName="/xl/worksheets/sheet{number}.xml" '
+                      'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+                      for number in sheets)
+            + '</Types>'
+        ))
+        self._zip.writestr("_rels/.rels", (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" Target="xl/workbook.xml" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+            '</Relationships>'
+        ))
+        self._zip.writestr("xl/workbook.xml", (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"><sheets>'
+            + "".join(f'<sheet name="{escape(name, {chr(34): "&quot;"})}" sheetId="{number}" r:id="rId{number}"/>'
+                      for number, name in zip(sheets, self._sheets))
+            + '</sheets></workbook>'
+        ))
+        self._zip.writestr("xl/_rels/workbook.xml.rels", (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            + "".join(f'<Relationship Id="rId{number}" Target="worksheets/sheet{number}.xml" '
+                      'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"/>'
+                      for number in sheets)
+            + f'<Relationship Id="rId{len(self._sheets) + 1}" Target="styles.xml" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles"/>'
+            '</Relationships>'
+        ))
+        self._zip.writestr("xl/styles.xml", _STYLES)
+        self._zip.close()
+
+    def __enter__(self) -> "StreamingXlsxWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def write_workbook(target, expenses: Iterable[dict], summary_frame: pd.DataFrame, reminders: List[dict],
+                   savings_goals: List[dict], currency: str = BASE_CURRENCY) -> None:
+    """Write the export sheets to target, a path or binary file.
+
+    expenses is any iterable of transaction dicts and is consumed once;
+    summary_frame is anything calculate_monthly_trends accepts with Cents in
+    currency, such as the transactions frame or a monthly rollup.
+    """
+    with StreamingXlsxWriter(target) as workbook:
+        workbook.write_sheet(
+            "Transactions",
+            ["Date", "Type", "Category", "Amount", "Currency", "Description"],
+            ((expense['Date'], expense['Type'], expense['Category'], expense['Amount'],
+              expense.get('Currency', BASE_CURRENCY), expense['Description']) for expense in expenses),
+            formats=['date', None, None, 'money'],
+            widths=[12, 18, 16, 14, 10, 40]
+        )
+
+        trends = calculate_monthly_trends(summary_frame)
+        workbook.write_sheet(
+            "Monthly Trends",
+            ["Month", f"Expenses ({currency})", f"Additional Income ({currency})", f"Net ({currency})"],
+            ((month, row['Expense'], row['Additional Income'], round(row['Additional Income'] - row['Expense'], 2))
+             for month, row in trends.iterrows()),
+            formats=[None, 'money', 'money', 'money'],
+            widths=[10, 18, 24, 16]
+        )
+
+        expenses_only = summary_frame[summary_frame['Type'] == 'Expense'] if not summary_frame.empty else summary_frame
+        categories = get_category_analysis(expenses_only).sort_values(ascending=False)
+        category_total = categories.sum()
+        workbook.write_sheet(
+            "Category Breakdown",
+            ["Category", f"Amount ({currency})", "Share"],
+            ((category, amount, amount / category_total if category_total else 0.0)
+             for category, amount in categories.items()),
+            formats=[None, 'money', 'percent'],
+            widths=[18, 16, 10]
+        )
+
+        workbook.write_sheet(
+            "Reminders",
+            ["Date", "Note", f"Amount ({BASE_CURRENCY})", "Completed"],
+            ((reminder['date'], reminder['note'], reminder['amount'], reminder.get('completed', False))
+             for reminder in reminders),
+            formats=['date', None, 'money'],
+            widths=[12, 30, 16, 12]
+        )
+
+        workbook.write_sheet(
+            "Savings Goals",
+            ["Goal", f"Target ({BASE_CURRENCY})", f"Saved ({BASE_CURRENCY})", "Progress", "Target Date"],
+            ((goal['name'], goal['target_amount'], goal['current_amount'], goal_progress(goal), goal['target_date'])
+             for goal in savings_goals),
+            formats=[None, 'money', 'money', 'percent', 'date'],
+            widths=[24, 16, 16, 10, 12]
+        )
+
+
+def export_user_workbook(target, data: dict, currency: str = BASE_CURRENCY) -> None:
+    """Export user data as returned by open_user_data or load_local_data.
+
+    A mapped ledger is streamed page by page and its summaries come from the
+    file's monthly rollup when that is already in currency, so no transactions
+    frame is built.
+    """
+    expenses = data["expenses"]
+    rollup_frame = getattr(expenses, 'rollup_frame', None)
+    summary = rollup_frame() if rollup_frame is not None else None
+    if summary is None or not (summary['Currency'] == currency).all():
+        summary = convert_frame(build_transaction_frame(expenses), load_fx_table(), currency)
+    rows = expenses.stream() if hasattr(expenses, 'stream') else expenses
+    write_workbook(target, rows, summary, data["reminders"], data["savings_goals"], currency)
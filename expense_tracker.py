@@ -1,18 +1,43 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from datetime import datetime, timedelta
+from datetime import datetime
 import base64
-from fpdf import FPDF
+import io
 import os
+from functools import partial, wraps
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
-from users import init_users, create_user, authenticate
-from local_storage import save_local_data, load_local_data, init_local_storage
+from users import init_users, create_user, authenticate, get_offline_users, get_user_groups, get_group_invitations, get_pending_members, create_group, respond_to_invitation, get_storage_settings, get_sync_settings, get_session_settings
+from core import goals, reminders
+from core.analytics import calculate_monthly_trends, calculate_totals, get_category_analysis, savings_rate
+from core.ledger import Ledger, TRANSACTION_COLUMNS, get_transaction_types, get_category_options
+from core.storage import save_local_data, init_local_storage
+from core.mapped_data import open_user_data
+from core.search_index import SearchIndex
+from core.filter_index import FilterIndex
+from core.spending_monitor import SpendingMonitor
+from core.budgets import ALERT_THRESHOLDS, BudgetTracker, set_budget
+from core.categorizer import load_categorizer, save_categorizer_data
+from core.cube import DIMENSIONS, HIERARCHY, MEASURES, AnalyticsCube
+from core.statement_import import read_statement
+from core.top_expenses import TopExpenses
+from core.household import load_household_rollup
+from core.write_behind import WriteBehindSaver, snapshot_user_data
+from core.session_memory import CACHE_KEYS, LEDGER_KEYS, SessionRegistry, session_usage
+from core.sync import http_exchange, load_sync_state, save_sync_state, sync_user_data
+from core.fx import BASE_CURRENCY, convert_frame, currency_symbol, load_fx_table
+from core.reports import build_pdf_report
+from core.xlsx_export import write_workbook
+from core.forecasting import calculate_monthly_category_trends, forecast_cash_flow, project_cash_flow, projected_month_end_balance, totals_by_type
 import plotly.graph_objects as go
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# Transactions shown per page of the editor; only that page's rows are rendered
+EDITOR_PAGE_SIZE = 50
 
 # Check if requirements.txt exists, if not create one
 if not os.path.exists('requirements.txt'):
@@ -26,24 +51,6 @@ pyyaml>=6.0
 bcrypt>=3.2.0
 """)
 
-# Helper functions
-def get_transaction_types():
-    return ["Expense", "Additional Income"]
-
-def get_category_options():
-    return {
-        "Food": "🍔 Food",
-        "Transportation": "🚗 Transportation",
-        "Rent": "🏠 Rent",
-        "Bills": "💡 Bills",
-        "Entertainment": "🎮 Entertainment",
-        "Shopping": "🛍️ Shopping",
-        "Healthcare": "🏥 Healthcare",
-        "Education": "📚 Education",
-        "Salary": "💰 Salary",
-        "Other": "📦 Other"
-    }
-
 # Page configuration
 st.set_page_config(
     page_title="Income & Expense Tracker",
@@ -281,72 +288,52 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Helper Functions
+# Business logic lives in the core package; these wrappers bind it to the session and persist.
 def set_category_budget(category, amount):
-    st.session_state.budgets[category] = amount
+    set_budget(st.session_state.budgets, category, amount)
     save_current_state()
 
 def add_reminder(date, note, amount):
-    st.session_state.reminders.append({
-        'date': date.strftime("%Y-%m-%d"),
-        'note': note,
-        'amount': amount,
-        'completed': False
-    })
+    reminders.add_reminder(st.session_state.reminders, date, note, amount)
     save_current_state()
 
 def add_savings_goal(name, target_amount, target_date):
-    st.session_state.savings_goals.append({
-        'name': name,
-        'target_amount': target_amount,
-        'target_date': target_date.strftime("%Y-%m-%d"),
-        'current_amount': 0.0
-    })
+    goals.add_savings_goal(st.session_state.savings_goals, name, target_amount, target_date)
     save_current_state()
 
-def calculate_monthly_trends(df):
-    if not df.empty:
-        df['Date'] = pd.to_datetime(df['Date'])
-        # Create a month-year string for better grouping
-        df['Month'] = df['Date'].dt.strftime('%Y-%m')
-        # Group by month and type, then pivot
-        monthly = df.groupby(['Month', 'Type'])['Amount'].sum().reset_index()
-        # Convert to wide format
-        monthly_wide = monthly.pivot(index='Month', columns='Type', values='Amount').fillna(0)
-        # Ensure both columns exist
-        if 'Expense' not in monthly_wide.columns:
-            monthly_wide['Expense'] = 0
-        if 'Additional Income' not in monthly_wide.columns:
-            monthly_wide['Additional Income'] = 0
-        return monthly_wide
-    return pd.DataFrame(columns=['Expense', 'Additional Income'])
-
-def get_category_analysis(df):
-    if not df.empty:
-        return df[df['Type'] == 'Expense'].groupby('Category')['Amount'].sum()
-    return pd.Series()
-
 def update_savings_goal(goal_name, amount):
-    for goal in st.session_state.savings_goals:
-        if goal['name'] == goal_name:
-            goal['current_amount'] += amount
-            save_current_state()
-            return True
+    if goals.update_savings_goal(st.session_state.savings_goals, goal_name, amount):
+        save_current_state()
+        return True
     return False
 
 def delete_reminder(index):
-    if 0 <= index < len(st.session_state.reminders):
-        st.session_state.reminders.pop(index)
+    if reminders.delete_reminder(st.session_state.reminders, index):
         save_current_state()
         return True
     return False
 
 def mark_reminder_complete(index):
-    if 0 <= index < len(st.session_state.reminders):
-        st.session_state.reminders[index]['completed'] = True
+    if reminders.mark_reminder_complete(st.session_state.reminders, index):
         save_current_state()
         return True
     return False
 
+@st.cache_resource
+def get_session_registry():
+    # One memory registry per server process, shared by every session
+    settings = get_session_settings()
+    return SessionRegistry(settings['memory_budget_mb'] * 2 ** 20, settings['idle_minutes'] * 60)
+
+def touch_session():
+    # Marks the session active; waits out an eviction of this session that is in progress
+    ctx = get_script_run_ctx()
+    if ctx is not None:
+        get_session_registry().touch(ctx.session_id)
+
+# Before anything reads the session state, so an idle session is never evicted mid-run
+touch_session()
+
 # Initialize session state
 if 'expenses' not in st.session_state:
     st.session_state.expenses = []
@@ -356,10 +343,18 @@ if 'reminders' not in st.session_state:
     st.session_state.reminders = []
 if 'savings_goals' not in st.session_state:
     st.session_state.savings_goals = []
+if 'budgets' not in st.session_state:
+    st.session_state.budgets = {}
 if 'logged_in' not in st.session_state:
     st.session_state['logged_in'] = False
 if 'counter' not in st.session_state:
     st.session_state.counter = 0
+if 'forecast_state' not in st.session_state:
+    st.session_state.forecast_state = None
+if 'ledger' not in st.session_state:
+    st.session_state.ledger = Ledger(st.session_state.expenses)
+if 'reporting_currency' not in st.session_state:
+    st.session_state.reporting_currency = BASE_CURRENCY
 
 # Initialize users config
 init_users()
@@ -367,116 +362,219 @@ init_users()
 # Initialize local storage
 init_local_storage()
 
+@st.cache_resource
+def get_saver():
+    # One write-behind saver per server process, shared by every session
+    settings = get_storage_settings()
+    return WriteBehindSaver(partial(save_local_data, fsync=settings['fsync']), settings['flush_interval'])
+
+@st.cache_resource
+def get_rules_saver():
+    # Learned merchants change with most hand-categorized transactions, so they are written behind too
+    return WriteBehindSaver(save_categorizer_data, get_storage_settings()['flush_interval'])
+
 def save_current_state():
     if 'username' in st.session_state:
-        user_data = {
-            "expenses": st.session_state.expenses,
-            "income": st.session_state.income,
-            "reminders": st.session_state.reminders,
-            "savings_goals": st.session_state.savings_goals
-        }
-        save_local_data(st.session_state['username'], user_data)
-
-def add_expense(date, category, amount, description, transaction_type):
-    st.session_state.expenses.append({
-        'Date': date.strftime("%Y-%m-%d"),
-        'Category': category,
-        'Amount': amount,
-        'Description': description,
-        'Type': transaction_type
-    })
+        user_data = snapshot_user_data(
+            st.session_state.expenses,
+            st.session_state.income,
+            st.session_state.reminders,
+            st.session_state.savings_goals,
+            st.session_state.budgets
+        )
+        get_saver().save(st.session_state['username'], user_data)
+
+def load_session_data(username):
+    # Load user's local data, including changes another session has not written yet
+    get_saver().flush(username)
+    replace_session_data(open_user_data(username))
+
+def replace_session_data(user_data):
+    # Everything derived from the previous data is dropped; undo history does not carry over
+    st.session_state.expenses = user_data["expenses"]
+    st.session_state.income = user_data["income"]
+    st.session_state.reminders = user_data["reminders"]
+    st.session_state.savings_goals = user_data["savings_goals"]
+    st.session_state.budgets = user_data["budgets"]
+    st.session_state.ledger = Ledger(st.session_state.expenses)
+    st.session_state.forecast_state = None
+    st.session_state.evicted = False
+    st.session_state.pop('categorizer', None)
+
+def reload_if_evicted():
+    # The ledger of a session evicted while idle comes back from disk; undo history does not
+    if st.session_state.get('evicted') and st.session_state.get('logged_in'):
+        load_session_data(st.session_state['username'])
+
+def evict_session(state):
+    # Runs in another session's rerun, for a session idle past the limit: its changes are written
+    # out first, then its ledger, caches and row edit flags are dropped until it comes back
+    username = state['username']
+    get_saver().flush(username)
+    if get_saver().pending(username):
+        return False
+    for key in [key for key in state if key in LEDGER_KEYS or key in CACHE_KEYS or key.startswith('edit_mode_')]:
+        del state[key]
+    state['evicted'] = True
+    return True
+
+def account_session_memory():
+    # Measure this session every few seconds at most, then evict idle sessions while over budget
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return
+    registry = get_session_registry()
+    if registry.needs_measuring(ctx.session_id):
+        # The SessionState outlives each run's thread-safe wrapper, so that is what gets registered
+        registry.record(ctx.session_id, st.session_state['username'], ctx.session_state._state,
+                        session_usage(st.session_state.to_dict()))
+    registry.evict_idle(evict_session, exclude=ctx.session_id)
+
+def session_fragment(render):
+    # Fragment reruns skip the top of the script, so they mark activity and reload an evicted ledger themselves
+    @wraps(render)
+    def rerun_fragment(*args, **kwargs):
+        touch_session()
+        reload_if_evicted()
+        return render(*args, **kwargs)
+    return st.fragment(rerun_fragment)
+
+reload_if_evicted()
+
+def get_search_index():
+    return st.session_state.ledger.index('search', SearchIndex)
+
+def get_filter_index():
+    return st.session_state.ledger.index('filter', FilterIndex)
+
+def get_spending_monitor():
+    return st.session_state.ledger.index('spending', SpendingMonitor)
+
+def get_top_expenses():
+    return st.session_state.ledger.index('top_expenses', TopExpenses)
+
+def get_budget_tracker():
+    return st.session_state.ledger.index('budgets', BudgetTracker)
+
+def get_analytics_cube(currency):
+    # A single cube kept current by the ledger, rebuilt when the reporting currency or rates change
+    ledger = st.session_state.ledger
+    cube = ledger.index('cube', partial(AnalyticsCube, currency=currency))
+    if cube.currency != currency or cube.fx_version != load_fx_table().version:
+        ledger.drop_index('cube')
+        cube = ledger.index('cube', partial(AnalyticsCube, currency=currency))
+    return cube
+
+def get_categorizer():
+    # Loaded on first use after login, including changes another session has not written yet
+    if 'categorizer' not in st.session_state:
+        get_rules_saver().flush(st.session_state['username'])
+        st.session_state.categorizer = load_categorizer(st.session_state['username'])
+    return st.session_state.categorizer
+
+def save_categorizer_state():
+    get_rules_saver().save(st.session_state['username'], get_categorizer().to_dict())
+
+def learn_category(description, category):
+    # A category picked by hand teaches the merchant cache; only a new or changed merchant is saved
+    if get_categorizer().learn(description, category):
+        save_categorizer_state()
+
+def import_transactions(expenses):
+    # One undo step for the whole statement; nothing is added or saved if any transaction is rejected
+    st.session_state.ledger.extend(expenses)
     save_current_state()
 
+def add_expense(date, category, amount, description, transaction_type, currency=BASE_CURRENCY):
+    # Returns the budget alert the new transaction raised, if any
+    expense = st.session_state.ledger.add(date, category, amount, description, transaction_type, currency)
+    save_current_state()
+    return get_budget_tracker().alert(st.session_state.budgets, expense)
+
 def get_csv_download_link(df):
     csv = df.to_csv(index=False)
     b64 = base64.b64encode(csv.encode()).decode()
     href = f'<a href="data:file/csv;base64,{b64}" download="expense_report.csv">Download CSV Report</a>'
     return href
 
-def create_pdf_report(df, total_income, total_expenses, remaining_balance):
-    pdf = FPDF()
-    pdf.add_page()
-    
-    # Calculate total savings
-    total_savings = sum(goal['current_amount'] for goal in st.session_state.savings_goals)
-    
-    # Set font
-    pdf.set_font('Arial', 'B', 16)
-    pdf.cell(0, 10, 'Financial Report', 0, 1, 'C')
-    pdf.ln(10)
-    
-    # Add Summary Section
-    pdf.set_font('Arial', 'B', 14)
-    pdf.cell(0, 10, 'Financial Summary', 0, 1, 'L')
-    pdf.ln(5)
-    
-    # Summary details
-    pdf.set_font('Arial', '', 12)
-    pdf.cell(0, 8, f'Total Income: Rs. {total_income:.2f}', 0, 1)
-    pdf.cell(0, 8, f'Total Expenses: Rs. {total_expenses:.2f}', 0, 1)
-    pdf.cell(0, 8, f'Balance: Rs. {remaining_balance:.2f}', 0, 1)
-    pdf.cell(0, 8, f'Total Savings: Rs. {total_savings:.2f}', 0, 1)
-    pdf.ln(10)
-    
-    # Add Savings Goals Section
-    if st.session_state.savings_goals:
-        pdf.set_font('Arial', 'B', 14)
-        pdf.cell(0, 10, 'Savings Goals', 0, 1, 'L')
-        pdf.ln(5)
-        
-        pdf.set_font('Arial', '', 12)
-        for goal in st.session_state.savings_goals:
-            progress = (goal['current_amount'] / goal['target_amount'] * 100) if goal['target_amount'] > 0 else 0
-            pdf.cell(0, 8, f"Goal: {goal['name']}", 0, 1)
-            pdf.cell(0, 8, f"Target: Rs. {goal['target_amount']:.2f}", 0, 1)
-            pdf.cell(0, 8, f"Saved: Rs. {goal['current_amount']:.2f}", 0, 1)
-            pdf.cell(0, 8, f"Progress: {progress:.1f}%", 0, 1)
-            pdf.cell(0, 8, f"Due Date: {goal['target_date']}", 0, 1)
-            pdf.ln(5)
-        pdf.ln(10)
-    
-    # Add Transaction History
-    if not df.empty:
-        pdf.set_font('Arial', 'B', 14)
-        pdf.cell(0, 10, 'Transaction History', 0, 1, 'L')
-        pdf.ln(5)
-        
-        # Table header
-        pdf.set_font('Arial', 'B', 12)
-        pdf.cell(30, 10, 'Date', 1)
-        pdf.cell(30, 10, 'Type', 1)
-        pdf.cell(40, 10, 'Category', 1)
-        pdf.cell(50, 10, 'Amount', 1)
-        pdf.cell(40, 10, 'Description', 1)
-        pdf.ln()
-        
-        # Table content
-        pdf.set_font('Arial', '', 12)
-        for _, row in df.iterrows():
-            pdf.cell(30, 10, str(row['Date']), 1)
-            pdf.cell(30, 10, str(row['Type']), 1)
-            pdf.cell(40, 10, str(row['Category']), 1)
-            pdf.cell(50, 10, f"Rs. {row['Amount']:.2f}", 1)
-            pdf.cell(40, 10, str(row['Description']), 1)
-            pdf.ln()
-    
-    # Save the PDF
-    pdf_path = "financial_report.pdf"
-    pdf.output(pdf_path)
-    return pdf_path
+def create_pdf_report(df, total_income, total_expenses, remaining_balance, currency=BASE_CURRENCY, months=None):
+    monitor = get_spending_monitor()
+    return build_pdf_report(
+        df, total_income, total_expenses, remaining_balance,
+        st.session_state.savings_goals,
+        currency=currency,
+        months=months,
+        unusual=monitor.unusual_transactions(limit=10),
+        spikes=monitor.category_spikes(datetime.now().strftime("%Y-%m"))
+    )
+
+def create_excel_report(df, currency=BASE_CURRENCY):
+    # Transactions are written straight from the ledger rows of df; the summary sheets reuse
+    # the converted frame, so no second frame is built for the workbook
+    expenses = st.session_state.ledger.expenses
+    output = io.BytesIO()
+    write_workbook(output, (expenses[position] for position in df.index), df,
+                   st.session_state.reminders, st.session_state.savings_goals, currency)
+    return output.getvalue()
 
 def delete_expense(index):
-    del st.session_state.expenses[index]
+    st.session_state.ledger.delete(index)
     save_current_state()
 
-def edit_expense(index, date, category, amount, description, transaction_type):
-    st.session_state.expenses[index] = {
-        'Date': date.strftime("%Y-%m-%d"),
-        'Category': category,
-        'Amount': amount,
-        'Description': description,
-        'Type': transaction_type
-    }
+def delete_expenses(indices):
+    # One undo step for the whole selection; later rows first so earlier positions stay valid
+    ledger = st.session_state.ledger
+    with ledger.batch():
+        for index in sorted(indices, reverse=True):
+            ledger.delete(index)
+    save_current_state()
+
+def recategorize_expenses(indices, category):
+    ledger = st.session_state.ledger
+    categorizer = get_categorizer()
+    learned = False
+    with ledger.batch():
+        for index in indices:
+            expense = ledger.expenses[index]
+            ledger.edit(index, datetime.strptime(expense['Date'], "%Y-%m-%d"), category, expense['Amount'],
+                        expense['Description'], expense['Type'], expense['Currency'])
+            learned = categorizer.learn(expense['Description'], category) or learned
+    save_current_state()
+    if learned:
+        save_categorizer_state()
+
+def undo_transactions(steps=1):
+    if st.session_state.ledger.undo(steps):
+        save_current_state()
+
+def redo_transactions(steps=1):
+    if st.session_state.ledger.redo(steps):
+        save_current_state()
+
+def sync_now(url):
+    # Replaces the session's data with the synced copy
+    username = st.session_state['username']
+    user_data = snapshot_user_data(
+        st.session_state.expenses,
+        st.session_state.income,
+        st.session_state.reminders,
+        st.session_state.savings_goals,
+        st.session_state.budgets
+    )
+    user_data, state, stats = sync_user_data(user_data, load_sync_state(username), http_exchange(url, username))
+    replace_session_data(user_data)
+    save_current_state()
+    # The data has to be on disk before the sync state marks it as synced
+    get_saver().flush(username)
+    if get_saver().pending(username):
+        raise OSError("Saving the synced data failed")
+    save_sync_state(username, state)
+    return stats
+
+def edit_expense(index, date, category, amount, description, transaction_type, currency=BASE_CURRENCY):
+    if category != st.session_state.ledger.expenses[index]['Category']:
+        learn_category(description, category)
+    st.session_state.ledger.edit(index, date, category, amount, description, transaction_type, currency)
     save_current_state()
 
 def login_page():
@@ -489,16 +587,11 @@ def login_page():
         username = st.text_input("Username", key="login_username")
         password = st.text_input("Password", type="password", key="login_password")
         
-        if st.button("Login"):
+        if st.button("Login", key="login_button"):
             if authenticate(username, password):
                 st.session_state['logged_in'] = True
                 st.session_state['username'] = username
-                # Load user's local data
-                user_data = load_local_data(username)
-                st.session_state.expenses = user_data["expenses"]
-                st.session_state.income = user_data["income"]
-                st.session_state.reminders = user_data["reminders"]
-                st.session_state.savings_goals = user_data["savings_goals"]
+                load_session_data(username)
                 st.success("Login successful!")
                 st.rerun()
             else:
@@ -521,6 +614,778 @@ def login_page():
                 else:
                     st.error("Username already exists!")
 
+# Dashboard sections
+# Each section is a fragment: its own widgets rerun only that section. Anything that
+# changes the ledger, income or goals calls st.rerun() so every section sees the change.
+def get_ledger_frame(currency):
+    # Rebuilt only when the ledger changed since the last build; converted copies are kept
+    # per (reporting currency, rate table version) so switching back and forth is free
+    ledger = st.session_state.ledger
+    fx = load_fx_table()
+    cached = st.session_state.get('ledger_frame')
+    if cached is None or cached['ledger'] is not ledger or cached['revision'] != ledger.revision:
+        cached = {'ledger': ledger, 'revision': ledger.revision, 'frame': ledger.to_frame(), 'converted': {}}
+        st.session_state.ledger_frame = cached
+    key = (currency, fx.version)
+    if key not in cached['converted']:
+        cached['converted'][key] = convert_frame(cached['frame'], fx, currency)
+    return cached['converted'][key]
+
+def get_summary_frame(currency):
+    # The data file's monthly rollup while the ledger is as loaded and already in currency,
+    # so totals and the forecast need no transaction rows decoded
+    rollup_frame = getattr(st.session_state.ledger.expenses, 'rollup_frame', None)
+    rollup = rollup_frame() if rollup_frame is not None else None
+    if rollup is not None and (rollup['Currency'] == currency).all():
+        return rollup
+    return get_ledger_frame(currency)
+
+@session_fragment
+def render_summary(total_income, total_expenses, remaining_balance, projected_balance, currency):
+    # Calculate total savings from all goals, which are kept in the base currency
+    total_savings = load_fx_table().convert(
+        goals.total_savings(st.session_state.savings_goals), BASE_CURRENCY, currency
+    )
+    symbol = currency_symbol(currency)
+
+    # Update Financial Summary section
+    st.markdown(f"""
+        <div style="background: linear-gradient(135deg, #1f77b4, #2c3e50); 
+                    padding: 1rem; border-radius: 10px; margin-bottom: 1rem;">
+            <h2 style="color: white; margin: 0; text-align: center;">Financial Summary</h2>
+        </div>
+        <div class="metrics-grid">
+            <div class="metric-card">
+                <div class="metric-label">Total Income</div>
+                <div class="metric-value income-value">{symbol}{total_income:.2f}</div>
+            </div>
+            <div class="metric-card">
+                <div class="metric-label">Total Expenses</div>
+                <div class="metric-value expense-value">{symbol}{total_expenses:.2f}</div>
+            </div>
+            <div class="metric-card">
+                <div class="metric-label">Balance</div>
+                <div class="metric-value balance-value">{symbol}{remaining_balance:.2f}</div>
+            </div>
+            <div class="metric-card">
+                <div class="metric-label">Total Savings</div>
+                <div class="metric-value savings-value">{symbol}{total_savings:.2f}</div>
+            </div>
+            <div class="metric-card">
+                <div class="metric-label">Projected Month-End Balance</div>
+                <div class="metric-value balance-value">{symbol}{projected_balance:.2f}</div>
+            </div>
+        </div>
+    """, unsafe_allow_html=True)
+
+@session_fragment
+def render_quick_savings():
+    # Add a section for quick savings update
+    if st.session_state.savings_goals:
+        st.markdown("""
+            <div style="background: white;
+                        padding: 1.5rem;
+                        border-radius: 10px;
+                        box-shadow: 0 2px 4px rgba(0, 0, 0, 0.1);
+                        margin: 1rem 0;">
+                <h3 style="color: #1f77b4; margin-bottom: 1rem;">Quick Savings Update</h3>
+        """, unsafe_allow_html=True)
+
+        col1, col2 = st.columns(2)
+
+        with col1:
+            selected_goal = st.radio(
+                "Select Goal",
+                options=[goal['name'] for goal in st.session_state.savings_goals],
+                key="quick_save_goal",
+                horizontal=True
+            )
+
+        with col2:
+            save_amount = st.number_input(
+                "Amount to Save",
+                min_value=0.0,
+                step=100.0,
+                key="quick_save_amount"
+            )
+
+        if st.button("Add to Savings", key="quick_save_button"):
+            if update_savings_goal(selected_goal, save_amount):
+                st.success(f"✅ Added ₹{save_amount:.2f} to {selected_goal}")
+                st.rerun()
+            else:
+                st.error("Failed to update savings")
+
+        # Show progress for all goals
+        for goal in st.session_state.savings_goals:
+            progress = goals.goal_progress(goal)
+            st.markdown(f"""
+                <div style="margin: 1rem 0;">
+                    <div style="display: flex; justify-content: space-between; margin-bottom: 0.5rem;">
+                        <span>🎯 {goal['name']}</span>
+                        <span>₹{goal['current_amount']:.2f} / ₹{goal['target_amount']:.2f}</span>
+                    </div>
+                </div>
+            """, unsafe_allow_html=True)
+            st.progress(progress)
+
+@session_fragment
+def render_transactions(df):
+    # Display transaction table with improved styling and edit/delete options
+    st.markdown("""
+        <div style="background: linear-gradient(135deg, #1f77b4, #2c3e50); 
+                    padding: 1rem; border-radius: 10px; margin: 2rem 0;">
+            <h2 style="color: white; margin: 0;">Transaction History</h2>
+        </div>
+    """, unsafe_allow_html=True)
+
+    ledger = st.session_state.ledger
+    undo_col, redo_col, _ = st.columns([1, 1, 4])
+    with undo_col:
+        if st.button(f"↩️ Undo ({ledger.undo_steps})", key="undo_button", disabled=not ledger.undo_steps):
+            undo_transactions()
+            st.rerun()
+    with redo_col:
+        if st.button(f"↪️ Redo ({ledger.redo_steps})", key="redo_button", disabled=not ledger.redo_steps):
+            redo_transactions()
+            st.rerun()
+
+    # Create tabs for viewing and editing transactions
+    tab1, tab2 = st.tabs(["📊 View Transactions", "✏️ Edit Transactions"])
+
+    with tab1:
+        st.dataframe(
+            df[TRANSACTION_COLUMNS].style.format({'Date': '{:%Y-%m-%d}', 'Amount': '{:.2f}'})
+                  .set_properties(**{'background-color': '#f8f9fa', 
+                                   'color': '#2c3e50',
+                                   'border-color': '#dee2e6'})
+        )
+
+    with tab2:
+        pages = max(1, -(-len(df) // EDITOR_PAGE_SIZE))
+        if st.session_state.get("editor_page", 1) > pages:
+            # Deletions or a narrower filter can leave the remembered page past the end
+            st.session_state.editor_page = pages
+        page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, step=1,
+                               key="editor_page") if pages > 1 else 1
+        page_df = df.iloc[(page - 1) * EDITOR_PAGE_SIZE:page * EDITOR_PAGE_SIZE]
+
+        # Bulk actions, each undone as a single step
+        selected_rows = st.multiselect(
+            "Select transactions",
+            list(page_df.index),
+            format_func=lambda idx: f"{df.at[idx, 'Date']:%Y-%m-%d} · {df.at[idx, 'Category']} · "
+                                    f"{df.at[idx, 'Amount']:.2f} · {df.at[idx, 'Description']}",
+            key="bulk_selection"
+        )
+        bulk_col1, bulk_col2, bulk_col3 = st.columns([2, 1, 1])
+        with bulk_col1:
+            bulk_category = st.selectbox("New Category", list(get_category_options()), key="bulk_category")
+        with bulk_col2:
+            if st.button("Set Category", key="bulk_recategorize", disabled=not selected_rows):
+                recategorize_expenses(selected_rows, bulk_category)
+                st.rerun()
+        with bulk_col3:
+            if st.button("Delete Selected", key="bulk_delete", disabled=not selected_rows):
+                delete_expenses(selected_rows)
+                st.rerun()
+
+        for idx, row in page_df.iterrows():
+            col1, col2, col3, col4, col5, col6 = st.columns([2, 2, 2, 2, 1, 1])
+
+            with col1:
+                st.write(f"**Date:** {row['Date']}")
+            with col2:
+                st.write(f"**Type:** {row['Type']}")
+            with col3:
+                st.write(f"**Category:** {row['Category']}")
+            with col4:
+                st.write(f"**Amount:** {currency_symbol(row['Currency'])}{row['Amount']:.2f}")
+
+            with col5:
+                if st.button("Edit", key=f"edit_{idx}"):
+                    st.session_state[f'edit_mode_{idx}'] = True
+
+            with col6:
+                if st.button("Delete", key=f"delete_{idx}"):
+                    delete_expense(idx)
+                    st.success("Transaction deleted successfully!")
+                    st.rerun()
+
+            # Edit mode for this transaction
+            if st.session_state.get(f'edit_mode_{idx}', False):
+                with st.expander("Edit Transaction", expanded=True):
+                    edit_date = st.date_input(
+                        "Date", 
+                        datetime.strptime(row['Date'], "%Y-%m-%d") if isinstance(row['Date'], str) else row['Date'], 
+                        key=f"date_{idx}"
+                    )
+
+                    # Transaction Type Selection - Simplified
+                    edit_type = st.radio(
+                        "Transaction Type",
+                        ["Expense", "Additional Income"],
+                        index=0 if row['Type']=="Expense" else 1,
+                        key=f"type_{idx}_edit"
+                    )
+
+                    # Category Selection - Simplified
+                    category_list = [
+                        "🍔 Food",
+                        "🚗 Transportation",
+                        "🏠 Rent",
+                        "💡 Bills",
+                        "🎮 Entertainment",
+                        "🛍️ Shopping",
+                        "🏥 Healthcare",
+                        "📚 Education",
+                        "💰 Salary",
+                        "📦 Other"
+                    ]
+
+                    edit_category = st.radio(
+                        "Category",
+                        category_list,
+                        index=category_list.index(f"🍔 {row['Category']}") if row['Category'] == "Food" else
+                              category_list.index(f"🚗 {row['Category']}") if row['Category'] == "Transportation" else
+                              category_list.index(f"🏠 {row['Category']}") if row['Category'] == "Rent" else
+                              category_list.index(f"💡 {row['Category']}") if row['Category'] == "Bills" else
+                              category_list.index(f"🎮 {row['Category']}") if row['Category'] == "Entertainment" else
+                              category_list.index(f"🛍️ {row['Category']}") if row['Category'] == "Shopping" else
+                              category_list.index(f"🏥 {row['Category']}") if row['Category'] == "Healthcare" else
+                              category_list.index(f"📚 {row['Category']}") if row['Category'] == "Education" else
+                              category_list.index(f"💰 {row['Category']}") if row['Category'] == "Salary" else
+                              category_list.index(f"📦 {row['Category']}"),
+                        key=f"category_{idx}_edit"
+                    )
+
+                    # Remove emoji for storage
+                    edit_category = edit_category.split(" ")[1] if " " in edit_category else edit_category
+
+                    edit_amount = st.number_input("Amount", 
+                        value=float(row['Amount']),
+                        min_value=0.0,
+                        step=1.0,
+                        key=f"amount_{idx}")
+
+                    currencies = load_fx_table().currencies
+                    edit_currency = st.selectbox("Currency", currencies,
+                        index=currencies.index(row['Currency']) if row['Currency'] in currencies else 0,
+                        key=f"currency_{idx}")
+
+                    edit_description = st.text_input("Description",
+                        value=row['Description'],
+                        key=f"desc_{idx}")
+
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        if st.button("Save Changes", key=f"save_{idx}"):
+                            edit_expense(idx, edit_date, edit_category,
+                                       edit_amount, edit_description, edit_type, edit_currency)
+                            st.session_state[f'edit_mode_{idx}'] = False
+                            st.success("Transaction updated successfully!")
+                            st.session_state.counter += 1
+                            st.rerun()
+                    with col2:
+                        if st.button("Cancel", key=f"cancel_{idx}"):
+                            st.session_state[f'edit_mode_{idx}'] = False
+                            st.rerun(scope="fragment")
+
+            st.markdown("<hr>", unsafe_allow_html=True)
+
+@session_fragment
+def render_downloads(df, total_income, total_expenses, remaining_balance, currency):
+    # Download options
+    st.markdown("""
+        <div style="background: linear-gradient(135deg, #1f77b4, #2c3e50); 
+                    padding: 1rem; border-radius: 10px; margin: 2rem 0;">
+            <h2 style="color: white; margin: 0;">Download Reports</h2>
+        </div>
+    """, unsafe_allow_html=True)
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        csv = df[TRANSACTION_COLUMNS].to_csv(index=False)
+        b64 = base64.b64encode(csv.encode()).decode()
+        st.download_button(
+            label="Download CSV Report",
+            data=csv,
+            file_name="expense_report.csv",
+            mime="text/csv"
+        )
+        if st.button("Generate Excel Report", key="generate_xlsx"):
+            st.download_button(
+                label="Download Excel Report",
+                data=create_excel_report(df, currency),
+                file_name="expense_report.xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            )
+
+    with col2:
+        # Month sections are cached per content, so regular monthly reports only render what changed
+        months = [str(month) for month in df['Month'].unique()]
+        months.sort()
+        report_months = None
+        if months and st.radio("Report Period", ["All Months", "Month Range"], horizontal=True,
+                               key="report_scope") == "Month Range":
+            report_months = st.select_slider("Months", options=months, value=(months[-1], months[-1]),
+                                             key="report_months")
+        if st.button("Generate PDF Report", key="generate_pdf"):
+            if report_months is not None:
+                report_df = df[(df['Month'].astype(str) >= report_months[0]) &
+                               (df['Month'].astype(str) <= report_months[1])]
+                income = load_fx_table().convert(st.session_state.income, BASE_CURRENCY, currency)
+                total_income, total_expenses, remaining_balance = calculate_totals(report_df, income)
+            pdf_path = create_pdf_report(df, total_income, total_expenses, remaining_balance, currency,
+                                         months=report_months)
+            if pdf_path and os.path.exists(pdf_path):
+                with open(pdf_path, "rb") as pdf_file:
+                    PDFbyte = pdf_file.read()
+                    st.download_button(
+                        label="Download PDF Report",
+                        data=PDFbyte,
+                        file_name="financial_report.pdf",
+                        mime='application/octet-stream'
+                    )
+
+@session_fragment
+def render_reminders():
+    # Update the Reminders Section
+    st.markdown("""
+        <div style="background: linear-gradient(135deg, #1f77b4, #2c3e50); 
+                    padding: 1rem; border-radius: 10px; margin: 2rem 0;">
+            <h2 style="color: white; margin: 0;">Bill Reminders</h2>
+        </div>
+    """, unsafe_allow_html=True)
+
+    reminder_col1, reminder_col2 = st.columns(2)
+
+    with reminder_col1:
+        st.subheader("⏰ Add Reminder")
+        rem_date = st.date_input("Reminder Date", key="new_reminder_date")
+        rem_note = st.text_input("Note", key="new_reminder_note")
+        rem_amount = st.number_input("Amount", min_value=0.0, key="new_reminder_amount")
+        if st.button("Add Reminder"):
+            add_reminder(rem_date, rem_note, rem_amount)
+            st.success("Reminder added!")
+
+    with reminder_col2:
+        st.subheader("📝 Upcoming Bills")
+        if not st.session_state.reminders:
+            st.info("No reminders set yet!")
+        else:
+            # Sorted by date, idx stays the reminder's position in the stored list
+            for idx, reminder in reminders.upcoming_reminders(st.session_state.reminders):
+                with st.container():
+                    col1, col2, col3 = st.columns([4, 1, 1])
+
+                    with col1:
+                        st.info(f"""
+                            📅 Date: {reminder['date']}
+                            💭 Note: {reminder['note']}
+                            💰 Amount: ₹{reminder['amount']:.2f}
+                        """)
+
+                    with col2:
+                        if st.button("✅ Done", key=f"complete_reminder_{idx}"):
+                            if mark_reminder_complete(idx):
+                                st.success("Marked as complete!")
+                                st.rerun(scope="fragment")
+
+                    with col3:
+                        if st.button("🗑️ Delete", key=f"delete_reminder_{idx}"):
+                            if delete_reminder(idx):
+                                st.success("Reminder deleted!")
+                                st.rerun(scope="fragment")
+
+@session_fragment
+def render_goals():
+    # Update the Savings Goals Section
+    st.markdown("""
+        <div style="background: linear-gradient(135deg, #1f77b4, #2c3e50); 
+                    padding: 1rem; border-radius: 10px; margin: 2rem 0;">
+            <h2 style="color: white; margin: 0;">Savings Goals</h2>
+        </div>
+    """, unsafe_allow_html=True)
+
+    goal_col1, goal_col2 = st.columns(2)
+
+    with goal_col1:
+        # Add tabs for new goal and regular savings
+        goal_tab1, goal_tab2 = st.tabs(["🎯 Set New Goal", "💰 Regular Savings"])
+
+        with goal_tab1:
+            st.subheader("Set New Goal")
+            goal_name = st.text_input("Goal Name", key="new_goal_name")
+            goal_amount = st.number_input("Target Amount", min_value=0.0, key="new_goal_amount")
+            goal_date = st.date_input("Target Date", key="new_goal_date")
+
+            # Calculate recommended monthly savings
+            monthly_savings = goals.recommended_monthly_savings(goal_amount, goal_date)
+            if monthly_savings > 0:
+                st.info(f"💡 Recommended monthly savings: ₹{monthly_savings:.2f}")
+
+            if st.button("Add Goal"):
+                add_savings_goal(goal_name, goal_amount, goal_date)
+                st.success("Goal added!")
+                st.rerun()
+
+        with goal_tab2:
+            st.subheader("Add Regular Savings")
+            if st.session_state.savings_goals:
+                # Change selectbox to radio for goals
+                selected_goal = st.radio(
+                    "Select Goal",
+                    options=[goal['name'] for goal in st.session_state.savings_goals],
+                    key="regular_savings_goal",
+                    horizontal=True  # Make radio buttons horizontal
+                )
+
+                savings_amount = st.number_input(
+                    "Amount to Save",
+                    min_value=0.0,
+                    step=100.0,
+                    key="regular_savings_amount"
+                )
+
+                # Change selectbox to radio for frequency
+                savings_frequency = st.radio(
+                    "Saving Frequency",
+                    options=list(reminders.SAVINGS_FREQUENCIES),
+                    key="savings_frequency",
+                    horizontal=True  # Make radio buttons horizontal
+                )
+
+                if st.button("Add to Savings"):
+                    if update_savings_goal(selected_goal, savings_amount):
+                        # Calculate next auto-save date based on frequency
+                        next_date = reminders.next_savings_date(savings_frequency, datetime.now())
+
+                        # Add a reminder for next savings
+                        add_reminder(
+                            next_date,
+                            f"Regular savings for {selected_goal}",
+                            savings_amount
+                        )
+
+                        st.success(f"""
+                            ✅ Added ₹{savings_amount:.2f} to {selected_goal}
+                            📅 Next saving reminder set for {next_date.strftime('%Y-%m-%d')}
+                        """)
+                        st.rerun()
+                    else:
+                        st.error("Failed to update savings")
+            else:
+                st.info("Create a savings goal first!")
+
+    with goal_col2:
+        st.subheader("🏆 Your Goals")
+        if st.session_state.savings_goals:
+            for goal in st.session_state.savings_goals:
+                progress = goals.goal_progress(goal)
+                remaining = goal['target_amount'] - goal['current_amount']
+
+                # Create an expander for each goal
+                with st.expander(f"🎯 {goal['name']}", expanded=True):
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        st.write(f"Target: ₹{goal['target_amount']:.2f}")
+                        st.write(f"Saved: ₹{goal['current_amount']:.2f}")
+                    with col2:
+                        st.write(f"Remaining: ₹{remaining:.2f}")
+                        st.write(f"Due Date: {goal['target_date']}")
+
+                    st.write(f"Progress: {(progress * 100):.1f}%")
+                    st.progress(progress)
+
+                    # Calculate daily/monthly needed to reach goal
+                    plan = goals.savings_plan(goal)
+                    if plan:
+                        daily_needed, monthly_needed, days_left = plan
+                        st.info(f"""
+                            💡 To reach your goal:
+                            • Save ₹{daily_needed:.2f} daily
+                            • Or ₹{monthly_needed:.2f} monthly
+                            • {days_left} days remaining
+                        """)
+        else:
+            st.info("No savings goals set yet!")
+
+@session_fragment
+def render_budgets():
+    # Monthly category budgets, kept in the base currency like goals
+    st.markdown("""
+        <div style="background: linear-gradient(135deg, #1f77b4, #2c3e50); 
+                    padding: 1rem; border-radius: 10px; margin: 2rem 0;">
+            <h2 style="color: white; margin: 0;">Category Budgets</h2>
+        </div>
+    """, unsafe_allow_html=True)
+
+    budget_col1, budget_col2 = st.columns(2)
+
+    with budget_col1:
+        st.subheader("Set Monthly Budget")
+        budget_category = st.selectbox("Category", list(get_category_options()), key="budget_category")
+        budget_amount = st.number_input("Monthly Budget (0 removes it)", min_value=0.0, step=500.0,
+                                        value=float(st.session_state.budgets.get(budget_category, 0.0)),
+                                        key=f"budget_amount_{budget_category}")
+        if st.button("Save Budget", key="save_budget"):
+            set_category_budget(budget_category, budget_amount)
+            st.rerun()
+
+    with budget_col2:
+        current_month = datetime.now().strftime("%Y-%m")
+        st.subheader(f"📏 Utilization ({current_month})")
+        utilization = get_budget_tracker().utilization(st.session_state.budgets, current_month)
+        if utilization:
+            for row in utilization:
+                st.write(f"{'🚨' if row['Ratio'] >= 1 else '⚠️' if row['Ratio'] >= ALERT_THRESHOLDS[0] else '✅'} "
+                         f"**{row['Category']}**: ₹{row['Spent']:.2f} of ₹{row['Budget']:.2f} "
+                         f"({row['Ratio'] * 100:.0f}%)")
+                st.progress(min(row['Ratio'], 1.0))
+        else:
+            st.info("No budgets set yet!")
+
+@session_fragment
+def render_analytics(df, expenses_df, monthly_by_category, current_month, total_income, total_expenses, currency):
+    # Add Analytics Section
+    st.markdown("""
+        <div style="background: linear-gradient(135deg, #1f77b4, #2c3e50); 
+                    padding: 1rem; border-radius: 10px; margin: 2rem 0;">
+            <h2 style="color: white; margin: 0;">Advanced Analytics</h2>
+        </div>
+    """, unsafe_allow_html=True)
+
+    if not df.empty:
+        # Monthly Trends
+        st.subheader("📈 Monthly Trends")
+        monthly_trends = calculate_monthly_trends(df)
+        if not monthly_trends.empty:
+            # Convert index to datetime for better sorting
+            monthly_trends.index = pd.to_datetime(monthly_trends.index)
+            monthly_trends = monthly_trends.sort_index()
+
+            # Create the plot
+            fig = go.Figure()
+
+            # Add Expense line
+            fig.add_trace(go.Scatter(
+                x=monthly_trends.index.strftime('%Y-%m'),
+                y=monthly_trends['Expense'],
+                name='Expense',
+                line=dict(color='#e74c3c'),
+                mode='lines+markers'
+            ))
+
+            # Add Income line
+            fig.add_trace(go.Scatter(
+                x=monthly_trends.index.strftime('%Y-%m'),
+                y=monthly_trends['Additional Income'],
+                name='Additional Income',
+                line=dict(color='#2ecc71'),
+                mode='lines+markers'
+            ))
+
+            # Update layout
+            fig.update_layout(
+                title='Monthly Income vs Expenses',
+                xaxis_title='Month',
+                yaxis_title=f'Amount ({currency})',
+                hovermode='x unified',
+                showlegend=True,
+                legend=dict(
+                    orientation="h",
+                    yanchor="bottom",
+                    y=1.02,
+                    xanchor="right",
+                    x=1
+                )
+            )
+
+            st.plotly_chart(fig, use_container_width=True)
+
+        # Cash-Flow Forecast
+        st.subheader("🔮 Cash-Flow Forecast")
+        forecast_horizon = st.slider("Months to forecast", min_value=1, max_value=12, value=3, key="forecast_horizon")
+        forecast = project_cash_flow(st.session_state.forecast_state, current_month, forecast_horizon)
+        if not forecast.empty:
+            history = totals_by_type(monthly_by_category)
+            projected = totals_by_type(forecast)
+            fig = go.Figure()
+            for column, color in [('Expense', '#e74c3c'), ('Additional Income', '#2ecc71')]:
+                fig.add_trace(go.Scatter(
+                    x=history.index.strftime('%Y-%m'),
+                    y=history[column],
+                    name=column,
+                    line=dict(color=color),
+                    mode='lines+markers'
+                ))
+                fig.add_trace(go.Scatter(
+                    x=projected.index.strftime('%Y-%m'),
+                    y=projected[column],
+                    name=f'Projected {column}',
+                    line=dict(color=color, dash='dash'),
+                    mode='lines+markers'
+                ))
+            fig.update_layout(
+                title='Projected Income vs Expenses',
+                xaxis_title='Month',
+                yaxis_title=f'Amount ({currency})',
+                hovermode='x unified',
+                showlegend=True
+            )
+            st.plotly_chart(fig, use_container_width=True)
+
+            if 'Expense' in forecast.columns.get_level_values('Type'):
+                st.write("Projected expenses by category:")
+                st.dataframe(forecast['Expense'].T.rename(columns=str).round(2))
+        else:
+            st.info("The forecast starts once a full month of transactions has closed.")
+
+        # Category Analysis with Plotly
+        st.subheader("📊 Category Analysis")
+        category_analysis = get_category_analysis(expenses_df)
+        if not category_analysis.empty:
+            fig = px.bar(
+                category_analysis,
+                title='Expenses by Category',
+                labels={'value': 'Amount', 'index': 'Category'}
+            )
+            fig.update_layout(
+                xaxis_title="Category",
+                yaxis_title=f"Amount ({currency})",
+                showlegend=False
+            )
+            st.plotly_chart(fig, use_container_width=True)
+
+        # Spending Insights
+        st.subheader("💡 Spending Insights")
+        col1, col2 = st.columns(2)
+        with col1:
+            st.write("Top Expenses:")
+            top_k = st.number_input("How many", min_value=1, max_value=50, value=3, step=1, key="top_k")
+            top_scope = st.radio("Scope", ["All Time", "This Month"], horizontal=True, key="top_scope")
+            top_category = st.selectbox("Category", ["All Categories"] + list(get_category_options()),
+                                        key="top_category")
+            top_expenses = get_top_expenses().top(
+                int(top_k),
+                month=datetime.now().strftime("%Y-%m") if top_scope == "This Month" else None,
+                category=None if top_category == "All Categories" else top_category
+            )
+            if not top_expenses:
+                st.write("No expenses in this scope yet.")
+            for _, expense in top_expenses:
+                st.write(f"{currency_symbol(expense['Currency'])}{expense['Amount']:.2f} - {expense['Category']} "
+                         f"({expense['Date']})")
+
+        with col2:
+            st.write("Savings Rate:")
+            st.write(f"{savings_rate(total_income, total_expenses):.1f}%")
+
+        monitor = get_spending_monitor()
+        col1, col2 = st.columns(2)
+        with col1:
+            st.write("Unusual Transactions:")
+            unusual = monitor.unusual_transactions(limit=5)
+            if unusual:
+                for expense in unusual:
+                    st.warning(f"{currency_symbol(expense['Currency'])}{expense['Amount']:.2f} - {expense['Category']} "
+                               f"on {expense['Date']} (typical {currency_symbol(BASE_CURRENCY)}{expense['typical']:.2f})")
+            else:
+                st.write("Nothing unusual so far.")
+
+        with col2:
+            st.write("Category Spikes This Month:")
+            spikes = monitor.category_spikes(datetime.now().strftime("%Y-%m"))
+            if spikes:
+                for spike in spikes:
+                    st.warning(f"{spike['Category']}: {currency_symbol(BASE_CURRENCY)}{spike['Total']:.2f}, "
+                               f"{spike['Ratio']:.1f}x the recent monthly median")
+            else:
+                st.write("No category spikes this month.")
+
+def render_session_stats():
+    # Operator view of every logged-in session in this server process
+    registry = get_session_registry()
+    with st.expander("🖥️ Server Sessions"):
+        total = registry.total_bytes()
+        st.metric("Session Memory", f"{total / 2 ** 20:.1f} MB",
+                  f"{(total - registry.budget_bytes) / 2 ** 20:+.1f} MB vs budget", delta_color="inverse")
+        st.caption(f"Budget {registry.budget_bytes / 2 ** 20:.0f} MB, idle sessions evicted after "
+                   f"{registry.idle_seconds / 60:.0f} min, {registry.evictions} eviction(s) so far")
+        stats = pd.DataFrame(registry.stats())
+        if not stats.empty:
+            for column in ['ledger', 'caches', 'widgets', 'total']:
+                stats[column] = stats[column] / 2 ** 20
+            stats['idle_s'] = stats['idle_s'].round()
+            st.dataframe(stats.rename(columns={
+                'ledger': 'Ledger MB', 'caches': 'Caches MB', 'widgets': 'Widgets MB', 'total': 'Total MB',
+                'idle_s': 'Idle s', 'evicted': 'Evicted'
+            }).style.format({'Ledger MB': '{:.2f}', 'Caches MB': '{:.2f}', 'Widgets MB': '{:.2f}',
+                             'Total MB': '{:.2f}'}), hide_index=True)
+
+@session_fragment
+def render_pivot(currency):
+    # Every breakdown here is aggregated from the analytics cube's cells, never from the transactions
+    st.subheader("🧊 Pivot Explorer")
+    cube = get_analytics_cube(currency)
+    pivot_col1, pivot_col2, pivot_col3, pivot_col4 = st.columns(4)
+    with pivot_col1:
+        rows = st.selectbox("Rows", DIMENSIONS, key="pivot_rows")
+    with pivot_col2:
+        columns = st.selectbox("Columns", ["None", *DIMENSIONS], index=DIMENSIONS.index('Category') + 1,
+                               key="pivot_columns")
+    with pivot_col3:
+        measure = st.radio("Measure", MEASURES, horizontal=True, key="pivot_measure")
+    with pivot_col4:
+        types = st.multiselect("Types", get_transaction_types(), default=["Expense"], key="pivot_types")
+
+    # Drill-down steps apply to the chosen Rows dimension and are dropped when it changes
+    drill = st.session_state.get('pivot_drill')
+    if drill is None or drill['rows'] != rows:
+        drill = st.session_state.pivot_drill = {'rows': rows, 'steps': []}
+
+    def current_view():
+        row_dimension, where = rows, ({'Type': types} if types else {})
+        for dimension, member in drill['steps']:
+            row_dimension, where = cube.drill_down(where, dimension, member)
+        return row_dimension, where
+
+    # Clicks change the steps before the table is drawn, so no extra rerun is needed
+    row_dimension, where = current_view()
+    drill_col1, drill_col2 = st.columns([3, 1])
+    with drill_col1:
+        members = cube.members(row_dimension, where) if row_dimension in HIERARCHY else []
+        if members:
+            member = st.selectbox(f"Drill into {row_dimension}", members, key="pivot_drill_member")
+            if st.button(f"🔍 Drill Down to {HIERARCHY[row_dimension]}s", key="pivot_drill_down"):
+                drill['steps'].append((row_dimension, member))
+    with drill_col2:
+        if drill['steps'] and st.button("⬆️ Roll Up", key="pivot_roll_up"):
+            drill['steps'].pop()
+    row_dimension, where = current_view()
+    if drill['steps']:
+        st.caption(" › ".join([rows] + [member for _, member in drill['steps']]) + f" › {row_dimension}")
+
+    table = cube.pivot(row_dimension, None if columns in ("None", row_dimension) else columns, where, measure)
+    if table.empty:
+        st.info("No transactions in this slice.")
+        return
+    value_format = '{:.2f}' if measure == 'Amount' else '{:.0f}'
+    st.dataframe(table.style.format(value_format), use_container_width=True)
+    if table.shape[1] > 1:
+        fig = px.imshow(table, aspect='auto', color_continuous_scale='Blues',
+                        labels=dict(x=columns, y=row_dimension,
+                                    color=f'{measure} ({currency})' if measure == 'Amount' else measure))
+        fig.update_layout(title=f'{measure} by {row_dimension} and {columns}', height=max(300, 28 * len(table)))
+        st.plotly_chart(fig, use_container_width=True)
+    else:
+        fig = px.bar(table, labels={'value': f'{measure} ({currency})' if measure == 'Amount' else measure,
+                                    'index': row_dimension})
+        fig.update_layout(showlegend=False)
+        st.plotly_chart(fig, use_container_width=True)
+
 # Main app
 if not st.session_state['logged_in']:
     login_page()
@@ -528,8 +1393,29 @@ else:
     # Add logout button in sidebar
     with st.sidebar:
         if st.button("Logout"):
+            get_saver().flush(st.session_state['username'])
+            get_rules_saver().flush(st.session_state['username'])
+            ctx = get_script_run_ctx()
+            if ctx is not None:
+                get_session_registry().forget(ctx.session_id)
             st.session_state['logged_in'] = False
             st.rerun()
+
+        with st.expander("🔄 Sync"):
+            sync_url = st.text_input("Sync Server", get_sync_settings()['url'], key="sync_url")
+            if st.button("Sync Now", key="sync_button"):
+                try:
+                    stats = sync_now(sync_url)
+                    st.session_state.sync_result = (f"Sent {stats['sent']}, received {stats['received']} change(s), "
+                                                    f"{stats['conflicts']} conflict(s) resolved")
+                    st.rerun()
+                except OSError as error:
+                    st.error(f"Sync failed: {error}")
+            if st.session_state.get('sync_result'):
+                st.caption(st.session_state.sync_result)
+
+        if st.session_state['username'] in get_session_settings()['operators']:
+            render_session_stats()
     
     # Rest of your existing app code goes here...
     # (Keep all the existing code, just indent it one level)
@@ -548,6 +1434,11 @@ else:
             </div>
         """, unsafe_allow_html=True)
         
+        # Reporting currency for the summary, charts and reports
+        st.selectbox("💱 Reporting Currency", load_fx_table().currencies, key="reporting_currency")
+
+        st.markdown("<hr>", unsafe_allow_html=True)
+
         # Income Section
         st.subheader("💵 Update Income")
         new_income = st.number_input("Monthly Income", min_value=0.0, step=1000.0)
@@ -571,6 +1462,7 @@ else:
         
         # Category Selection - Simplified
         category_list = [
+            "✨ Auto",
             "🍔 Food",
             "🚗 Transportation",
             "🏠 Rent",
@@ -592,102 +1484,139 @@ else:
         # Remove emoji for storage
         category = category.split(" ")[1] if " " in category else category
         
-        amount = st.number_input("Amount", min_value=0.0, step=1.0)
-        description = st.text_input("Description")
+        amount = st.number_input("Amount", min_value=0.0, step=1.0, key="transaction_amount")
+        transaction_currency = st.selectbox("Currency", load_fx_table().currencies, key="transaction_currency")
+        description = st.text_input("Description", key="transaction_description")
         
-        if st.button("Add Transaction"):
-            add_expense(date, category, amount, description, transaction_type)
+        if st.button("Add Transaction", key="add_transaction"):
+            if category == "Auto":
+                category = get_categorizer().categorize([description])[0]
+            else:
+                learn_category(description, category)
+            alert = add_expense(date, category, amount, description, transaction_type, transaction_currency)
             st.success("✅ Transaction added successfully!")
+            if alert:
+                st.warning(f"{'🚨' if alert['Ratio'] >= 1 else '⚠️'} {alert['Category']} spending for {alert['Month']} "
+                           f"is at {alert['Ratio'] * 100:.0f}% of its ₹{alert['Budget']:.2f} budget")
+
+        with st.expander("📥 Import Statement"):
+            st.caption("CSV with Date, Description and Amount columns; Type, Category and Currency are optional")
+            statement = st.file_uploader("Statement", type="csv", key="statement_file")
+            if statement is not None:
+                preview = st.session_state.get('statement_preview')
+                if preview is None or preview['file_id'] != statement.file_id:
+                    try:
+                        imported, auto = read_statement(statement, get_categorizer(), transaction_currency)
+                        preview = {'file_id': statement.file_id, 'expenses': imported, 'auto': auto, 'error': None}
+                    except (ValueError, pd.errors.ParserError) as error:
+                        preview = {'file_id': statement.file_id, 'expenses': [], 'auto': 0, 'error': str(error)}
+                    st.session_state.statement_preview = preview
+                if preview['error']:
+                    st.error(preview['error'])
+                else:
+                    st.caption(f"{len(preview['expenses'])} transaction(s), {preview['auto']} categorized automatically")
+                    st.dataframe(pd.DataFrame(preview['expenses'])['Category'].value_counts(), height=200)
+                    if st.button(f"Import {len(preview['expenses'])} Transactions", key="import_statement",
+                                 disabled=not preview['expenses']):
+                        try:
+                            import_transactions(preview['expenses'])
+                        except ValueError as error:
+                            # The ledger is left as it was before the import
+                            st.error(str(error))
+                        else:
+                            del st.session_state.statement_preview
+                            st.success("✅ Statement imported!")
+                            st.rerun()
+
+        with st.expander("🏷️ Categorization Rules"):
+            categorizer = get_categorizer()
+            st.caption("Keywords are comma-separated whole words; tick Regex for a regular expression. "
+                       "Merchants you categorize by hand take precedence.")
+            rules = st.data_editor(
+                pd.DataFrame(categorizer.rules, columns=['pattern', 'category', 'regex']),
+                column_config={
+                    'pattern': st.column_config.TextColumn("Keywords / Pattern", required=True),
+                    'category': st.column_config.SelectboxColumn("Category", options=list(get_category_options()),
+                                                                 required=True),
+                    'regex': st.column_config.CheckboxColumn("Regex", default=False)
+                },
+                num_rows="dynamic", hide_index=True, key="categorization_rules"
+            )
+            if st.button("Save Rules", key="save_rules"):
+                rules = rules.dropna(subset=['pattern', 'category'])
+                try:
+                    categorizer.set_rules([
+                        {'pattern': rule['pattern'], 'category': rule['category'], 'regex': bool(rule['regex']) if pd.notna(rule['regex']) else False}
+                        for rule in rules.to_dict('records')
+                    ])
+                    save_categorizer_state()
+                    get_rules_saver().flush(st.session_state['username'])
+                    st.success("✅ Rules saved!")
+                except ValueError as error:
+                    st.error(str(error))
+            if categorizer.merchants and st.button(f"Forget {len(categorizer.merchants)} Learned Merchant(s)",
+                                                   key="forget_merchants"):
+                categorizer.forget_merchants()
+                save_categorizer_state()
+                st.rerun()
 
     # Main content
     if st.session_state.expenses:
-        df = pd.DataFrame(st.session_state.expenses)
-        
-        # Calculate totals
-        expenses_df = df[df['Type'] == 'Expense']
-        income_df = df[df['Type'] == 'Additional Income']
-        total_expenses = expenses_df['Amount'].sum() if not expenses_df.empty else 0
-        additional_income = income_df['Amount'].sum() if not income_df.empty else 0
-        total_income = st.session_state.income + additional_income
-        remaining_balance = total_income - total_expenses
-
-        # Calculate total savings from all goals
-        total_savings = sum(goal['current_amount'] for goal in st.session_state.savings_goals)
-
-        # Update Financial Summary section
-        st.markdown(f"""
-            <div style="background: linear-gradient(135deg, #1f77b4, #2c3e50); 
-                        padding: 1rem; border-radius: 10px; margin-bottom: 1rem;">
-                <h2 style="color: white; margin: 0; text-align: center;">Financial Summary</h2>
-            </div>
-            <div class="metrics-grid">
-                <div class="metric-card">
-                    <div class="metric-label">Total Income</div>
-                    <div class="metric-value income-value">₹{total_income:.2f}</div>
-                </div>
-                <div class="metric-card">
-                    <div class="metric-label">Total Expenses</div>
-                    <div class="metric-value expense-value">₹{total_expenses:.2f}</div>
-                </div>
-                <div class="metric-card">
-                    <div class="metric-label">Balance</div>
-                    <div class="metric-value balance-value">₹{remaining_balance:.2f}</div>
-                </div>
-                <div class="metric-card">
-                    <div class="metric-label">Total Savings</div>
-                    <div class="metric-value savings-value">₹{total_savings:.2f}</div>
-                </div>
-            </div>
-        """, unsafe_allow_html=True)
-        
-        # Add a section for quick savings update
-        if st.session_state.savings_goals:
-            st.markdown("""
-                <div style="background: white;
-                            padding: 1.5rem;
-                            border-radius: 10px;
-                            box-shadow: 0 2px 4px rgba(0, 0, 0, 0.1);
-                            margin: 1rem 0;">
-                    <h3 style="color: #1f77b4; margin-bottom: 1rem;">Quick Savings Update</h3>
-            """, unsafe_allow_html=True)
-            
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                selected_goal = st.radio(
-                    "Select Goal",
-                    options=[goal['name'] for goal in st.session_state.savings_goals],
-                    key="quick_save_goal",
-                    horizontal=True
-                )
-            
-            with col2:
-                save_amount = st.number_input(
-                    "Amount to Save",
-                    min_value=0.0,
-                    step=100.0,
-                    key="quick_save_amount"
-                )
-            
-            if st.button("Add to Savings", key="quick_save_button"):
-                if update_savings_goal(selected_goal, save_amount):
-                    st.success(f"✅ Added ₹{save_amount:.2f} to {selected_goal}")
-                else:
-                    st.error("Failed to update savings")
+        reporting_currency = st.session_state.reporting_currency
+        summary_frame = get_summary_frame(reporting_currency)
+
+        # Calculate totals; income is kept in the base currency, like savings goals and reminders
+        income = load_fx_table().convert(st.session_state.income, BASE_CURRENCY, reporting_currency)
+        total_income, total_expenses, remaining_balance = calculate_totals(summary_frame, income)
+
+        # Cash-flow forecast, only newly closed months are folded into the cached state
+        current_month = pd.Period(datetime.now(), freq='M')
+        monthly_by_category = calculate_monthly_category_trends(summary_frame)
+        st.session_state.forecast_state, forecast = forecast_cash_flow(
+            monthly_by_category,
+            current_month,
+            months_ahead=0,
+            state=st.session_state.forecast_state
+        )
+        projected_balance = projected_month_end_balance(forecast, monthly_by_category, current_month, remaining_balance)
+
+        render_summary(total_income, total_expenses, remaining_balance, projected_balance, reporting_currency)
+        render_quick_savings()
+
+        # The summary above is already on screen while transaction rows are decoded for the rest
+        df = get_ledger_frame(reporting_currency)
+        filter_index = get_filter_index()
+        expenses_df = df.iloc[filter_index.positions(types=['Expense'])]
+
+        # Search and filters narrow the table, editor, exports and charts below; the summary stays ledger-wide
+        search_query = st.text_input("🔍 Search transactions", key="search_query",
+                                     placeholder="Search descriptions and categories")
+        with st.expander("🎚️ Filters"):
+            filter_col1, filter_col2 = st.columns(2)
+            with filter_col1:
+                filter_categories = st.multiselect("Categories", list(get_category_options()), key="filter_categories")
+                filter_types = st.multiselect("Transaction Types", get_transaction_types(), key="filter_types")
+                filter_dates = st.date_input("Date Range", value=[], key="filter_dates")
+            with filter_col2:
+                filter_min_amount = st.number_input("Min Amount", min_value=0.0, step=100.0, key="filter_min_amount")
+                filter_max_amount = st.number_input("Max Amount (0 = no limit)", min_value=0.0, step=100.0,
+                                                    key="filter_max_amount")
+
+        view_filters = {
+            'categories': filter_categories or None,
+            'types': filter_types or None,
+            'start_date': filter_dates[0] if len(filter_dates) > 0 else None,
+            'end_date': filter_dates[1] if len(filter_dates) > 1 else None,
+            'min_amount': filter_min_amount or None,
+            'max_amount': filter_max_amount or None,
+            'rows': get_search_index().search(search_query) if search_query.strip() else None
+        }
+        if any(value is not None for value in view_filters.values()):
+            view_positions = filter_index.positions(**view_filters)
+            expenses_df = df.iloc[filter_index.positions(types=['Expense'], rows=view_positions)]
+            df = df.iloc[view_positions]
+            st.caption(f"{len(view_positions)} matching transaction(s)")
 
-            # Show progress for all goals
-            for goal in st.session_state.savings_goals:
-                progress = min(goal['current_amount'] / goal['target_amount'], 1.0) if goal['target_amount'] > 0 else 0.0
-                st.markdown(f"""
-                    <div style="margin: 1rem 0;">
-                        <div style="display: flex; justify-content: space-between; margin-bottom: 0.5rem;">
-                            <span>🎯 {goal['name']}</span>
-                            <span>₹{goal['current_amount']:.2f} / ₹{goal['target_amount']:.2f}</span>
-                        </div>
-                    </div>
-                """, unsafe_allow_html=True)
-                st.progress(progress)
-        
         # After the metrics cards and before transaction table, add pie chart
         if not expenses_df.empty:
             st.markdown("""
@@ -697,9 +1626,9 @@ else:
                 </div>
             """, unsafe_allow_html=True)
             
-            fig = px.pie(expenses_df, 
-                         values='Amount', 
-                         names='Category',
+            category_totals = get_category_analysis(expenses_df)
+            fig = px.pie(values=category_totals.values,
+                         names=category_totals.index,
                          hole=0.3,
                          color_discrete_sequence=px.colors.sequential.Blues_r)
             
@@ -717,416 +1646,89 @@ else:
             )
             st.plotly_chart(fig, use_container_width=True)
         
-        # Display transaction table with improved styling and edit/delete options
-        st.markdown("""
-            <div style="background: linear-gradient(135deg, #1f77b4, #2c3e50); 
-                        padding: 1rem; border-radius: 10px; margin: 2rem 0;">
-                <h2 style="color: white; margin: 0;">Transaction History</h2>
-            </div>
-        """, unsafe_allow_html=True)
-        
-        # Create tabs for viewing and editing transactions
-        tab1, tab2 = st.tabs(["📊 View Transactions", "✏️ Edit Transactions"])
-
-        with tab1:
-            st.dataframe(
-                df.style.format({'Amount': '{:.2f}'})
-                      .set_properties(**{'background-color': '#f8f9fa', 
-                                       'color': '#2c3e50',
-                                       'border-color': '#dee2e6'})
-            )
-
-        with tab2:
-            for idx, row in df.iterrows():
-                col1, col2, col3, col4, col5, col6 = st.columns([2, 2, 2, 2, 1, 1])
-                
-                with col1:
-                    st.write(f"**Date:** {row['Date']}")
-                with col2:
-                    st.write(f"**Type:** {row['Type']}")
-                with col3:
-                    st.write(f"**Category:** {row['Category']}")
-                with col4:
-                    st.write(f"**Amount:** {row['Amount']:.2f}")
-                    
-                with col5:
-                    if st.button("Edit", key=f"edit_{idx}"):
-                        st.session_state[f'edit_mode_{idx}'] = True
-                        
-                with col6:
-                    if st.button("Delete", key=f"delete_{idx}"):
-                        delete_expense(idx)
-                        st.success("Transaction deleted successfully!")
-                        st.rerun()
-                
-                # Edit mode for this transaction
-                if st.session_state.get(f'edit_mode_{idx}', False):
-                    with st.expander("Edit Transaction", expanded=True):
-                        edit_date = st.date_input(
-                            "Date", 
-                            datetime.strptime(row['Date'], "%Y-%m-%d") if isinstance(row['Date'], str) else row['Date'], 
-                            key=f"date_{idx}"
-                        )
-                        
-                        # Transaction Type Selection - Simplified
-                        edit_type = st.radio(
-                            "Transaction Type",
-                            ["Expense", "Additional Income"],
-                            index=0 if row['Type']=="Expense" else 1,
-                            key=f"type_{idx}_edit"
-                        )
-                        
-                        # Category Selection - Simplified
-                        category_list = [
-                            "🍔 Food",
-                            "🚗 Transportation",
-                            "🏠 Rent",
-                            "💡 Bills",
-                            "🎮 Entertainment",
-                            "🛍️ Shopping",
-                            "🏥 Healthcare",
-                            "📚 Education",
-                            "💰 Salary",
-                            "📦 Other"
-                        ]
-                        
-                        edit_category = st.radio(
-                            "Category",
-                            category_list,
-                            index=category_list.index(f"🍔 {row['Category']}") if row['Category'] == "Food" else
-                                  category_list.index(f"🚗 {row['Category']}") if row['Category'] == "Transportation" else
-                                  category_list.index(f"🏠 {row['Category']}") if row['Category'] == "Rent" else
-                                  category_list.index(f"💡 {row['Category']}") if row['Category'] == "Bills" else
-                                  category_list.index(f"🎮 {row['Category']}") if row['Category'] == "Entertainment" else
-                                  category_list.index(f"🛍️ {row['Category']}") if row['Category'] == "Shopping" else
-                                  category_list.index(f"🏥 {row['Category']}") if row['Category'] == "Healthcare" else
-                                  category_list.index(f"📚 {row['Category']}") if row['Category'] == "Education" else
-                                  category_list.index(f"💰 {row['Category']}") if row['Category'] == "Salary" else
-                                  category_list.index(f"📦 {row['Category']}"),
-                            key=f"category_{idx}_edit"
-                        )
-                        
-                        # Remove emoji for storage
-                        edit_category = edit_category.split(" ")[1] if " " in edit_category else edit_category
-                        
-                        edit_amount = st.number_input("Amount", 
-                            value=float(row['Amount']),
-                            min_value=0.0,
-                            step=1.0,
-                            key=f"amount_{idx}")
-                        
-                        edit_description = st.text_input("Description",
-                            value=row['Description'],
-                            key=f"desc_{idx}")
-                        
-                        col1, col2 = st.columns(2)
-                        with col1:
-                            if st.button("Save Changes", key=f"save_{idx}"):
-                                edit_expense(idx, edit_date, edit_category,
-                                           edit_amount, edit_description, edit_type)
-                                st.session_state[f'edit_mode_{idx}'] = False
-                                st.success("Transaction updated successfully!")
-                                st.session_state.counter += 1
-                        with col2:
-                            if st.button("Cancel", key=f"cancel_{idx}"):
-                                st.session_state[f'edit_mode_{idx}'] = False
-                                st.rerun()
-                
-                st.markdown("<hr>", unsafe_allow_html=True)
-        
-        # Download options
-        st.markdown("""
-            <div style="background: linear-gradient(135deg, #1f77b4, #2c3e50); 
-                        padding: 1rem; border-radius: 10px; margin: 2rem 0;">
-                <h2 style="color: white; margin: 0;">Download Reports</h2>
-            </div>
-        """, unsafe_allow_html=True)
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            csv = df.to_csv(index=False)
-            b64 = base64.b64encode(csv.encode()).decode()
-            st.download_button(
-                label="Download CSV Report",
-                data=csv,
-                file_name="expense_report.csv",
-                mime="text/csv"
-            )
-        
-        with col2:
-            if st.button("Generate PDF Report"):
-                pdf_path = create_pdf_report(df, total_income, total_expenses, remaining_balance)
-                if pdf_path and os.path.exists(pdf_path):
-                    with open(pdf_path, "rb") as pdf_file:
-                        PDFbyte = pdf_file.read()
-                        st.download_button(
-                            label="Download PDF Report",
-                            data=PDFbyte,
-                            file_name="financial_report.pdf",
-                            mime='application/octet-stream'
-                        )
-
-        # Update the Reminders Section
-        st.markdown("""
-            <div style="background: linear-gradient(135deg, #1f77b4, #2c3e50); 
-                        padding: 1rem; border-radius: 10px; margin: 2rem 0;">
-                <h2 style="color: white; margin: 0;">Bill Reminders</h2>
-            </div>
-        """, unsafe_allow_html=True)
-
-        reminder_col1, reminder_col2 = st.columns(2)
-
-        with reminder_col1:
-            st.subheader("⏰ Add Reminder")
-            rem_date = st.date_input("Reminder Date", key="new_reminder_date")
-            rem_note = st.text_input("Note", key="new_reminder_note")
-            rem_amount = st.number_input("Amount", min_value=0.0, key="new_reminder_amount")
-            if st.button("Add Reminder"):
-                add_reminder(rem_date, rem_note, rem_amount)
-                st.success("Reminder added!")
-
-        with reminder_col2:
-            st.subheader("📝 Upcoming Bills")
-            if not st.session_state.reminders:
-                st.info("No reminders set yet!")
-            else:
-                # Sort reminders by date
-                sorted_reminders = sorted(
-                    [r for r in st.session_state.reminders if not r.get('completed', False)],
-                    key=lambda x: datetime.strptime(x['date'], "%Y-%m-%d")
-                )
-                
-                for idx, reminder in enumerate(sorted_reminders):
-                    with st.container():
-                        col1, col2, col3 = st.columns([4, 1, 1])
-                        
-                        with col1:
-                            st.info(f"""
-                                📅 Date: {reminder['date']}
-                                💭 Note: {reminder['note']}
-                                💰 Amount: ₹{reminder['amount']:.2f}
-                            """)
-                        
-                        with col2:
-                            if st.button("✅ Done", key=f"complete_reminder_{idx}"):
-                                if mark_reminder_complete(idx):
-                                    st.success("Marked as complete!")
-                                    st.rerun()
-                        
-                        with col3:
-                            if st.button("🗑️ Delete", key=f"delete_reminder_{idx}"):
-                                if delete_reminder(idx):
-                                    st.success("Reminder deleted!")
-                                    st.rerun()
-
-        # Update the Savings Goals Section
-        st.markdown("""
-            <div style="background: linear-gradient(135deg, #1f77b4, #2c3e50); 
-                        padding: 1rem; border-radius: 10px; margin: 2rem 0;">
-                <h2 style="color: white; margin: 0;">Savings Goals</h2>
-            </div>
-        """, unsafe_allow_html=True)
+        render_transactions(df)
+        render_downloads(df, total_income, total_expenses, remaining_balance, reporting_currency)
+        render_reminders()
+        render_goals()
+        render_budgets()
+        render_analytics(df, expenses_df, monthly_by_category, current_month, total_income, total_expenses,
+                         reporting_currency)
+        render_pivot(reporting_currency)
+    else:
+        st.info("👋 Welcome! Add your first transaction using the sidebar.")
 
-        goal_col1, goal_col2 = st.columns(2)
+    # Household / Team rollups across several users' ledgers
+    st.markdown("""
+        <div style="background: linear-gradient(135deg, #1f77b4, #2c3e50); 
+                    padding: 1rem; border-radius: 10px; margin: 2rem 0;">
+            <h2 style="color: white; margin: 0;">Household & Team View</h2>
+        </div>
+    """, unsafe_allow_html=True)
 
-        with goal_col1:
-            # Add tabs for new goal and regular savings
-            goal_tab1, goal_tab2 = st.tabs(["🎯 Set New Goal", "💰 Regular Savings"])
-            
-            with goal_tab1:
-                st.subheader("Set New Goal")
-                goal_name = st.text_input("Goal Name", key="new_goal_name")
-                goal_amount = st.number_input("Target Amount", min_value=0.0, key="new_goal_amount")
-                goal_date = st.date_input("Target Date", key="new_goal_date")
-                
-                # Calculate recommended monthly savings
-                if goal_amount > 0 and goal_date > datetime.now().date():
-                    months = (goal_date - datetime.now().date()).days / 30
-                    if months > 0:
-                        monthly_savings = goal_amount / months
-                        st.info(f"💡 Recommended monthly savings: ₹{monthly_savings:.2f}")
-                
-                if st.button("Add Goal"):
-                    add_savings_goal(goal_name, goal_amount, goal_date)
-                    st.success("Goal added!")
-            
-            with goal_tab2:
-                st.subheader("Add Regular Savings")
-                if st.session_state.savings_goals:
-                    # Change selectbox to radio for goals
-                    selected_goal = st.radio(
-                        "Select Goal",
-                        options=[goal['name'] for goal in st.session_state.savings_goals],
-                        key="regular_savings_goal",
-                        horizontal=True  # Make radio buttons horizontal
-                    )
-                    
-                    savings_amount = st.number_input(
-                        "Amount to Save",
-                        min_value=0.0,
-                        step=100.0,
-                        key="regular_savings_amount"
-                    )
-                    
-                    # Change selectbox to radio for frequency
-                    savings_frequency = st.radio(
-                        "Saving Frequency",
-                        options=["Daily", "Weekly", "Monthly"],
-                        key="savings_frequency",
-                        horizontal=True  # Make radio buttons horizontal
-                    )
-                    
-                    if st.button("Add to Savings"):
-                        if update_savings_goal(selected_goal, savings_amount):
-                            # Calculate next auto-save date based on frequency
-                            next_date = datetime.now()
-                            if savings_frequency == "Daily":
-                                next_date = next_date + timedelta(days=1)
-                            elif savings_frequency == "Weekly":
-                                next_date = next_date + timedelta(days=7)
-                            else:  # Monthly
-                                next_date = next_date + timedelta(days=30)
-                            
-                            # Add a reminder for next savings
-                            add_reminder(
-                                next_date,
-                                f"Regular savings for {selected_goal}",
-                                savings_amount
-                            )
-                            
-                            st.success(f"""
-                                ✅ Added ₹{savings_amount:.2f} to {selected_goal}
-                                📅 Next saving reminder set for {next_date.strftime('%Y-%m-%d')}
-                            """)
-                        else:
-                            st.error("Failed to update savings")
-                else:
-                    st.info("Create a savings goal first!")
+    household_col1, household_col2 = st.columns([1, 2])
 
-        with goal_col2:
-            st.subheader("🏆 Your Goals")
-            if st.session_state.savings_goals:
-                for goal in st.session_state.savings_goals:
-                    progress = min(goal['current_amount'] / goal['target_amount'], 1.0) if goal['target_amount'] > 0 else 0.0
-                    remaining = goal['target_amount'] - goal['current_amount']
-                    
-                    # Create an expander for each goal
-                    with st.expander(f"🎯 {goal['name']}", expanded=True):
-                        col1, col2 = st.columns(2)
-                        with col1:
-                            st.write(f"Target: ₹{goal['target_amount']:.2f}")
-                            st.write(f"Saved: ₹{goal['current_amount']:.2f}")
-                        with col2:
-                            st.write(f"Remaining: ₹{remaining:.2f}")
-                            st.write(f"Due Date: {goal['target_date']}")
-                        
-                        st.write(f"Progress: {(progress * 100):.1f}%")
-                        st.progress(progress)
-                        
-                        # Calculate daily/monthly needed to reach goal
-                        if remaining > 0:
-                            target_date = datetime.strptime(goal['target_date'], "%Y-%m-%d").date()
-                            days_left = (target_date - datetime.now().date()).days
-                            if days_left > 0:
-                                daily_needed = remaining / days_left
-                                monthly_needed = daily_needed * 30
-                                st.info(f"""
-                                    💡 To reach your goal:
-                                    • Save ₹{daily_needed:.2f} daily
-                                    • Or ₹{monthly_needed:.2f} monthly
-                                    • {days_left} days remaining
-                                """)
+    with household_col1:
+        st.subheader("👪 Create Group")
+        group_name = st.text_input("Group Name", key="new_group_name")
+        group_members = st.multiselect(
+            "Members",
+            [user for user in get_offline_users() if user != st.session_state['username']],
+            key="new_group_members"
+        )
+        st.caption("Members are invited; their data is only combined once they accept.")
+        if st.button("Save Group"):
+            if not (group_name.strip() and group_members):
+                st.error("Enter a group name and at least one member")
+            elif create_group(group_name.strip(), st.session_state['username'], group_members):
+                st.success("Group saved, invitations sent!")
             else:
-                st.info("No savings goals set yet!")
+                st.error("That group name is already taken")
 
-        # Add Analytics Section
-        st.markdown("""
-            <div style="background: linear-gradient(135deg, #1f77b4, #2c3e50); 
-                        padding: 1rem; border-radius: 10px; margin: 2rem 0;">
-                <h2 style="color: white; margin: 0;">Advanced Analytics</h2>
-            </div>
-        """, unsafe_allow_html=True)
+        invitations = get_group_invitations(st.session_state['username'])
+        if invitations:
+            st.subheader("📨 Invitations")
+        for name, owner in invitations.items():
+            st.write(f"**{name}**" + (f" from {owner}" if owner else ""))
+            accept_col, decline_col = st.columns(2)
+            with accept_col:
+                if st.button("Accept", key=f"accept_group_{name}"):
+                    respond_to_invitation(name, st.session_state['username'], True)
+                    st.rerun()
+            with decline_col:
+                if st.button("Decline", key=f"decline_group_{name}"):
+                    respond_to_invitation(name, st.session_state['username'], False)
+                    st.rerun()
 
-        if not df.empty:
-            # Monthly Trends
-            st.subheader("📈 Monthly Trends")
-            monthly_trends = calculate_monthly_trends(df)
-            if not monthly_trends.empty:
-                # Convert index to datetime for better sorting
-                monthly_trends.index = pd.to_datetime(monthly_trends.index)
-                monthly_trends = monthly_trends.sort_index()
-                
-                # Create the plot
+    with household_col2:
+        st.subheader("📊 Combined View")
+        groups = get_user_groups(st.session_state['username'])
+        if not groups:
+            st.info("You are not part of any household or team yet!")
+        else:
+            selected_group = st.radio("Group", list(groups), horizontal=True, key="household_group")
+            pending = get_pending_members(selected_group)
+            if pending:
+                st.caption(f"Waiting for {', '.join(pending)} to accept")
+            rollup = load_household_rollup(groups[selected_group])
+            st.dataframe(rollup["members"].style.format({
+                'Income': '{:.2f}', 'Expenses': '{:.2f}', 'Balance': '{:.2f}', 'Savings': '{:.2f}'
+            }))
+            if not rollup["monthly"].empty:
                 fig = go.Figure()
-                
-                # Add Expense line
-                fig.add_trace(go.Scatter(
-                    x=monthly_trends.index.strftime('%Y-%m'),
-                    y=monthly_trends['Expense'],
-                    name='Expense',
-                    line=dict(color='#e74c3c'),
-                    mode='lines+markers'
-                ))
-                
-                # Add Income line
-                fig.add_trace(go.Scatter(
-                    x=monthly_trends.index.strftime('%Y-%m'),
-                    y=monthly_trends['Additional Income'],
-                    name='Additional Income',
-                    line=dict(color='#2ecc71'),
-                    mode='lines+markers'
-                ))
-                
-                # Update layout
-                fig.update_layout(
-                    title='Monthly Income vs Expenses',
-                    xaxis_title='Month',
-                    yaxis_title='Amount (₹)',
-                    hovermode='x unified',
-                    showlegend=True,
-                    legend=dict(
-                        orientation="h",
-                        yanchor="bottom",
-                        y=1.02,
-                        xanchor="right",
-                        x=1
-                    )
-                )
-                
+                fig.add_trace(go.Scatter(x=rollup["monthly"].index, y=rollup["monthly"]['Expense'],
+                                         name='Expense', line=dict(color='#e74c3c'), mode='lines+markers'))
+                fig.add_trace(go.Scatter(x=rollup["monthly"].index, y=rollup["monthly"]['Additional Income'],
+                                         name='Additional Income', line=dict(color='#2ecc71'), mode='lines+markers'))
+                fig.update_layout(title='Combined Monthly Income vs Expenses', xaxis_title='Month',
+                                  yaxis_title='Amount (₹)', hovermode='x unified')
                 st.plotly_chart(fig, use_container_width=True)
-
-            # Category Analysis with Plotly
-            st.subheader("📊 Category Analysis")
-            category_analysis = get_category_analysis(df)
-            if not category_analysis.empty:
-                fig = px.bar(
-                    category_analysis,
-                    title='Expenses by Category',
-                    labels={'value': 'Amount', 'index': 'Category'}
-                )
-                fig.update_layout(
-                    xaxis_title="Category",
-                    yaxis_title="Amount (₹)",
-                    showlegend=False
-                )
+            if 'Expense' in rollup["categories"].columns:
+                fig = px.bar(rollup["categories"]['Expense'], title='Combined Expenses by Category',
+                             labels={'value': 'Amount', 'index': 'Category'})
+                fig.update_layout(xaxis_title="Category", yaxis_title="Amount (₹)", showlegend=False)
                 st.plotly_chart(fig, use_container_width=True)
 
-            # Spending Insights
-            st.subheader("💡 Spending Insights")
-            col1, col2 = st.columns(2)
-            with col1:
-                top_expenses = df[df['Type']=='Expense'].nlargest(3, 'Amount')
-                st.write("Top Expenses:")
-                for _, expense in top_expenses.iterrows():
-                    st.write(f"₹{expense['Amount']:.2f} - {expense['Category']}")
-            
-            with col2:
-                savings_rate = ((total_income - total_expenses) / total_income * 100) if total_income > 0 else 0
-                st.write("Savings Rate:")
-                st.write(f"{savings_rate:.1f}%")
-    else:
-        st.info("👋 Welcome! Add your first transaction using the sidebar.")
+    account_session_memory()
 
 # Add a counter to session state if not exists
 if 'counter' not in st.session_state:
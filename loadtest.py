@@ -0,0 +1,255 @@
+"""Concurrent-session load test of the dashboard against synthetic users.
+
+    python loadtest.py --sessions 1 5 10 20 --transactions 2000 --adds 5
+
+Each simulated session is a Streamlit AppTest of expense_tracker.py that logs
+in, reruns, adds transactions, edits one and generates the PDF report. AppTest
+keeps a process-wide runtime, so every session runs in its own spawned worker
+process. The workers are pinned to --cpus cores (one by default) so that, as in
+a single Streamlit server process, concurrent sessions queue for the same CPU.
+Sessions start together once every worker has loaded the app. The app runs in
+a scratch directory holding the synthetic users, never against the real
+user_data/ or config.yaml.
+
+For each concurrency level this reports latency percentiles per action, the
+latency of user data writes and the most writes in flight at once (storage
+contention), and resident memory growth per session.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from multiprocessing import get_context
+from pathlib import Path
+
+import numpy as np
+import yaml
+from streamlit.testing.v1 import AppTest
+
+import core.storage
+from core.ledger import get_category_options
+from core.storage import save_local_data
+from users import hash_password
+
+APP_DIR = Path(__file__).resolve().parent
+APP_PATH = APP_DIR / "expense_tracker.py"
+PASSWORD = "loadtest"
+ACTIONS = ["login", "rerun", "add", "edit", "report"]
+PERCENTILES = [50, 90, 99]
+
+# Set in each worker process by _init_worker
+_start_barrier = None
+
+
+def synthetic_expenses(count, seed):
+    """count random transactions over the last year"""
+    rng = random.Random(seed)
+    categories = [category for category in get_category_options() if category != "Salary"]
+    today = date.today()
+    expenses = []
+    for _ in range(count):
+        income = rng.random() < 0.1
+        expenses.append({
+            "Date": (today - timedelta(days=rng.randrange(365))).isoformat(),
+            "Category": "Salary" if income else rng.choice(categories),
+            "Amount": round(rng.uniform(5000, 50000) if income else rng.lognormvariate(6, 1), 2),
+            "Currency": "INR" if rng.random() < 0.9 else rng.choice(["USD", "EUR"]),
+            "Description": f"{'payroll' if income else 'purchase'} {rng.randrange(500)}",
+            "Type": "Additional Income" if income else "Expense"
+        })
+    return expenses
+
+
+def prepare_workspace(usernames, transactions, flush_interval):
+    """Populate the current directory with the synthetic users and their data"""
+    hashed = hash_password(PASSWORD)
+    config = {"users": {username: hashed for username in usernames},
+              "storage": {"flush_interval": flush_interval, "fsync": False}}
+    with open("config.yaml", "w") as file:
+        yaml.dump(config, file, default_flow_style=False)
+    shutil.copy(APP_DIR / "fx_rates.csv", "fx_rates.csv")
+    for seed, username in enumerate(usernames):
+        save_local_data(username, {
+            "expenses": synthetic_expenses(transactions, seed),
+            "income": 50000,
+            "reminders": [],
+            "savings_goals": [],
+            "budgets": {"Food": 20000.0, "Shopping": 15000.0}
+        })
+
+
+def _timed_writes(write, intervals):
+    # Records the (start, end) wall-clock time of every user data write
+    def timed_write(*args, **kwargs):
+        started = time.time()
+        try:
+            return write(*args, **kwargs)
+        finally:
+            intervals.append((started, time.time()))
+    return timed_write
+
+
+def rss_bytes():
+    """Resident memory of this process, 0 where it cannot be read"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+
+def _init_worker(workspace, cpus, barrier):
+    global _start_barrier
+    _start_barrier = barrier
+    os.chdir(workspace)
+    if cpus and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, set(sorted(os.sched_getaffinity(0))[:cpus]))
+
+
+def run_session(username, adds, timeout, flush_interval):
+    """Drive one session through every action; runs in a worker process"""
+    result = {"timings": {action: [] for action in ACTIONS}, "writes": [], "error": None}
+    core.storage._write_atomic = _timed_writes(core.storage._write_atomic, result["writes"])
+    at = AppTest.from_file(str(APP_PATH), default_timeout=timeout)
+
+    def timed(action, step):
+        started = time.perf_counter()
+        step()
+        result["timings"][action].append(time.perf_counter() - started)
+        if at.exception:
+            raise RuntimeError(f"{username} {action}: {at.exception[0].message}")
+
+    def edit():
+        at.button(key="edit_0").click().run()
+        at.number_input(key="amount_0").set_value(42.0)
+        at.button(key="save_0").click().run()
+
+    try:
+        # Warm up on the login page, then start together with the other sessions
+        at.run()
+        _start_barrier.wait(timeout)
+        result["rss_start"] = rss_bytes()
+        at.text_input(key="login_username").input(username)
+        at.text_input(key="login_password").input(PASSWORD)
+        timed("login", lambda: at.button(key="login_button").click().run())
+        timed("rerun", at.run)
+        for number in range(adds):
+            at.number_input(key="transaction_amount").set_value(100.0 + number)
+            at.text_input(key="transaction_description").input(f"load test {number}")
+            timed("add", lambda: at.button(key="add_transaction").click().run())
+        timed("edit", edit)
+        timed("report", lambda: at.button(key="generate_pdf").click().run())
+        # Let the write-behind flusher write what the session left pending
+        time.sleep(flush_interval)
+    except Exception as error:
+        result["error"] = f"{username}: {error}"
+    result["rss_end"] = rss_bytes()
+    return result
+
+
+def summarize(seconds):
+    if not seconds:
+        return {"count": 0}
+    milliseconds = np.array(seconds) * 1000
+    summary = {"count": len(seconds), "max_ms": float(milliseconds.max())}
+    for percentile, value in zip(PERCENTILES, np.percentile(milliseconds, PERCENTILES)):
+        summary[f"p{percentile}_ms"] = float(value)
+    return summary
+
+
+def peak_overlap(intervals):
+    """Most intervals open at the same instant"""
+    events = sorted([(start, 1) for start, _ in intervals] + [(end, -1) for _, end in intervals])
+    peak = active = 0
+    for _, change in events:
+        active += change
+        peak = max(peak, active)
+    return peak
+
+
+def run_level(sessions, usernames, adds, timeout, flush_interval, workspace, cpus):
+    """Run sessions concurrent sessions and collect their measurements"""
+    context = get_context("spawn")
+    barrier = context.Barrier(sessions)
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=sessions, mp_context=context, initializer=_init_worker,
+                             initargs=(workspace, cpus, barrier)) as pool:
+        results = list(pool.map(run_session, usernames[:sessions], [adds] * sessions, [timeout] * sessions,
+                                [flush_interval] * sessions))
+    elapsed = time.perf_counter() - started
+
+    writes = [interval for result in results for interval in result["writes"]]
+    growth = [result["rss_end"] - result["rss_start"] for result in results if result.get("rss_start")]
+    return {
+        "sessions": sessions,
+        "elapsed_s": elapsed,
+        "failures": [result["error"] for result in results if result["error"]],
+        "actions": {
+            action: summarize([seconds for result in results for seconds in result["timings"][action]])
+            for action in ACTIONS
+        },
+        "storage": {**summarize([end - start for start, end in writes]), "peak_concurrent_writes": peak_overlap(writes)},
+        "memory": {
+            "per_session_mb": float(np.mean(growth)) / 2 ** 20 if growth else 0.0,
+            "max_session_mb": max(growth) / 2 ** 20 if growth else 0.0
+        }
+    }
+
+
+def print_level(result):
+    print(f"\n== {result['sessions']} concurrent session(s): {result['elapsed_s']:.1f}s, "
+          f"{len(result['failures'])} failed")
+    for failure in result["failures"][:3]:
+        print(f"   ! {failure}")
+    print(f"   {'action':<8}{'count':>7}" + "".join(f"{f'p{p} ms':>10}" for p in PERCENTILES) + f"{'max ms':>10}")
+    for action, summary in [*result["actions"].items(), ("write", result["storage"])]:
+        if not summary["count"]:
+            continue
+        print(f"   {action:<8}{summary['count']:>7}"
+              + "".join(f"{summary[f'p{p}_ms']:>10.1f}" for p in PERCENTILES) + f"{summary['max_ms']:>10.1f}")
+    print(f"   peak concurrent writes: {result['storage']['peak_concurrent_writes']}, "
+          f"memory growth per session: {result['memory']['per_session_mb']:.1f} MB mean, "
+          f"{result['memory']['max_session_mb']:.1f} MB max")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent-session load test of the dashboard")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 5, 10],
+                        help="concurrency levels to run, in order")
+    parser.add_argument("--transactions", type=int, default=1000, help="transactions per synthetic user")
+    parser.add_argument("--adds", type=int, default=3, help="transactions each session adds")
+    parser.add_argument("--flush-interval", type=float, default=2.0, help="write-behind interval for the run")
+    parser.add_argument("--timeout", type=float, default=120, help="seconds before a single rerun fails")
+    parser.add_argument("--cpus", type=int, default=1, help="cores shared by all sessions (0: no pinning)")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    usernames = [f"loaduser{number:03d}" for number in range(max(args.sessions))]
+    json_path = Path(args.json).resolve() if args.json else None
+    original_dir = os.getcwd()
+    workspace = tempfile.mkdtemp(prefix="loadtest-")
+    results = []
+    try:
+        os.chdir(workspace)
+        prepare_workspace(usernames, args.transactions, args.flush_interval)
+        for sessions in args.sessions:
+            result = run_level(sessions, usernames, args.adds, args.timeout, args.flush_interval, workspace,
+                               args.cpus)
+            print_level(result)
+            results.append(result)
+    finally:
+        os.chdir(original_dir)
+        shutil.rmtree(workspace, ignore_errors=True)
+
+    if json_path:
+        json_path.write_text(json.dumps(results, indent=2))
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import json
+import struct
+
+import pytest
+
+from core.binary_format import MAGIC, decode_user_data, encode_user_data, read_header
+from core.mapped_data import MappedUserData
+
+EXPENSES = [
+    {'Date': '2024-01-05', 'Category': 'Food', 'Amount': 12.5, 'Currency': 'INR', 'Description': 'chai ☕',
+     'Type': 'Expense'},
+    {'Date': '2023-12-31', 'Category': 'Salary', 'Amount': 5000.0, 'Currency': 'USD', 'Description': 'payroll',
+     'Type': 'Income', 'Id': 'abc', 'Tags': ['work', 1]},
+    {'Date': '2024-02-29', 'Category': 'Food', 'Amount': 0.1, 'Currency': None, 'Description': '',
+     'Type': 'Expense'},
+]
+DATA = {'expenses': EXPENSES, 'income': 100, 'reminders': [{'note': 'rent'}], 'savings_goals': [], 'budgets': {}}
+
+
+def as_version_1(raw):
+    # Version 1 files have the same layout without the monthly rollup in the header
+    _, header, offset = read_header(raw)
+    del header['rollup']
+    encoded = json.dumps(header).encode('utf-8')
+    return struct.pack('<4sHI', MAGIC, 1, len(encoded)) + encoded + raw[offset:]
+
+
+def test_round_trip():
+    assert decode_user_data(encode_user_data(DATA)) == DATA
+
+
+def test_version_1_files_still_decode(tmp_path):
+    raw = as_version_1(encode_user_data(DATA))
+    assert decode_user_data(raw) == DATA
+
+    path = tmp_path / 'alice.bin'
+    path.write_bytes(raw)
+    source = MappedUserData(path)
+    assert source.version == 1
+    assert source.rollup_frame() is None
+    assert source.read_rows(1, 3) == [
+        EXPENSES[1], dict(EXPENSES[2], Currency='INR')
+    ]
+    source.close()
+
+
+def test_every_truncation_raises_value_error(tmp_path):
+    raw = encode_user_data(DATA)
+    path = tmp_path / 'alice.bin'
+    for length in range(len(MAGIC), len(raw)):
+        with pytest.raises(ValueError):
+            decode_user_data(raw[:length])
+        path.write_bytes(raw[:length])
+        with pytest.raises(ValueError):
+            MappedUserData(path)
+
+
+def test_newer_version_is_rejected():
+    raw = encode_user_data(DATA)
+    with pytest.raises(ValueError, match='newer'):
+        decode_user_data(raw[:4] + struct.pack('<H', 99) + raw[6:])
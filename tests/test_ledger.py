@@ -0,0 +1,127 @@
+from datetime import date
+
+import pytest
+
+from core.filter_index import FilterIndex
+from core.ledger import Ledger, make_expense
+from core.search_index import SearchIndex
+from core.spending_monitor import SpendingMonitor
+from core.top_expenses import TopExpenses
+
+INDEXES = {'search': SearchIndex, 'filter': FilterIndex, 'spending': SpendingMonitor, 'top_expenses': TopExpenses}
+
+
+def expense(number, category='Food', currency='INR'):
+    return make_expense(date(2024, 1 + number % 12, 1 + number % 28), category, 10.0 + number % 97,
+                        f"purchase {number}", 'Expense', currency)
+
+
+def build_indexes(ledger):
+    return {name: ledger.index(name, factory) for name, factory in INDEXES.items()}
+
+
+def assert_indexes_match(ledger):
+    """Indexes maintained through the ledger's changes answer like ones built from scratch"""
+    fresh = Ledger(list(ledger.expenses))
+    for name, factory in INDEXES.items():
+        kept, built = ledger.index(name, factory), fresh.index(name, factory)
+        if name == 'search':
+            assert kept.search('purchase') == built.search('purchase')
+            assert len(kept) == len(ledger.expenses)
+        elif name == 'filter':
+            assert list(kept.positions(categories=['Food'])) == list(built.positions(categories=['Food']))
+        elif name == 'spending':
+            assert kept.category_stats('Food') == pytest.approx(built.category_stats('Food'))
+        else:
+            assert kept.top(20) == built.top(20)
+
+
+def test_undo_redo_keep_indexes_in_step():
+    ledger = Ledger([expense(number) for number in range(30)])
+    build_indexes(ledger)
+    ledger.add(date(2024, 3, 3), 'Rent', 500.0, 'landlord', 'Expense')
+    ledger.edit(4, date(2024, 2, 2), 'Bills', 42.0, 'purchase power', 'Expense')
+    ledger.delete(10)
+    with ledger.batch():
+        for index in (20, 15, 3):
+            ledger.delete(index)
+    assert ledger.undo_steps == 4
+    assert_indexes_match(ledger)
+
+    assert ledger.undo(4) == 4
+    assert [row['Description'] for row in ledger.expenses] == [f"purchase {number}" for number in range(30)]
+    assert_indexes_match(ledger)
+
+    assert ledger.redo(4) == 4
+    assert len(ledger.expenses) == 27
+    assert_indexes_match(ledger)
+
+
+def test_undo_delete_after_index_built():
+    ledger = Ledger([expense(number) for number in range(3)])
+    deleted = ledger.delete(1)
+    assert ledger.index('search', SearchIndex).search('purchase') == [0, 1]
+
+    assert ledger.undo() == 1
+    assert ledger.expenses[1] is deleted
+    assert ledger.index('search', SearchIndex).search('purchase') == [0, 1, 2]
+
+
+def test_undo_contiguous_bulk_delete_after_index_built():
+    ledger = Ledger([expense(number) for number in range(20000)])
+    with ledger.batch():
+        for index in range(14999, 0, -1):
+            ledger.delete(index)
+    build_indexes(ledger)
+
+    assert ledger.undo() == 1
+    assert len(ledger.expenses) == 20000
+    assert ledger.index('search', SearchIndex).search('purchase 14998') == [14998]
+    assert_indexes_match(ledger)
+
+
+def test_undo_earlier_delete_after_failed_import():
+    ledger = Ledger([expense(number) for number in range(5)])
+    build_indexes(ledger)
+    ledger.delete(2)
+    with pytest.raises(ValueError):
+        ledger.extend([expense(10), expense(11, currency='XXX')])
+    assert len(ledger.expenses) == 4
+    assert ledger.undo_steps == 1
+
+    assert ledger.undo() == 1
+    assert len(ledger.expenses) == 5
+    assert_indexes_match(ledger)
+
+
+def test_failed_undo_keeps_the_step():
+    ledger = Ledger([expense(number) for number in range(5)])
+    ledger.delete(0)
+    ledger.delete(0)
+
+    class Rejecting:
+        def insert(self, index, expense):
+            raise RuntimeError("rejected")
+
+        remove = update = insert
+
+    ledger.index('rejecting', lambda expenses: Rejecting())
+    with pytest.raises(RuntimeError):
+        ledger.undo()
+    assert (ledger.undo_steps, ledger.redo_steps, len(ledger.expenses)) == (2, 0, 3)
+
+    # The rejecting index was dropped with the others, so the retry succeeds
+    assert ledger.undo(2) == 2
+    assert len(ledger.expenses) == 5
+
+
+def test_undo_many_deletes_at_one_position_renumbers_row_ids():
+    # Each undo puts a row back before the one the previous undo put back, until the gap runs out
+    ledger = Ledger([expense(number) for number in range(80)])
+    for _ in range(60):
+        ledger.delete(1)
+    build_indexes(ledger)
+
+    assert ledger.undo(60) == 60
+    assert [row['Description'] for row in ledger.expenses] == [f"purchase {number}" for number in range(80)]
+    assert_indexes_match(ledger)
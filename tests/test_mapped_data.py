@@ -0,0 +1,43 @@
+from datetime import date
+
+from core.binary_format import encode_user_data
+from core.ledger import Ledger, make_expense
+from core.mapped_data import MappedUserData, PagedExpenses
+from core.spending_monitor import SpendingMonitor
+from core.top_expenses import TopExpenses
+from core.write_behind import snapshot_user_data
+
+
+def expense(number):
+    return make_expense(date(2024, 1 + number % 12, 1 + number % 28), ('Food', 'Rent')[number % 2],
+                        10.0 + number % 97, f"purchase {number}", 'Expense', 'INR')
+
+
+def mapped_expenses(tmp_path, expenses, page_size=4):
+    path = tmp_path / 'alice.smmb'
+    path.write_bytes(encode_user_data({'expenses': expenses, 'income': 0}))
+    return PagedExpenses(MappedUserData(path), page_size)
+
+
+def test_indexes_build_without_decoding_rows(tmp_path):
+    rows = [expense(number) for number in range(20)]
+    paged = mapped_expenses(tmp_path, rows)
+    ledger = Ledger(paged)
+    top = ledger.index('top_expenses', TopExpenses)
+    ledger.index('spending', SpendingMonitor)
+    assert paged.decoded_rows == 0
+
+    assert top.top(3) == TopExpenses(rows).top(3)
+
+
+def test_snapshot_is_not_changed_by_later_edits(tmp_path):
+    rows = [expense(number) for number in range(20)]
+    paged = mapped_expenses(tmp_path, rows)
+    paged.append(expense(20))
+    snapshot = snapshot_user_data(paged, 0, [], [], {})['expenses']
+    assert paged.decoded_rows == 0
+
+    paged[1] = expense(99)
+    del paged[0]
+    list(paged)
+    assert list(snapshot) == rows + [expense(20)]
@@ -0,0 +1,75 @@
+import gc
+
+from core.session_memory import SessionRegistry
+
+
+class State(dict):
+    """Session state stand-in; a plain dict cannot be weakly referenced"""
+
+
+def usage(ledger, caches=0, widgets=10):
+    return {'ledger': ledger, 'caches': caches, 'widgets': widgets}
+
+
+def registry_with(sessions, budget=500, idle_seconds=60):
+    """A registry of {session_id: (last_active, ledger bytes)} and the states it holds"""
+    registry = SessionRegistry(budget, idle_seconds)
+    states = {}
+    for session_id, (last_active, ledger) in sessions.items():
+        states[session_id] = State(username=session_id)
+        registry.record(session_id, session_id, states[session_id], usage(ledger), now=last_active)
+    return registry, states
+
+
+def evicting(evicted_states):
+    def evict(state):
+        evicted_states.append(state['username'])
+        return True
+    return evict
+
+
+def test_nothing_is_evicted_within_budget():
+    registry, _ = registry_with({'a': (0, 200), 'b': (0, 200)})
+    assert registry.evict_idle(evicting([]), now=1000) == []
+    assert registry.evictions == 0
+
+
+def test_least_recently_active_idle_sessions_go_first_until_within_budget():
+    registry, _ = registry_with({'old': (0, 300), 'older': (-10, 300), 'recent': (950, 300), 'me': (0, 300)})
+    called = []
+    # 1240 bytes against a 500 budget: 'me' is excluded and 'recent' is not idle yet
+    assert registry.evict_idle(evicting(called), exclude='me', now=1000) == ['older', 'old']
+    assert called == ['older', 'old']
+    assert registry.total_bytes() == 640
+    assert {row['User']: row['evicted'] for row in registry.stats(now=1000)} == {
+        'old': True, 'older': True, 'recent': False, 'me': False
+    }
+
+    # Evicted sessions are not handed over again, and nothing else is idle and eligible
+    assert registry.evict_idle(evicting(called), exclude='me', now=1000) == []
+    assert registry.evictions == 2
+
+
+def test_stops_once_within_budget():
+    registry, _ = registry_with({'a': (0, 400), 'b': (5, 400)}, budget=500)
+    assert registry.evict_idle(evicting([]), now=1000) == ['a']
+
+
+def test_refused_eviction_moves_on_to_the_next_session():
+    registry, _ = registry_with({'busy': (0, 400), 'idle': (5, 400)})
+    assert registry.evict_idle(lambda state: state['username'] != 'busy', now=1000) == ['idle']
+    assert registry.total_bytes() == 420
+
+
+def test_touch_keeps_a_session_from_being_evicted():
+    registry, _ = registry_with({'a': (0, 400), 'b': (5, 400)})
+    registry.touch('a', now=990)
+    assert registry.evict_idle(evicting([]), now=1000) == ['b']
+
+
+def test_closed_sessions_drop_out():
+    registry, states = registry_with({'a': (0, 400), 'b': (5, 400)})
+    del states['a']
+    gc.collect()
+    assert registry.total_bytes() == 410
+    assert registry.evict_idle(evicting([]), now=1000) == []
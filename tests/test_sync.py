@@ -0,0 +1,90 @@
+from datetime import date
+from functools import partial
+
+from core.ledger import Ledger
+from core.sync import new_sync_state, resolve, sync_user_data
+from core.sync_server import SyncStore
+
+
+def user_data(expenses):
+    return {'expenses': expenses, 'income': 0, 'reminders': [], 'savings_goals': [], 'budgets': {}}
+
+
+class Device:
+    """One replica of a user's data, editing through a ledger and syncing with a store"""
+
+    def __init__(self, store, expenses=()):
+        self.exchange = partial(store.exchange, 'alice')
+        self.data = user_data([dict(expense) for expense in expenses])
+        self.state = new_sync_state()
+
+    def edit_amount(self, amount, at):
+        ledger = Ledger(self.data['expenses'], clock=lambda: at)
+        expense = ledger.expenses[0]
+        ledger.edit(0, date.fromisoformat(expense['Date']), expense['Category'], amount,
+                    expense['Description'], expense['Type'], expense['Currency'])
+
+    def sync(self, at):
+        self.data, self.state, stats = sync_user_data(self.data, self.state, self.exchange, now=at)
+        return stats
+
+    def amounts(self):
+        return [expense['Amount'] for expense in self.data['expenses']]
+
+
+def change(vv, modified, replica, amount):
+    return {'id': 'e1', 'kind': 'expenses', 'data': {'Amount': amount}, 'vv': vv,
+            'modified': modified, 'replica': replica}
+
+
+def test_resolve_keeps_the_dominating_version():
+    old, new = change({'a': 1}, 50, 'a', 1), change({'a': 2}, 10, 'a', 2)
+    assert resolve(old, new) == (new, False)
+    assert resolve(new, old) == (new, False)
+
+
+def test_resolve_concurrent_edits_keeps_the_later_modification():
+    first, second = change({'a': 1}, 10, 'a', 1), change({'b': 1}, 20, 'b', 2)
+    for stored, incoming in ((first, second), (second, first)):
+        kept, conflict = resolve(stored, incoming)
+        assert conflict
+        assert kept['data'] == {'Amount': 2}
+        assert kept['vv'] == {'a': 1, 'b': 1}
+
+
+def test_later_edit_wins_when_its_device_syncs_first():
+    store = SyncStore()
+    phone = Device(store)
+    Ledger(phone.data['expenses'], clock=lambda: 1.0).add(
+        date(2024, 1, 5), 'Food', 100.0, 'lunch', 'Expense')
+    phone.sync(at=2.0)
+    laptop = Device(store)
+    laptop.sync(at=3.0)
+    assert laptop.amounts() == [100.0]
+
+    phone.edit_amount(111.0, at=10.0)
+    laptop.edit_amount(222.0, at=20.0)
+    # The later edit reaches the server first; the earlier one must not override it
+    assert laptop.sync(at=25.0)['conflicts'] == 0
+    assert phone.sync(at=30.0)['conflicts'] == 1
+    laptop.sync(at=35.0)
+
+    assert phone.amounts() == laptop.amounts() == [222.0]
+
+
+def test_later_edit_wins_when_its_device_syncs_last():
+    store = SyncStore()
+    phone = Device(store)
+    Ledger(phone.data['expenses'], clock=lambda: 1.0).add(
+        date(2024, 1, 5), 'Food', 100.0, 'lunch', 'Expense')
+    phone.sync(at=2.0)
+    laptop = Device(store)
+    laptop.sync(at=3.0)
+
+    laptop.edit_amount(222.0, at=10.0)
+    phone.edit_amount(111.0, at=20.0)
+    phone.sync(at=25.0)
+    laptop.sync(at=30.0)
+    phone.sync(at=35.0)
+
+    assert phone.amounts() == laptop.amounts() == [111.0]
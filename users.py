@@ -1,6 +1,5 @@
 import yaml
 from pathlib import Path
-import streamlit as st
 from yaml.loader import SafeLoader
 import bcrypt
 
@@ -38,12 +37,94 @@ def authenticate(username, password):
         return check_password(password, config['users'][username])
     return False
 
+def _load_groups(config):
+    # {name: {'owner', 'members', 'invited'}}; only members who accepted are in 'members'. Groups saved
+    # as a plain member list, before invitations, count everyone as invited until they accept
+    groups = config.get('groups') or {}
+    return {
+        name: group if isinstance(group, dict) else {'owner': None, 'members': [], 'invited': sorted(group)}
+        for name, group in groups.items()
+    }
+
+def get_user_groups(username):
+    """Households/teams the user has joined, as {group name: members who accepted}"""
+    groups = _load_groups(load_config())
+    return {name: group['members'] for name, group in groups.items() if username in group['members']}
+
+def get_group_invitations(username):
+    """Households/teams the user is invited to, as {group name: owner}"""
+    groups = _load_groups(load_config())
+    return {name: group['owner'] for name, group in groups.items() if username in group['invited']}
+
+def get_pending_members(name):
+    """Invited users of a group who have not accepted yet"""
+    group = _load_groups(load_config()).get(name)
+    return group['invited'] if group else []
+
+def create_group(name, owner, invited):
+    """Create a household/team with owner as its only member and invite the others;
+    False if the name is taken"""
+    config = load_config()
+    groups = _load_groups(config)
+    if name in groups:
+        return False
+    groups[name] = {'owner': owner, 'members': [owner], 'invited': sorted(set(invited) - {owner})}
+    config['groups'] = groups
+    save_config(config)
+    return True
+
+def respond_to_invitation(name, username, accept):
+    """Join a group the user is invited to, or decline; False if there is no such invitation"""
+    config = load_config()
+    groups = _load_groups(config)
+    group = groups.get(name)
+    if group is None or username not in group['invited']:
+        return False
+    group['invited'].remove(username)
+    if accept:
+        group['members'] = sorted(set(group['members']) | {username})
+    config['groups'] = groups
+    save_config(config)
+    return True
+
+# Durability of user data writes, overridable in a 'storage' section of config.yaml:
+# flush_interval is how many seconds saves may be held back and coalesced (0 writes
+# every change at once); fsync forces each write to disk before it counts as done
+DEFAULT_STORAGE_SETTINGS = {'flush_interval': 2.0, 'fsync': False}
+
+def get_storage_settings():
+    """Write-behind and fsync settings for user data files"""
+    config = load_config()
+    return {**DEFAULT_STORAGE_SETTINGS, **(config.get('storage') or {})}
+
+# Where the Sync button sends changes, overridable in a 'sync' section of config.yaml;
+# `python -m core.sync_server` serves this address
+DEFAULT_SYNC_SETTINGS = {'url': 'http://127.0.0.1:8765'}
+
+def get_sync_settings():
+    """Sync server settings"""
+    config = load_config()
+    return {**DEFAULT_SYNC_SETTINGS, **(config.get('sync') or {})}
+
+# Server-wide memory budget for logged-in sessions: past it, the ledgers of sessions idle for
+# idle_minutes are dropped and reloaded from disk when they return. Usernames listed under
+# operators see the session stats in the sidebar.
+DEFAULT_SESSION_SETTINGS = {'memory_budget_mb': 1024, 'idle_minutes': 15, 'operators': []}
+
+def get_session_settings():
+    """Session memory budget, idle eviction and operator settings"""
+    config = load_config()
+    return {**DEFAULT_SESSION_SETTINGS, **(config.get('sessions') or {})}
+
 def get_offline_users():
     """Get list of users who have local data"""
     data_dir = Path("user_data")
     users = []
     if data_dir.exists():
-        for file in data_dir.glob("*_data.json"):
-            username = file.stem.replace("_data", "")
-            users.append(username)
+        # Binary files, plus JSON files written before the binary format and not yet migrated
+        for pattern in ("*_data.bin", "*_data.json"):
+            for file in data_dir.glob(pattern):
+                username = file.stem.replace("_data", "")
+                if username not in users:
+                    users.append(username)
     return users 